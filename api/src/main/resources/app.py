@@ -34,12 +34,15 @@ from tornado_cors import CorsMixin
 import package_registrar
 import application_registrar
 import deployer_utils
+from deployer_utils import DEFAULT_READ_CONCURRENCY
 import application_summary_registrar
 import deployment_manager
 from deployer_system_test import DeployerRestClientTester
 from exceptiondef import NotFound, ConflictingState, FailedValidation, FailedCreation, FailedConnection, Forbidden
 from async_dispatcher import AsyncDispatcher
 from package_repo_rest_client import PackageRepoRestClient
+from hbase_connection_pool import HbaseConnectionPool, DEFAULT_POOL_SIZE, DEFAULT_BORROW_TIMEOUT
+from package_cache import DEFAULT_PACKAGE_CACHE_SIZE
 
 options.logging = None
 
@@ -56,6 +59,7 @@ class Application(tornado.web.Application):
             (r'/applications/(.*)', ApplicationHandler),
             (r'/applications', ApplicationsHandler),
             (r'/environment/endpoints', EnvironmentHandler),
+            (r'/environment/caches', CacheStatsHandler),
             (r'/selftest/all', SelfTestHandler)
         ]
         tornado.web.Application.__init__(self, handlers)
@@ -115,6 +119,22 @@ class BaseHandler(CorsMixin, tornado.web.RequestHandler):
 
         IOLoop.instance().add_callback(callback=finish)
 
+    def get_list_arguments(self, *names):
+        """
+        Reads the paging arguments, limit and start_after, and any of the named filters that were supplied.
+        :raises ValueError: if limit is not a positive integer
+        """
+        arguments = {}
+        for name in ('limit', 'start_after') + names:
+            value = self.get_argument(name, default=None)
+            if value is not None:
+                arguments[name] = value
+        if 'limit' in arguments:
+            arguments['limit'] = int(arguments['limit'])
+            if arguments['limit'] <= 0:
+                raise ValueError('limit must be positive')
+        return arguments
+
     def send_client_error(self, msg):
         def finish():
             self.set_status(400)
@@ -144,6 +164,15 @@ class EnvironmentHandler(BaseHandler):
         DISPATCHER.run_as_asynch(task=do_call, on_error=self.handle_error)
 
 
+class CacheStatsHandler(BaseHandler):
+    @asynchronous
+    def get(self):
+        def do_call():
+            self.send_result(dm.get_cache_stats(self.get_argument("user.name", default='')))
+
+        DISPATCHER.run_as_asynch(task=do_call, on_error=self.handle_error)
+
+
 class RepositoryHandler(BaseHandler):
     @asynchronous
     def get(self):
@@ -161,8 +190,14 @@ class RepositoryHandler(BaseHandler):
 class PackagesHandler(BaseHandler):
     @asynchronous
     def get(self):
+        try:
+            arguments = self.get_list_arguments('owner', 'package')
+        except ValueError:
+            self.send_client_error("limit must be a positive integer")
+            return
+
         def do_call():
-            self.send_result(dm.list_packages(self.get_argument("user.name", default='')))
+            self.send_result(dm.list_packages(self.get_argument("user.name", default=''), **arguments))
 
         DISPATCHER.run_as_asynch(task=do_call, on_error=self.handle_error)
 
@@ -217,8 +252,19 @@ class PackageStatusHandler(BaseHandler):
 class ApplicationsHandler(BaseHandler):
     @asynchronous
     def get(self):
+        try:
+            arguments = self.get_list_arguments('owner', 'status', 'package')
+        except ValueError:
+            self.send_client_error("limit must be a positive integer")
+            return
+        detail = self.get_argument("detail", default='').lower() == 'true'
+
         def do_call():
-            self.send_result(dm.list_applications(self.get_argument("user.name", default='')))
+            user_name = self.get_argument("user.name", default='')
+            if detail:
+                self.send_result(dm.list_application_statuses(user_name, **arguments))
+            else:
+                self.send_result(dm.list_applications(user_name, **arguments))
 
         DISPATCHER.run_as_asynch(task=do_call, on_error=self.handle_error)
 
@@ -243,12 +289,7 @@ class ApplicationDetailHandler(BaseHandler):
     def get(self, name, action):
         def do_call():
             if action == 'status':
-                app_info = dm.get_application_info(name, self.get_argument("user.name", default=''))
-                ret = {
-                    "status": app_info["status"],
-                    "information": app_info.get("information", None)
-                }
-                self.send_result(ret)
+                self.send_result(dm.get_application_status(name, self.get_argument("user.name", default='')))
             elif action == 'detail':
                 self.send_result(dm.get_application_detail(name, self.get_argument("user.name", default='')))
             elif action == 'summary':
@@ -324,17 +365,28 @@ def main():
     deployer_utils.fill_hadoop_env(config['environment'], config['config'])
 
     package_repository = PackageRepoRestClient(config['config']["package_repository"], config['config']['stage_root'])
+    # one pool of thrift connections shared by all the registrars
+    hbase_connection_pool = HbaseConnectionPool(config['environment']['hbase_thrift_server'],
+                                                size=config['config'].get('hbase_connection_pool_size', DEFAULT_POOL_SIZE),
+                                                timeout=config['config'].get('hbase_connection_timeout', DEFAULT_BORROW_TIMEOUT))
     dm = deployment_manager.DeploymentManager(package_repository,
                                               package_registrar.HbasePackageRegistrar(
                                                   config['environment']['hbase_thrift_server'],
                                                   config['environment']['webhdfs_host'],
                                                   'hdfs',
                                                   config['environment']['webhdfs_port'],
-                                                  config['config']['stage_root']),
+                                                  config['config']['stage_root'],
+                                                  hbase_connection_pool,
+                                                  config['config'].get('package_cache_size', DEFAULT_PACKAGE_CACHE_SIZE),
+                                                  config['config'].get('hdfs_read_concurrency', DEFAULT_READ_CONCURRENCY),
+                                                  config['config'].get('metadata_cache_size',
+                                                                       package_registrar.DEFAULT_METADATA_CACHE_SIZE)),
                                               application_registrar.HbaseApplicationRegistrar(
-                                                  config['environment']['hbase_thrift_server']),
+                                                  config['environment']['hbase_thrift_server'],
+                                                  hbase_connection_pool),
                                               application_summary_registrar.HBaseAppplicationSummary(
-                                                  config['environment']['hbase_thrift_server']),
+                                                  config['environment']['hbase_thrift_server'],
+                                                  hbase_connection_pool),
                                               config['environment'],
                                               config['config'])
 
@@ -29,9 +29,11 @@ import re
 import shutil
 import logging
 import uuid
+import copy
 from importlib import import_module
-from exceptiondef import FailedValidation, FailedCreation
+from exceptiondef import FailedValidation, FailedCreation, FailedComponents
 from deployer_utils import HDFS
+from parallel_tasks import run_tasks, DEFAULT_COMPONENT_CONCURRENCY
 
 
 class ApplicationCreator(object):
@@ -66,32 +68,71 @@ class ApplicationCreator(object):
 
         stage_path = self._stage_package(package_data_path)
 
-        # create each class of components in the package, aggregating any
+        # create the components of every type in the package concurrently, aggregating any
         # component specific return data for destruction
-        create_metadata = {}
+        tasks = {}
+        for component_type, components in package_metadata['component_types'].iteritems():
+            creator = self._load_creator(component_type)
+            for component_name, component in components.iteritems():
+                tasks[(component_type, component_name)] = self._create_component_task(
+                    creator, stage_path, application_name, user_name, component_name, component,
+                    property_overrides.get(component_type))
+
         try:
-            for component_type, components in package_metadata['component_types'].iteritems():
-                creator = self._load_creator(component_type)
-                result = creator.create_components(stage_path,
-                                                   application_name,
-                                                   user_name,
-                                                   components,
-                                                   property_overrides.get(component_type))
-                create_metadata[component_type] = result
+            results, errors = run_tasks(tasks, self._concurrency(),
+                                        self._create_dependencies(package_metadata), stop_on_error=True)
         finally:
             # clean up staged package data
             shutil.rmtree(stage_path)
 
+        if errors:
+            self._rollback_components(application_name, results)
+            raise errors[sorted(errors)[0]]
+
+        create_metadata = {}
+        for component_type, components in package_metadata['component_types'].iteritems():
+            create_metadata[component_type] = [results[(component_type, component_name)] for component_name in components]
         return create_metadata
 
+    def _create_component_task(self, creator, stage_path, application_name, user_name, component_name, component,
+                               components_overrides):
+        return lambda: creator.create_named_component(stage_path, application_name, user_name, component_name,
+                                                      component, components_overrides)
+
+    def _create_dependencies(self, package_metadata):
+        # components with an hbase.json descriptor create tables and hive schemas that may refer to each
+        # other, so they are created one after another, ordered by component type and name
+        dependencies = {}
+        previous = None
+        for component_type, components in sorted(package_metadata['component_types'].iteritems()):
+            for component_name, component in sorted(components.iteritems()):
+                if 'hbase.json' in component['component_detail']:
+                    if previous is not None:
+                        dependencies[(component_type, component_name)] = [previous]
+                    previous = (component_type, component_name)
+        return dependencies
+
+    def _rollback_components(self, application_name, created):
+        logging.info("Rolling back %d components of %s", len(created), application_name)
+        tasks = {}
+        for (component_type, component_name), create_data in created.iteritems():
+            creator = self._load_creator(component_type)
+            tasks[(component_type, component_name)] = self._component_task(creator.destroy_components, application_name, create_data)
+        _, errors = run_tasks(tasks, self._concurrency())
+        for key in sorted(errors):
+            logging.error("Unable to roll back %s/%s of %s: %s", key[0], key[1], application_name, str(errors[key]))
+
+    def _concurrency(self):
+        return self._config.get('component_concurrency', DEFAULT_COMPONENT_CONCURRENCY)
+
     def destroy_application(self, application_name, application_create_data):
 
         logging.debug("destroy_application: %s %s", application_name, application_create_data)
 
+        self._run_component_operation('destroy', application_name, application_create_data, 'destroy_components')
+
         app_hdfs_root = None
-        for component_type, component_create_data in application_create_data.iteritems():
-            creator = self._load_creator(component_type)
-            creator.destroy_components(application_name, component_create_data)
+        for component_create_data in application_create_data.itervalues():
             if component_create_data and 'application_hdfs_root' in component_create_data[0]:
                 app_hdfs_root = component_create_data[0]['application_hdfs_root']
 
@@ -106,17 +147,37 @@ class ApplicationCreator(object):
 
         logging.debug("start_application: %s %s", application_name, application_create_data)
 
-        for component_type, component_create_data in application_create_data.iteritems():
-            creator = self._load_creator(component_type)
-            creator.start_components(application_name, component_create_data)
+        return self._run_component_operation('start', application_name, application_create_data, 'start_components')
 
     def stop_application(self, application_name, application_create_data):
 
         logging.debug("stop_application: %s %s", application_name, application_create_data)
 
+        return self._run_component_operation('stop', application_name, application_create_data, 'stop_components')
+
+    def _run_component_operation(self, operation, application_name, application_create_data, method_name):
+        """
+        Calls a Creator method for every component of the application concurrently
+        :return: the names of the components, as type/name, the operation succeeded for
+        :raises FailedComponents: if the operation failed for any component, after it has been tried on all of them
+        """
+        tasks = {}
         for component_type, component_create_data in application_create_data.iteritems():
             creator = self._load_creator(component_type)
-            creator.stop_components(application_name, component_create_data)
+            for single_component_data in component_create_data or []:
+                key = '%s/%s' % (component_type, single_component_data['component_name'])
+                tasks[key] = self._component_task(getattr(creator, method_name), application_name, single_component_data)
+
+        results, errors = run_tasks(tasks, self._concurrency())
+        succeeded = sorted(results)
+        if errors:
+            failed = dict((key, '%s: %s' % (type(error).__name__, str(error))) for key, error in errors.iteritems())
+            logging.error("%s %s failed for %s", operation, application_name, ', '.join(sorted(failed)))
+            raise FailedComponents(operation, succeeded, failed)
+        return succeeded
+
+    def _component_task(self, method, application_name, single_component_data):
+        return lambda: method(application_name, [single_component_data])
 
     def validate_package(self, package_name, package_metadata):
 
@@ -188,7 +249,24 @@ class ApplicationCreator(object):
         if not os.path.isdir(self._config['stage_root']):
             os.mkdir(self._config['stage_root'])
 
-        tar = tarfile.open(package_data_path)
         stage_path = "%s/%s" % (self._config['stage_root'], uuid.uuid4())
-        tar.extractall(path=stage_path)
+        # extracting from a stream reads the archive once, extractall would list it first then seek back for each member
+        tar = tarfile.open(package_data_path, 'r|*')
+        try:
+            # as extractall does, directories are writable while their contents are extracted and get
+            # their own mode and times afterwards, deepest first
+            directories = []
+            for member in tar:
+                if member.isdir():
+                    directories.append(member)
+                    member = copy.copy(member)
+                    member.mode = 0o700
+                tar.extract(member, path=stage_path)
+            for directory in sorted(directories, key=lambda member: member.name, reverse=True):
+                directory_path = os.path.join(stage_path, directory.name)
+                tar.chown(directory, directory_path)
+                tar.utime(directory, directory_path)
+                tar.chmod(directory, directory_path)
+        finally:
+            tar.close()
         return stage_path
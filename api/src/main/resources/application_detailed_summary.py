@@ -3,21 +3,29 @@ import json
 import logging
 import sys
 from importlib import import_module
-from multiprocessing import TimeoutError as ThreadTimeoutError
+import threading
+import Queue
 
 from summary_aggregator import ComponentSummaryAggregator
 from plugins_summary.yarn_connection import YarnConnection
+from plugins_summary.summary_context import SummaryContext
 from async_dispatcher import AsyncDispatcher
+from hbase_connection_pool import HbaseConnectionPool, DEFAULT_POOL_SIZE, DEFAULT_BORROW_TIMEOUT
 import application_registrar
 import application_summary_registrar
+from application_summary_registrar import DEFAULT_SUMMARY_BATCH_SIZE
 import deployer_utils
 
 
 # constants
 SUMMARY_INTERVAL = 30
-STATUS_INTERVAL = 0.1
+DEFAULT_SUMMARY_THREADS = 4
 REST_API_REQ_TIMEOUT = 5
 MAX_APP_SUMMARY_TIMEOUT = 60
+SUMMARY_REFRESH_INTERVAL = 300
+# component statuses that only change when the component is started again, which shows up in YARN or the DM status
+SETTLED_STATUSES = ['CREATED', 'FINISHED_SUCCEEDED', 'FINISHED_FAILED', 'FINISHED_KILLED', 'SUCCEEDED', 'KILLED',
+                    'FAILED', 'COMPLETED', 'COMPLETED_WITH_FAILURES', 'FAILED_TO_SUBMIT_TO_YARN']
 
 def milli_time():
     return int(round(time.time() * 1000))
@@ -28,12 +36,27 @@ class ApplicationDetailedSummary(object):
         self._environment = environment
         self._environment.update({'rest_api_req_timeout': REST_API_REQ_TIMEOUT})
         self._config = config
-        self._application_registrar = application_registrar.HbaseApplicationRegistrar(environment['hbase_thrift_server'])
-        self._application_summary_registrar = application_summary_registrar.HBaseAppplicationSummary(environment['hbase_thrift_server'])
+        hbase_connection_pool = HbaseConnectionPool(environment['hbase_thrift_server'],
+                                                    size=config.get('hbase_connection_pool_size', DEFAULT_POOL_SIZE),
+                                                    timeout=config.get('hbase_connection_timeout', DEFAULT_BORROW_TIMEOUT))
+        self._application_registrar = application_registrar.HbaseApplicationRegistrar(environment['hbase_thrift_server'],
+                                                                                      hbase_connection_pool)
+        summary_batch_size = config.get('summary_batch_size', DEFAULT_SUMMARY_BATCH_SIZE)
+        self._application_summary_registrar = application_summary_registrar.HBaseAppplicationSummary(environment['hbase_thrift_server'],
+                                                                                                     hbase_connection_pool,
+                                                                                                     summary_batch_size)
         self._yarn_connection = YarnConnection(self._environment)
         self._summary_aggregator = ComponentSummaryAggregator()
         self._component_creators = {}
-        self.dispatcher = AsyncDispatcher(num_threads=4)
+        # application -> summary, fingerprint and time of the last summary posted to HBase
+        self._previous_summaries = {}
+        self._refresh_interval = config.get('summary_refresh_interval', SUMMARY_REFRESH_INTERVAL)
+        self._app_summary_timeout = config.get('app_summary_timeout', MAX_APP_SUMMARY_TIMEOUT)
+        # application -> Event set to cancel its summary, for summaries still running
+        self._running = {}
+        self._lock = threading.Lock()
+        self._summary_threads = config.get('summary_threads', DEFAULT_SUMMARY_THREADS)
+        self.dispatcher = AsyncDispatcher(num_threads=self._summary_threads)
 
     def generate(self):
         """
@@ -42,47 +65,164 @@ class ApplicationDetailedSummary(object):
         applist = self._application_registrar.list_applications()
         logging.info("List of applications: %s", ', '.join(applist))
         self._application_summary_registrar.sync_with_dm(applist)
-        apps_to_be_processed = {}
+        for app in set(self._previous_summaries) - set(applist):
+            del self._previous_summaries[app]
 
+        # the resource manager is asked once per pass for what changed, shared by every component summary
+        try:
+            self._yarn_connection.refresh_snapshot()
+        except Exception as ex:
+            logging.error('%s while trying to get the list of YARN applications', str(ex))
+            self._yarn_connection.use_snapshot(None)
+
+        start_time = time.time()
+        # the summaries of the pass are written together by the flush() at its end
+        self._application_summary_registrar.begin_batch()
+        events = Queue.Queue()
+        waiting = set()
         for app in applist:
-            apps_to_be_processed.update({app: self.generate_summary(app)})
-
-        wait_time = 0
-
-        # waiting block for all the application to get completed
-        while len(apps_to_be_processed) != 0:
-            for app_name in apps_to_be_processed.keys():
-                try:
-                    apps_to_be_processed[app_name].task.get(STATUS_INTERVAL) #
-                    del apps_to_be_processed[app_name]
-                except ThreadTimeoutError:
-                    wait_time += STATUS_INTERVAL # increasing the wait time by status interval
-                    if round(wait_time, 1) % MAX_APP_SUMMARY_TIMEOUT == 0:
-                        # logging out list of applications whose wait time exceeds the max app summary timeout, on the interval of same max app summary timeout
-                        # i.e. every 60 seconds as per current max app summary timeout
-                        logging.error("Timeout exceeded, %s applications waiting for %d seconds", (',').join(apps_to_be_processed.keys()), int(wait_time))
-
-    def generate_summary(self, application):
+            with self._lock:
+                if app in self._running:
+                    # still running from an earlier pass, it is not started again until it finishes
+                    logging.warning("Application: %s still being summarised from an earlier pass", app)
+                    continue
+                self._running[app] = threading.Event()
+            self.generate_summary(app, self._running[app], events)
+            waiting.add(app)
+
+        # each application has app_summary_timeout seconds from when a worker picks it up, and the pass
+        # lasts as long as every worker running its share of applications up to the timeout. Workers held
+        # by summaries that timed out are not freed, so applications still queued then are given up on too
+        deadlines = {}
+        rounds = (len(waiting) + self._summary_threads - 1) // self._summary_threads
+        pass_deadline = time.time() + rounds * self._app_summary_timeout
+        while waiting:
+            timeout = max(0, min(deadlines.values() + [pass_deadline]) - time.time())
+            try:
+                app, finished = events.get(True, timeout)
+                if finished:
+                    waiting.discard(app)
+                    deadlines.pop(app, None)
+                elif app in waiting:
+                    deadlines[app] = time.time() + self._app_summary_timeout
+            except Queue.Empty:
+                now = time.time()
+                overdue = sorted(app for app, deadline in deadlines.iteritems() if deadline <= now)
+                queued = sorted(waiting - set(deadlines)) if now >= pass_deadline else []
+                # the threads cannot be stopped, but they will not write stale summaries once they finish
+                # and queued summaries will not be started
+                self._cancel(overdue + queued)
+                waiting.difference_update(overdue + queued)
+                for app in overdue:
+                    del deadlines[app]
+                if overdue:
+                    logging.error("Timeout exceeded, cancelling %s after %s seconds", ', '.join(overdue),
+                                  self._app_summary_timeout)
+                if queued:
+                    logging.error("Summary pass exceeded %s seconds, abandoning %s still queued",
+                                  rounds * self._app_summary_timeout, ', '.join(queued))
+
+        self._yarn_connection.use_snapshot(None)
+        # a summary that was not written is not kept either, so the application is summarised and written
+        # again on the next pass rather than being skipped as unchanged
+        for app in self._application_summary_registrar.flush():
+            self._previous_summaries.pop(app, None)
+        logging.info("Summarised %d applications in %.3f seconds", len(applist), time.time() - start_time)
+
+    def _cancel(self, applications):
+        with self._lock:
+            for app in applications:
+                if app in self._running:
+                    self._running[app].set()
+
+    def generate_summary(self, application, cancelled=None, events=None):
         """
         Update HBase wih recent application summary
+        :param cancelled: an Event set when the summary is no longer wanted, it is then not written
+        :param events: a Queue (application, False) is put on when the summary starts and
+                       (application, True) when it has finished
         """
         def _do_generate():
 
+            if events is not None:
+                events.put((application, False))
             try:
-                create_data = self._application_registrar.get_create_data(application)
+                if cancelled is not None and cancelled.is_set():
+                    logging.warning("Application: %s summary abandoned before it started", application)
+                    return
+                context = self._load_context(application)
+                create_data = context.create_data
+                fingerprint = self._get_fingerprint(context)
+                if self._is_unchanged(application, fingerprint):
+                    logging.debug("Application: %s unchanged, not polling its components", application)
+                    return
                 input_data = {}
                 for component_name, component_data in create_data.iteritems():
                     input_data[component_name] = {}
                     input_data[component_name]["component_ref"] = self._load_creator(component_name)
                     input_data[component_name]["component_data"] = component_data
-                app_data = self._summary_aggregator.get_application_summary(application, input_data)
+                app_data = self._summary_aggregator.get_application_summary(application, input_data, context)
+                if cancelled is not None and cancelled.is_set():
+                    logging.warning("Application: %s summary cancelled, not writing it", application)
+                    return
                 self._application_summary_registrar.post_to_hbase(app_data, application)
+                self._previous_summaries[application] = {'summary': app_data[application],
+                                                         'fingerprint': fingerprint,
+                                                         'refreshed': time.time()}
                 logging.debug("Application: %s, Status: %s", application, app_data[application]['aggregate_status'])
             except Exception as ex:
                 logging.error('%s while trying to get status of application "%s"', str(ex), application)
+            finally:
+                with self._lock:
+                    if self._running.get(application) is cancelled:
+                        self._running.pop(application, None)
+                if events is not None:
+                    events.put((application, True))
 
         return self.dispatcher.run_as_asynch(task=_do_generate)
 
+    def _load_context(self, application):
+        """
+        Reads what the component summaries need from HBase, the previous summary is only read if it is
+        needed and was not kept from an earlier pass
+        """
+        create_data, dm_status = self._application_registrar.get_create_data_and_status(application)
+        if create_data is None:
+            raise ValueError('no create data')
+        previous = self._previous_summaries.get(application)
+        return SummaryContext(application, create_data, dm_status,
+                              previous_summary=previous['summary'] if previous is not None else None,
+                              load_previous_summary=lambda: self._application_summary_registrar.get_component_data(application))
+
+    def _get_fingerprint(self, context):
+        """
+        What an application's summary depends on that can be seen cheaply: its DM status and the
+        state and start time in YARN of each of its jobs, None outside a generate() pass
+        """
+        yarn_apps = self._yarn_connection.get_snapshot()
+        if yarn_apps is None:
+            return None
+        jobs = []
+        for component_data in context.create_data.itervalues():
+            for component in component_data:
+                job_name = component.get('component_job_name')
+                yarn_app = yarn_apps.get(job_name) or {}
+                jobs.append((job_name, yarn_app.get('state'), yarn_app.get('startedTime')))
+        return (context.dm_status, sorted(jobs))
+
+    def _is_unchanged(self, application, fingerprint):
+        """
+        An application is polled again if any component was not settled last time, if its fingerprint
+        changed, or if it has not been refreshed for the refresh interval
+        """
+        previous = self._previous_summaries.get(application)
+        if fingerprint is None or previous is None or previous['fingerprint'] != fingerprint:
+            return False
+        if time.time() - previous['refreshed'] >= self._refresh_interval:
+            return False
+        return all(component.get('aggregate_status') in SETTLED_STATUSES
+                   for name, component in previous['summary'].iteritems() if name != 'aggregate_status')
+
     def _load_creator(self, component_type):
 
         creator = self._component_creators.get(component_type)
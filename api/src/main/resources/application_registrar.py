@@ -22,30 +22,45 @@ either express or implied.
 
 import logging
 import json
-import happybase
 from Hbase_thrift import AlreadyExists
 
 from lifecycle_states import ApplicationState
+from hbase_connection_pool import HbaseConnectionPool
+from hbase_scan import scan_page, column_value_filter, json_value_filter, json_value_matches
 
+APPLICATION_FIELDS = ['overrides', 'defaults', 'name', 'package_name', 'status', 'information']
+JSON_FIELDS = ['overrides', 'defaults']
 
 class HbaseApplicationRegistrar(object):
-    def __init__(self, hbase_host):
+    def __init__(self, hbase_host, connection_pool=None):
         self._hbase_host = hbase_host
         self._table_name = 'platform_applications'
+        # secondary index with a row per package and a column per application created from it
+        self._index_table_name = 'platform_package_apps'
+        self._connection_pool = connection_pool if connection_pool is not None else HbaseConnectionPool(hbase_host)
         if self._hbase_host is not None:
-            connection = happybase.Connection(self._hbase_host)
-            try:
-                connection.create_table(self._table_name, {'cf': dict()})
-                logging.debug("applications table created")
-            except AlreadyExists:
-                logging.debug("applications table exists")
-            finally:
-                connection.close()
+            with self._connection_pool.connection() as connection:
+                try:
+                    connection.create_table(self._table_name, {'cf': dict()})
+                    logging.debug("applications table created")
+                except AlreadyExists:
+                    logging.debug("applications table exists")
+                try:
+                    connection.create_table(self._index_table_name, {'cf': dict()})
+                    logging.debug("package applications index table created")
+                except AlreadyExists:
+                    logging.debug("package applications index table exists")
 
     def create_application(self, package_name, application_name, overrides, defaults):
         logging.debug("Creating %s", application_name)
         key, data = self.generate_record(application_name, package_name, overrides, defaults)
+        previous_package = self._read_from_db(application_name, ['cf:package_name']).get('cf:package_name')
+        # the index is written before the record and cleared after it, so every record is always indexed,
+        # lookups ignore index entries that do not match a record
+        self._add_to_index(package_name, application_name)
         self._write_to_db(key, data)
+        if previous_package is not None and previous_package != package_name:
+            self._remove_from_index(previous_package, application_name)
 
     def set_application_status(self, application_name, status, information=None):
         logging.debug("Setting status %s = %s", application_name, status)
@@ -58,32 +73,49 @@ class HbaseApplicationRegistrar(object):
 
     def get_create_data(self, application_name):
         logging.debug("Reading create data %s", application_name)
-        return json.loads(self._read_from_db(application_name)['cf:create_data'])
+        return json.loads(self._read_from_db(application_name, ['cf:create_data'])['cf:create_data'])
+
+    def get_create_data_and_status(self, application_name):
+        """
+        Reads the create data and status of an application in a single round trip
+        :return: the create data and status, or None and None if there is no record
+        """
+        logging.debug("Reading create data and status %s", application_name)
+        application_data = self._read_from_db(application_name, ['cf:create_data', 'cf:status'])
+        if not application_data:
+            return None, None
+        return json.loads(application_data['cf:create_data']), application_data.get('cf:status')
 
     def delete_application(self, application_name):
         logging.debug("Deleting %s", application_name)
-        connection = happybase.Connection(self._hbase_host)
-        try:
+        package_name = self._read_from_db(application_name, ['cf:package_name']).get('cf:package_name')
+        with self._connection_pool.connection() as connection:
             table = connection.table(self._table_name)
             table.delete(application_name)
-        finally:
-            connection.close()
+        if package_name is not None:
+            self._remove_from_index(package_name, application_name)
 
-    def get_application(self, application_name):
+    def get_application(self, application_name, fields=None):
+        """
+        Reads an application record in a single round trip, fetching only the columns needed
+        for the requested fields. The create data is never read here, use get_create_data.
+
+        :param fields: a subset of APPLICATION_FIELDS, defaults to all of them
+        :return: a dictionary with the requested fields or None if there is no record
+        """
         logging.debug("Reading %s", application_name)
-        application_data = self._read_from_db(application_name)
+        if fields is None:
+            fields = APPLICATION_FIELDS
+        # status is always set on a record, so include it to tell an absent row from absent columns
+        columns = sorted(set(['cf:status'] + ['cf:%s' % field for field in fields]))
+        application_data = self._read_from_db(application_name, columns)
         if not application_data:
             return None
-        return {'overrides': json.loads(application_data['cf:overrides']),
-                'defaults': json.loads(application_data['cf:defaults']),
-                'name': application_data['cf:name'],
-                'package_name': application_data['cf:package_name'],
-                'status': application_data['cf:status'],
-                'information': application_data.get('cf:information', None)}
+        return self._decode_record(application_data, fields)
 
     def application_exists(self, application_name):
         logging.debug("Checking %s", application_name)
-        application_data = self._read_from_db(application_name)
+        application_data = self._read_from_db(application_name, ['cf:status'])
         if not application_data:
             return False
         # Note: this last line is problematic, as with the current API:
@@ -92,32 +124,122 @@ class HbaseApplicationRegistrar(object):
 
     def application_has_record(self, application_name):
         logging.debug("Checking %s", application_name)
-        application_data = self._read_from_db(application_name)
+        application_data = self._read_from_db(application_name, ['cf:status'])
         return not len(application_data) == 0
 
-    def list_applications(self):
-        logging.debug("List all applications")
+    def list_applications(self, limit=None, start_after=None, owner=None, status=None, package=None):
+        logging.debug("List applications")
+        rows = self._scan_applications(['cf:status'], limit, start_after, owner, status, package)
+        return [key for key, _ in rows]
 
-        connection = happybase.Connection(self._hbase_host)
-        try:
-            table = connection.table(self._table_name)
-            result = [key for key, data in table.scan(columns=['cf:status']) if data['cf:status'] != ApplicationState.NOTCREATED]
-        finally:
-            connection.close()
+    def list_application_records(self, fields, limit=None, start_after=None, owner=None, status=None, package=None,
+                                 include_notcreated=None):
+        """
+        Reads the requested fields for a page of application records in a single scan.
+
+        :param fields: a subset of APPLICATION_FIELDS
+        :param include_notcreated: names of applications to list even if their record is NOTCREATED,
+                                   such as those being created, other NOTCREATED records are left out
+        :return: a list of dictionaries with the requested fields and the name
+        """
+        logging.debug("List application records")
+        columns = ['cf:%s' % field for field in fields]
+        rows = self._scan_applications(columns, limit, start_after, owner, status, package,
+                                       include_notcreated=include_notcreated)
+        result = []
+        for key, data in rows:
+            record = self._decode_record(data, fields)
+            record['name'] = key
+            result.append(record)
         return result
 
     def list_applications_for_package(self, package_name):
         logging.debug("List applications for package %s", package_name)
 
-        connection = happybase.Connection(self._hbase_host)
-        try:
+        with self._connection_pool.connection() as connection:
+            index = connection.table(self._index_table_name).row(package_name)
+            if not index:
+                return []
+            application_names = sorted(column.split(':', 1)[1] for column in index)
             table = connection.table(self._table_name)
-            result = [key for key, data in table.scan(columns=['cf:package_name', 'cf:status'])
-                      if data['cf:package_name'] == package_name and data['cf:status'] != ApplicationState.NOTCREATED]
-        finally:
-            connection.close()
+            rows = table.rows(application_names, columns=['cf:package_name', 'cf:status'])
+        return [key for key, data in rows
+                if data.get('cf:package_name') == package_name and data.get('cf:status') != ApplicationState.NOTCREATED]
+
+    def verify_package_index(self):
+        """
+        Compares the package index with the application records.
+        :return: a dictionary with the (package, application) pairs "missing" from the index
+                 and the "stale" index entries that do not match a record
+        """
+        logging.debug("Verifying package applications index")
+        with self._connection_pool.connection() as connection:
+            expected = set((data['cf:package_name'], key) for key, data in
+                           connection.table(self._table_name).scan(columns=['cf:package_name'])
+                           if 'cf:package_name' in data)
+            indexed = set((package_name, column.split(':', 1)[1]) for package_name, data in
+                          connection.table(self._index_table_name).scan() for column in data)
+        return {'missing': sorted(expected - indexed), 'stale': sorted(indexed - expected)}
+
+    def rebuild_package_index(self):
+        """
+        Adds the missing and removes the stale entries found by verify_package_index.
+        Each stale entry is checked against the application record again just before it is removed, so an
+        entry written by a create_application that ran after the scans is kept.
+        :return: the result of the verification that was repaired
+        """
+        result = self.verify_package_index()
+        for package_name, application_name in result['missing']:
+            self._add_to_index(package_name, application_name)
+        for package_name, application_name in result['stale']:
+            if self._read_from_db(application_name, ['cf:package_name']).get('cf:package_name') == package_name:
+                continue
+            self._remove_from_index(package_name, application_name)
+        logging.info("Package applications index rebuilt, %d entries added, %d removed",
+                     len(result['missing']), len(result['stale']))
         return result
 
+    def _add_to_index(self, package_name, application_name):
+        with self._connection_pool.connection() as connection:
+            connection.table(self._index_table_name).put(package_name, {'cf:%s' % application_name: ''})
+
+    def _remove_from_index(self, package_name, application_name):
+        with self._connection_pool.connection() as connection:
+            connection.table(self._index_table_name).delete(package_name, columns=['cf:%s' % application_name])
+
+    def _scan_applications(self, columns, limit, start_after, owner, status, package, include_notcreated=None):
+        """
+        Pushes the conditions down to HBase as column value filters, so only matching rows are
+        returned and the scan stops once a page is full. The rows returned are checked again here
+        as the owner filter can only do a substring match on the overrides, and rows that fail the
+        check do not count towards the page.
+        :param include_notcreated: names of applications to return even if their record is NOTCREATED
+        """
+        columns = set(columns + ['cf:status'])
+        include_notcreated = set(include_notcreated or [])
+        filters = []
+        if not include_notcreated:
+            filters.append(column_value_filter('cf:status', ApplicationState.NOTCREATED, operator='!='))
+        if status is not None:
+            filters.append(column_value_filter('cf:status', status))
+        if package is not None:
+            columns.add('cf:package_name')
+            filters.append(column_value_filter('cf:package_name', package))
+        if owner is not None:
+            columns.add('cf:overrides')
+            filters.append(json_value_filter('cf:overrides', 'user', owner))
+
+        def accept(key, data):
+            return (data['cf:status'] != ApplicationState.NOTCREATED or key in include_notcreated) \
+                and (status is None or data['cf:status'] == status) \
+                and (package is None or data.get('cf:package_name') == package) \
+                and (owner is None or json_value_matches(data, 'cf:overrides', 'user', owner))
+
+        with self._connection_pool.connection() as connection:
+            table = connection.table(self._table_name)
+            rows = scan_page(table, sorted(columns), filters=filters, start_after=start_after, limit=limit, accept=accept)
+        return rows
+
     def generate_record(self, application_name, package_name, overrides, defaults):
         return application_name, {
             'cf:package_name': package_name,
@@ -127,19 +249,22 @@ class HbaseApplicationRegistrar(object):
             'cf:status': ApplicationState.NOTCREATED
         }
 
-    def _read_from_db(self, key):
-        connection = happybase.Connection(self._hbase_host)
-        try:
+    def _decode_record(self, application_data, fields):
+        record = {}
+        for field in fields:
+            value = application_data.get('cf:%s' % field, None)
+            if field in JSON_FIELDS and value is not None:
+                value = json.loads(value)
+            record[field] = value
+        return record
+
+    def _read_from_db(self, key, columns=None):
+        with self._connection_pool.connection() as connection:
             table = connection.table(self._table_name)
-            data = table.row(key)
-        finally:
-            connection.close()
+            data = table.row(key, columns=columns)
         return data
 
     def _write_to_db(self, key, data):
-        connection = happybase.Connection(self._hbase_host)
-        try:
+        with self._connection_pool.connection() as connection:
             table = connection.table(self._table_name)
             table.put(key, data)
-        finally:
-            connection.close()
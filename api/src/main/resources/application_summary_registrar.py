@@ -1,108 +1,145 @@
 import json
 import logging
-import happybase
-from thriftpy.transport import TTransportException
+import threading
 from Hbase_thrift import AlreadyExists
 
+from hbase_connection_pool import HbaseConnectionPool, CONNECTION_ERRORS
+from hbase_scan import MAX_BATCH_SIZE
+
+DEFAULT_SUMMARY_BATCH_SIZE = 100
+
 #pylint: disable=E0602
 
 class HBaseAppplicationSummary(object):
-    def __init__(self, hbase_host):
+    def __init__(self, hbase_host, connection_pool=None, batch_size=DEFAULT_SUMMARY_BATCH_SIZE):
         self._hbase_host = hbase_host
         self._table_name = 'platform_application_summary'
+        self._batch_size = batch_size
+        self._lock = threading.Lock()
+        # application -> row waiting to be written by flush()
+        self._pending = {}
+        # set by begin_batch(), summaries are only queued while it is set
+        self._batching = False
+        # application -> row as last written, rows that have not changed are not written again
+        self._written = {}
+        self._connection_pool = connection_pool if connection_pool is not None else HbaseConnectionPool(hbase_host)
         if self._hbase_host is not None:
             try:
-                connection = happybase.Connection(self._hbase_host)
-                connection.create_table(self._table_name, {'cf': dict()})
-                logging.debug("applications summary table created")
+                with self._connection_pool.connection() as connection:
+                    connection.create_table(self._table_name, {'cf': dict()})
+                    logging.debug("applications summary table created")
             except AlreadyExists as error_message:
                 logging.debug("applications summary table already exists")
-            except TTransportException as error_message:
+            except CONNECTION_ERRORS as error_message:
                 logging.error(str(error_message))
-            finally:
-                connection.close()
 
     def sync_with_dm(self, app_list):
-        connection = None
+        """
+        Deletes the summaries of applications that are no longer in app_list
+        """
+        app_list = set(app_list)
+        with self._lock:
+            for application in set(self._written) - app_list:
+                del self._written[application]
         try:
-            connection = happybase.Connection(self._hbase_host)
-            table = connection.table(self._table_name)
-            for application, _ in table.scan():
-                if application not in app_list:
-                    table.delete(application)
-        except TTransportException as error_message:
+            with self._connection_pool.connection() as connection:
+                table = connection.table(self._table_name)
+                # only the row keys are needed
+                stale = [application for application, _ in
+                         table.scan(filter='FirstKeyOnlyFilter() AND KeyOnlyFilter()', batch_size=MAX_BATCH_SIZE)
+                         if application not in app_list]
+                if stale:
+                    with table.batch(batch_size=self._batch_size) as batch:
+                        for application in stale:
+                            batch.delete(application)
+        except CONNECTION_ERRORS as error_message:
             logging.error(str(error_message))
-        finally:
-            connection.close()
 
-    def write_to_hbase(self, application, summary):
-        connection = None
-        try:
-            connection = happybase.Connection(self._hbase_host)
-            table = connection.table(self._table_name)
-            table.put(application, summary)
-        except TTransportException as error_message:
-            logging.error(str(error_message))
-        finally:
-            connection.close()
+    def begin_batch(self):
+        """
+        Queues the summaries posted from now on, until flush() writes them together
+        """
+        with self._lock:
+            self._batching = True
 
     def post_to_hbase(self, summary, application):
+        """
+        Writes an application summary, unless it is the same as the summary last written. Between
+        begin_batch() and flush() the summary is queued to be written by flush().
+        """
         data = {}
         for component in summary[application]:
             if component != 'aggregate_status':
                 data.update({component: summary[application][component]})
         data = {
-            '%s:%s' % ('cf', 'component_data'): json.dumps(data),
+            '%s:%s' % ('cf', 'component_data'): json.dumps(data, sort_keys=True),
             '%s:%s' % ('cf', 'aggregate_status'): summary[application]['aggregate_status']
         }
-        self.write_to_hbase(application, data)
+        with self._lock:
+            if self._written.get(application) == data:
+                self._pending.pop(application, None)
+                return
+            self._pending[application] = data
+            batching = self._batching
+        if not batching:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the queued summaries in batches of batch_size rows and ends the batch begun by begin_batch()
+        :return: the applications whose summaries could not be written
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._batching = False
+        if not pending:
+            return []
+        try:
+            with self._connection_pool.connection() as connection:
+                table = connection.table(self._table_name)
+                with table.batch(batch_size=self._batch_size) as batch:
+                    for application in sorted(pending):
+                        batch.put(application, pending[application])
+            with self._lock:
+                self._written.update(pending)
+        except Exception as error_message:
+            logging.error("Unable to write the summaries of %d applications: %s", len(pending), str(error_message))
+            # some rows may have been written, so none can be trusted to match
+            with self._lock:
+                for application in pending:
+                    self._written.pop(application, None)
+            return sorted(pending)
+        return []
 
     def _read_from_db(self, key):
-        connection = None
+        data = None
         try:
-            connection = happybase.Connection(self._hbase_host)
-            table = connection.table(self._table_name)
-            data = table.row(key)
-        except TTransportException as error_message:
+            with self._connection_pool.connection() as connection:
+                table = connection.table(self._table_name)
+                data = table.row(key)
+        except CONNECTION_ERRORS as error_message:
             logging.error(str(error_message))
-        finally:
-            connection.close()
         return data
 
     def get_dm_data(self, key):
-        connection = None
+        data = None
         try:
-            connection = happybase.Connection(self._hbase_host)
-            table = connection.table("platform_applications")
-            data = table.row(key)
-        except TTransportException as error_message:
+            with self._connection_pool.connection() as connection:
+                table = connection.table("platform_applications")
+                data = table.row(key)
+        except CONNECTION_ERRORS as error_message:
             logging.error(str(error_message))
-        finally:
-            connection.close()
         return data
 
-    def get_dm_status(self, key):
-        try:
-            connection = happybase.Connection(self._hbase_host)
-            table = connection.table("platform_applications")
-            row = table.row(key, columns=['cf:status'])
-            status = row['cf:status']
-        except TTransportException as error_message:
-            logging.error(str(error_message))
-        finally:
-            connection.close()
-        return status
-
-    def get_flink_job_id(self, key):
-        jid = ''
+    def get_component_data(self, key):
+        """
+        The components of the last summary written for an application, or None
+        """
         data = self._read_from_db(key)
         if data:
-            data = json.loads(data['cf:component_data'])
-            for component in data:
-                if 'flink' in component:
-                    tracking_url = data[component]['tracking_url']
-                    jid = tracking_url.split("jobs")[-1]
-        return jid
+            return json.loads(data['cf:component_data'])
+        return None
 
     def get_summary_data(self, application):
         record = {application: {}}
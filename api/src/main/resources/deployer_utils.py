@@ -21,19 +21,38 @@ either express or implied.
 """
 
 import os
+import shutil
 import tarfile
+import hashlib
 import StringIO
 import logging
 import traceback
 import time
 from threading import Thread
+from multiprocessing.dummy import Pool as ThreadPool
 
 import requests
-import spur
 from pywebhdfs.webhdfs import PyWebHdfsClient
 
 from cm_api.api_client import ApiResource
 
+from ssh_connection_pool import SshConnectionPool
+from exceptiondef import FailedCreation
+from parallel_tasks import run_tasks
+
+DEFAULT_READ_CONCURRENCY = 4
+READ_CHUNK_SIZE = 10 * 1024 * 1024
+DEFAULT_COPY_CONCURRENCY = 8
+# extended attribute holding the sha256 of files uploaded by recursive_copy
+CHECKSUM_XATTR = 'user.deployment_manager.sha256'
+# written to stderr by the exec_ssh script after a command fails, followed by its index and exit code
+SSH_COMMAND_FAILED = '__deployment_manager_command_failed__ '
+
+SSH_POOL = SshConnectionPool()
+
+DEFAULT_HOST_CONCURRENCY = 16
+DEFAULT_HOST_TIMEOUT = 300
+
 
 def connect_cm(cm_api, cm_username, cm_password):
     api = ApiResource(
@@ -283,21 +302,31 @@ def fill_hadoop_env_cdh(env):
 
 def tree(archive_filepath):
     file_handle = file(archive_filepath, 'rb')
-    tar_file = tarfile.open(None, 'r', file_handle)
-    table = tar_file.getmembers()
+    # a stream is enough to list the members, and avoids decompressing the archive more than once
+    tar_file = tarfile.open(None, 'r|*', file_handle)
 
     root = {}
-    for member in table:
+    for member in tar_file:
         path = member.name.split('/')
         node = root
         for part in path:
             if part not in node:
                 node[part] = {}
             node = node[part]
+    tar_file.close()
+    file_handle.close()
 
     return root
 
 
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source_file:
+        for chunk in iter(lambda: source_file.read(1024 * 1024), ''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def canonicalize(path):
     path = path.replace('\\', '/')
     path = path.replace('//', '/')
@@ -310,38 +339,80 @@ class HDFS(object):
             host=host, port=port, user_name=user, timeout=None)
         logging.debug('webhdfs = %s@%s:%s', user, host, port)
 
-    def recursive_copy(self, local_path, remote_path, exclude=None, permission=755):
+    def recursive_copy(self, local_path, remote_path, exclude=None, permission=755, concurrency=DEFAULT_COPY_CONCURRENCY):
+        """
+        Copies a local directory tree to HDFS. Directories are made first, a level at a time, then
+        the files are uploaded in parallel. Files already in HDFS with the same length and checksum
+        are skipped.
+        :param concurrency: the number of directories or files to send at the same time
+        :return: a dictionary of remote file path to the seconds taken, or None if the upload was skipped
+        """
 
         if exclude is None:
             exclude = []
 
-        c_path = canonicalize(remote_path)
-        logging.debug('making %s', c_path)
-        self._hdfs.make_dir(c_path, permission=permission)
-
+        # directories by depth, so parents are made before their children
+        directories = [[canonicalize(remote_path)]]
+        files = []
         fs_g = os.walk(local_path)
         for dpath, dnames, fnames in fs_g:
             _, relative_path = dpath.split(local_path)
+            depth = len([part for part in relative_path.split('/') if part])
             for dname in dnames:
                 if dname not in exclude:
-                    c_path = canonicalize(
-                        '%s/%s/%s' %
-                        (remote_path, relative_path, dname))
-                    logging.debug('making %s', c_path)
-                    self._hdfs.make_dir(c_path, permission=permission)
+                    if len(directories) < depth + 2:
+                        directories.append([])
+                    directories[depth + 1].append(canonicalize('%s/%s/%s' % (remote_path, relative_path, dname)))
 
             for fname in fnames:
                 if fname not in exclude:
-                    data = file(
-                        canonicalize(
-                            '%s/%s/%s' %
-                            (local_path, relative_path, fname)), 'rb')
-                    c_path = canonicalize(
-                        '%s/%s/%s' %
-                        (remote_path, relative_path, fname))
-                    logging.debug('creating %s', c_path)
-                    self._hdfs.create_file(c_path, data, overwrite=True, permission=permission)
-                    data.close()
+                    files.append((canonicalize('%s/%s/%s' % (local_path, relative_path, fname)),
+                                  canonicalize('%s/%s/%s' % (remote_path, relative_path, fname))))
+
+        def make_dir(c_path):
+            logging.debug('making %s', c_path)
+            self._hdfs.make_dir(c_path, permission=permission)
+
+        def copy_file(paths):
+            local_file_path, c_path = paths
+            start_time = time.time()
+            digest = file_digest(local_file_path)
+            if self._is_same_file(local_file_path, c_path, digest):
+                logging.debug('skipping %s, unchanged', c_path)
+                return c_path, None
+            logging.debug('creating %s', c_path)
+            with open(local_file_path, 'rb') as data:
+                self._hdfs.create_file(c_path, data, overwrite=True, permission=permission)
+            try:
+                self._hdfs.set_xattr(c_path, CHECKSUM_XATTR, '"%s"' % digest)
+            except Exception as exc:
+                logging.debug('unable to record checksum of %s: %s', c_path, str(exc))
+            return c_path, time.time() - start_time
+
+        pool = ThreadPool(processes=max(1, concurrency))
+        try:
+            for level in directories:
+                pool.map(make_dir, level)
+            timings = dict(pool.map(copy_file, files))
+        finally:
+            pool.close()
+            pool.join()
+
+        uploaded = [seconds for seconds in timings.values() if seconds is not None]
+        logging.info('Copied %s to %s: %d files uploaded in %.2f seconds, %d unchanged',
+                     local_path, remote_path, len(uploaded), sum(uploaded), len(timings) - len(uploaded))
+        return timings
+
+    def _is_same_file(self, local_file_path, remote_file_path, digest):
+        try:
+            status = self._hdfs.get_file_dir_status(remote_file_path)['FileStatus']
+            if status['length'] != os.path.getsize(local_file_path):
+                return False
+            xattrs = self._hdfs.get_xattr(remote_file_path, CHECKSUM_XATTR)['XAttrs']
+            return any(xattr['value'].strip('"') == digest for xattr in xattrs)
+        except Exception:
+            # missing file or no checksum recorded
+            return False
 
     def make_dir(self, path, permission=755):
 
@@ -361,6 +432,23 @@ class HDFS(object):
             overwrite=True,
             permission=permission)
 
+    def upload_file(self, local_file_path, remote_file_path, permission=755):
+        """
+        Creates a file in HDFS with a single request, streaming the body from the local file
+        instead of holding it in memory
+        :return: the number of bytes written and the time taken in seconds
+        """
+        logging.debug('upload_file: %s to %s', local_file_path, remote_file_path)
+
+        start_time = time.time()
+        with open(local_file_path, 'rb') as local_file:
+            self._hdfs.create_file(
+                canonicalize(remote_file_path),
+                local_file,
+                overwrite=True,
+                permission=permission)
+        return os.path.getsize(local_file_path), time.time() - start_time
+
     def append_file(self, data, remote_file_path):
 
         logging.debug('append to: %s', remote_file_path)
@@ -368,8 +456,15 @@ class HDFS(object):
         self._hdfs.append_file(canonicalize(remote_file_path), data)
 
 
-    def stream_file_to_disk(self, remote_file_path, local_file_path):
-        chunk_size = 10*1024*1024
+    def stream_file_to_disk(self, remote_file_path, local_file_path, concurrency=DEFAULT_READ_CONCURRENCY):
+        """
+        Copies a file from HDFS in 10 MB ranges, with up to concurrency ranges read at the same time
+        """
+        if concurrency > 1:
+            self._parallel_stream_file_to_disk(remote_file_path, local_file_path, concurrency)
+            return
+
+        chunk_size = READ_CHUNK_SIZE
         offset = 0
         with open(local_file_path, 'wb') as dest_file:
             data = self._hdfs.read_file(canonicalize(remote_file_path), offset=offset, length=chunk_size)
@@ -380,6 +475,31 @@ class HDFS(object):
                 offset += chunk_size
                 data = self._hdfs.read_file(canonicalize(remote_file_path), offset=offset, length=chunk_size)
 
+    def _parallel_stream_file_to_disk(self, remote_file_path, local_file_path, concurrency):
+        remote_file_path = canonicalize(remote_file_path)
+        length = self.get_file_status(remote_file_path)['length']
+        # preallocate so each range can be written in place as soon as it arrives
+        with open(local_file_path, 'wb') as dest_file:
+            dest_file.truncate(length)
+
+        def read_range(offset):
+            range_length = min(READ_CHUNK_SIZE, length - offset)
+            data = self._hdfs.read_file(remote_file_path, offset=offset, length=range_length)
+            if len(data) != range_length:
+                raise IOError('Read %d bytes at offset %d of %s, expected %d' %
+                              (len(data), offset, remote_file_path, range_length))
+            with open(local_file_path, 'r+b') as dest_file:
+                dest_file.seek(offset)
+                dest_file.write(data)
+
+        offsets = range(0, length, READ_CHUNK_SIZE)
+        pool = ThreadPool(processes=max(1, min(concurrency, len(offsets))))
+        try:
+            pool.map(read_range, offsets)
+        finally:
+            pool.close()
+            pool.join()
+
     def read_file(self, remote_file_path):
 
         data = self._hdfs.read_file(canonicalize(remote_file_path))
@@ -392,6 +512,10 @@ class HDFS(object):
 
         self._hdfs.delete_file_dir(canonicalize(path), recursive)
 
+    def get_file_status(self, path):
+
+        return self._hdfs.get_file_dir_status(canonicalize(path))['FileStatus']
+
     def file_exists(self, path):
 
         try:
@@ -401,21 +525,145 @@ class HDFS(object):
             return False
 
 def exec_ssh(host, user, key, ssh_commands):
-    shell = spur.SshShell(
-        hostname=host,
-        username=user,
-        private_key_file=key,
-        missing_host_key=spur.ssh.MissingHostKey.accept)
-    with shell:
-        for ssh_command in ssh_commands:
-            logging.debug('Host - %s: Command - %s', host, ssh_command)
+    """
+    Runs the commands in order on the host over a pooled SSH connection, as one script on a
+    single channel. Each command runs in its own subshell so a cd or variable does not leak into
+    the next one, and a command that fails is logged without stopping the ones after it.
+    """
+    if not ssh_commands:
+        return
+    for ssh_command in ssh_commands:
+        logging.debug('Host - %s: Command - %s', host, ssh_command)
+    with SSH_POOL.connection(host, user, key) as shell:
+        result = shell.run(["bash", "-c", _ssh_batch_script(ssh_commands)], allow_error=True)
+
+    stderr_lines = []
+    for line in result.stderr_output.splitlines():
+        if line.startswith(SSH_COMMAND_FAILED):
+            index, return_code = line[len(SSH_COMMAND_FAILED):].split()
+            logging.error('%s - error: exit code %s on %s', ssh_commands[int(index)], return_code, host)
+        else:
+            stderr_lines.append(line)
+    if stderr_lines:
+        logging.debug('Host - %s: stderr - %s', host, '\n'.join(stderr_lines))
+
+
+def _ssh_batch_script(ssh_commands):
+    # the command is on lines of its own so a trailing comment cannot swallow the closing bracket
+    return '\n'.join('(\n%s\n) || echo "%s%d $?" >&2' % (ssh_command, SSH_COMMAND_FAILED, index)
+                     for index, ssh_command in enumerate(ssh_commands))
+
+
+def sftp_put(host, user, key, files, directories=None):
+    """
+    Copies local files to a host over one SFTP channel on a pooled SSH connection. Each copy keeps
+    the mode of the local file and its size is checked once written.
+    :param files: list of (local path, remote path) pairs
+    :param directories: remote directories to create first, parents before children
+    :raises FailedCreation: naming the file that could not be copied
+    """
+    start = time.time()
+    total_bytes = 0
+    with SSH_POOL.connection(host, user, key) as shell:
+        # spur only exposes SFTP one file at a time, borrow its client to send the batch on one channel
+        # pylint: disable=protected-access
+        with shell._connect_sftp() as sftp:
+            for remote_path in directories or []:
+                try:
+                    sftp.mkdir(remote_path)
+                except IOError:
+                    # already there, a real problem shows up when copying into it
+                    pass
+            for local_path, remote_path in files:
+                logging.debug('Copying %s to %s:%s', local_path, host, remote_path)
+                try:
+                    attributes = sftp.put(local_path, remote_path, confirm=True)
+                    sftp.chmod(remote_path, os.stat(local_path).st_mode & 0o777)
+                except (IOError, OSError) as exc:
+                    raise FailedCreation('Failed to copy %s to %s:%s - %s' % (local_path, host, remote_path, str(exc)))
+                total_bytes += attributes.st_size
+    logging.info('Copied %d files, %d bytes to %s in %.2f seconds', len(files), total_bytes, host, time.time() - start)
+
+
+def list_files(local_dir, remote_dir, recursive=False):
+    """
+    Lists the files under a local directory alongside where they go under a remote one, for sftp_put
+    :param recursive: include subdirectories, otherwise only the files directly inside local_dir, as with dir/*
+    :return: the remote directories to create and the list of (local path, remote path) pairs
+    """
+    directories = []
+    files = []
+    for name in sorted(os.listdir(local_dir)):
+        local_path = os.path.join(local_dir, name)
+        remote_path = '%s/%s' % (remote_dir, name)
+        if os.path.isdir(local_path):
+            if recursive:
+                directories.append(remote_path)
+                sub_directories, sub_files = list_files(local_path, remote_path, recursive)
+                directories.extend(sub_directories)
+                files.extend(sub_files)
+        else:
+            files.append((local_path, remote_path))
+    return directories, files
+
+
+def copy_tree(source_dir, dest_dir):
+    """
+    Copies the contents of source_dir into dest_dir, as cp -r source_dir/. dest_dir does: directories
+    that already exist are merged into and files that already exist are overwritten
+    """
+    if not os.path.isdir(dest_dir):
+        os.makedirs(dest_dir)
+    for name in os.listdir(source_dir):
+        source_path = os.path.join(source_dir, name)
+        dest_path = os.path.join(dest_dir, name)
+        if os.path.isdir(source_path):
+            copy_tree(source_path, dest_path)
+        else:
+            shutil.copy(source_path, dest_path)
+
+
+def distribute_to_hosts(hosts, task, concurrency=DEFAULT_HOST_CONCURRENCY, timeout=DEFAULT_HOST_TIMEOUT):
+    """
+    Runs task(host) for every host in parallel, so pushing files to a cluster takes about as long as
+    its slowest host
+    :param concurrency: the maximum number of hosts worked on at once
+    :param timeout: seconds to wait for each host, a host still running after this is reported as failed
+    :return: dictionary of host to the return value of the task
+    :raises FailedCreation: once every host has finished or timed out, naming the hosts that failed
+    """
+    tasks = dict((host, _host_task(task, host, timeout)) for host in hosts)
+    results, errors = run_tasks(tasks, concurrency)
+    if errors:
+        raise FailedCreation('Failed on %d of %d hosts: %s' % (
+            len(errors), len(tasks), '; '.join('%s - %s' % (host, str(errors[host])) for host in sorted(errors))))
+    return results
+
+
+def _host_task(task, host, timeout):
+    def run():
+        outcome = {}
+
+        def target():
             try:
-                shell.run(["bash", "-c", ssh_command])
-            except spur.results.RunProcessError as exception:
-                logging.error(
-                    ssh_command +
-                    " - error: " +
-                    traceback.format_exc(exception))
+                outcome['result'] = task(host)
+            except Exception as exc:
+                outcome['error'] = exc
+
+        # the thread cannot be stopped, but it is a daemon so a hung host does not hold up shutdown
+        thread = Thread(target=target, name='distribute-%s' % host)
+        thread.daemon = True
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            # a hung command would otherwise keep its SSH connection, and repeated timeouts would use up
+            # every connection the pool allows to the host
+            SSH_POOL.close_borrowed(thread)
+            raise FailedCreation('timed out after %s seconds' % timeout)
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome.get('result')
+    return run
 
 
 def dict_to_props(dict_props):
@@ -36,9 +36,14 @@ import authorizer_local
 from exceptiondef import ConflictingState, NotFound, Forbidden
 from package_parser import PackageParser
 from async_dispatcher import AsyncDispatcher
+from record_cache import RecordCache, DEFAULT_CACHE_SIZE, DEFAULT_CACHE_TTL
 from lifecycle_states import ApplicationState, PackageDeploymentState
 
 
+# fields read for the status of an application, along with the owner held in the overrides
+STATUS_FIELDS = ['status', 'information', 'overrides']
+
+
 def milli_time():
     return int(round(time.time() * 1000))
 
@@ -75,6 +80,12 @@ class DeploymentManager(object):
         self._lock = threading.RLock()
         self._authorizer = authorizer_local.AuthorizerLocal()
 
+        # records read from the registrars, invalidated whenever this process writes them
+        cache_size = self._config.get('record_cache_size', DEFAULT_CACHE_SIZE)
+        cache_ttl = self._config.get('record_cache_ttl', DEFAULT_CACHE_TTL)
+        self._application_cache = RecordCache(max_size=cache_size, ttl=cache_ttl)
+        self._package_cache = RecordCache(max_size=cache_size, ttl=cache_ttl)
+
         # load number of threads from config file:
         number_of_threads = self._config["deployer_thread_limit"]
         assert isinstance(number_of_threads, (int))
@@ -105,10 +116,11 @@ class DeploymentManager(object):
         self._authorize(user_name, Resources.ENVIRONMENT, None, Actions.READ)
         return self._environment
 
-    def list_packages(self, user_name):
+    def list_packages(self, user_name, limit=None, start_after=None, owner=None, package=None):
         self._authorize(user_name, Resources.PACKAGES, None, Actions.READ)
         logging.info('list_deployed')
-        deployed = self._package_registrar.list_packages()
+        deployed = self._package_registrar.list_packages(limit=limit, start_after=start_after, owner=owner,
+                                                         package=package)
         return deployed
 
     def _assert_package_status(self, package, required_status):
@@ -126,24 +138,66 @@ class DeploymentManager(object):
         return available
 
     def _get_saved_package_data(self, package):
+        return self._package_cache.get((package, 'data'), lambda: self._load_saved_package_data(package))
+
+    def _load_saved_package_data(self, package):
         package_owner = None
         package_exists = False
         package_metadata = None
         if self._package_registrar.package_exists(package):
             package_metadata = self._package_registrar.get_package_metadata(package)
-            print package_metadata
-            package_owner = package_metadata['metadata']['user']
-            package_exists = True
+            if package_metadata is not None:
+                package_owner = package_metadata['metadata']['user']
+                package_exists = True
         return package_owner, package_exists, package_metadata
 
     def _get_package_owner(self, package):
         package_owner, _, _ = self._get_saved_package_data(package)
         return package_owner
 
+    def _get_package_deploy_status(self, package):
+        return self._package_cache.get((package, 'deploy_status'),
+                                       lambda: self._package_registrar.get_package_deploy_status(package))
+
+    def _set_package_deploy_status(self, package, deploy_status):
+        self._package_registrar.set_package_deploy_status(package, deploy_status)
+        self._invalidate_package(package)
+
+    def _invalidate_package(self, package):
+        self._package_cache.invalidate((package, 'data'))
+        self._package_cache.invalidate((package, 'deploy_status'))
+
+    def _get_application_record(self, application):
+        return self._application_cache.get((application, 'record'),
+                                           lambda: self._application_registrar.get_application(application))
+
+    def _get_application_status_record(self, application):
+        # only the small columns, for the status checks made on every request
+        return self._application_cache.get((application, 'status'),
+                                           lambda: self._application_registrar.get_application(
+                                               application, STATUS_FIELDS))
+
+    def _set_application_status(self, application, status, information=None):
+        self._application_registrar.set_application_status(application, status, information)
+        self._invalidate_application(application)
+
+    def _invalidate_application(self, application):
+        self._application_cache.invalidate((application, 'record'))
+        self._application_cache.invalidate((application, 'status'))
+
+    def get_cache_stats(self, user_name):
+        """
+        Hits, misses and size of the record caches
+        """
+        self._authorize(user_name, Resources.ENVIRONMENT, None, Actions.READ)
+        return {'applications': self._application_cache.stats(),
+                'packages': self._package_cache.stats()}
+
     def _get_application_owner(self, application):
         application_owner = None
-        if self._application_registrar.application_has_record(application):
-            application_owner = self._application_registrar.get_application(application)['overrides']['user']
+        record = self._get_application_status_record(application)
+        if record is not None:
+            application_owner = record['overrides']['user']
         return application_owner
 
     def get_package_info(self, package, user_name=None):
@@ -160,13 +214,13 @@ class DeploymentManager(object):
         else:
             # package deploy is not in progress:
             # get last package status from database
-            deploy_status = self._package_registrar.get_package_deploy_status(package)
+            deploy_status = self._get_package_deploy_status(package)
             if deploy_status:
                 status = deploy_status["state"]
                 information = deploy_status["information"]
             # check if package data exists in database:
             if package_exists:
-                properties = self._package_parser.properties_from_metadata(metadata['metadata'])
+                properties = metadata['defaults']
                 status = PackageDeploymentState.DEPLOYED
                 name = metadata['name']
                 version = metadata['version']
@@ -233,7 +287,8 @@ class DeploymentManager(object):
                 # put package in database:
                 metadata = self._package_parser.get_package_metadata(package_data_path)
                 self._application_creator.validate_package(package, metadata)
-                self._package_registrar.set_package(package, package_data_path, user_name)
+                self._package_registrar.set_package(package, package_data_path, user_name, metadata)
+                self._invalidate_package(package)
                 # set the operation status as complete
                 deploy_status = {"state": PackageDeploymentState.DEPLOYED,
                                  "information": "Deployed " + package + " at " + self.utc_string()}
@@ -245,7 +300,7 @@ class DeploymentManager(object):
                 raise
             finally:
                 # report final state of operation to database:
-                self._package_registrar.set_package_deploy_status(package, deploy_status)
+                self._set_package_deploy_status(package, deploy_status)
                 if package_data_path is not None:
                     os.remove(package_data_path)
 
@@ -270,6 +325,7 @@ class DeploymentManager(object):
             try:
                 logging.info("undeploy: %s", package)
                 self._package_registrar.delete_package(package)
+                self._invalidate_package(package)
                 logging.info("undeployed: %s", package)
             except Exception as ex:
                 # log error to screen:
@@ -282,7 +338,7 @@ class DeploymentManager(object):
             finally:
                 if deploy_status is not None:
                     # persist any errors in the database, but still throw them:
-                    self._package_registrar.set_package_deploy_status(package, deploy_status)
+                    self._set_package_deploy_status(package, deploy_status)
 
         # schedule work to be done in the background:
         self._run_asynch_package_task(package_name=package,
@@ -342,16 +398,46 @@ class DeploymentManager(object):
         applications = self._application_registrar.list_applications_for_package(package)
         return applications
 
-    def list_applications(self, user_name):
+    def list_applications(self, user_name, limit=None, start_after=None, owner=None, status=None, package=None):
         self._authorize(user_name, Resources.APPLICATIONS, None, Actions.READ)
         logging.info('list_applications')
-        applications = self._application_registrar.list_applications()
+        applications = self._application_registrar.list_applications(limit=limit, start_after=start_after, owner=owner,
+                                                                     status=status, package=package)
+        return applications
+
+    def list_application_statuses(self, user_name, limit=None, start_after=None, owner=None, status=None, package=None):
+        """
+        Lists every application with its status in one scan, for clients that would
+        otherwise request the status of each application in turn.
+        The status filter applies to the stored status, not to operations in progress.
+        :return: a list of dictionaries with name, status, information, package and owner
+        """
+        self._authorize(user_name, Resources.APPLICATIONS, None, Actions.READ)
+        logging.info('list_application_statuses')
+        with self._lock:
+            progress = dict(self._package_progress)
+        # applications only have a NOTCREATED record while they are being created, the rest are left
+        # out by the scan so they do not take up places in the page. The progress also holds packages
+        # being deployed, which are not applications
+        creating = [name for name, state in progress.iteritems() if state == ApplicationState.CREATING]
+        records = self._application_registrar.list_application_records(
+            STATUS_FIELDS + ['package_name'], limit=limit, start_after=start_after, owner=owner, status=status,
+            package=package, include_notcreated=creating)
+
+        applications = []
+        for record in records:
+            status = progress.get(record['name'], record['status'])
+            overrides = record['overrides'] or {}
+            applications.append({'name': record['name'],
+                                 'status': status,
+                                 'information': record['information'],
+                                 'package': record['package_name'],
+                                 'owner': overrides.get('user')})
         return applications
 
     def _assert_application_status(self, application, required_status):
         logging.debug("Checking %s is %s", application, json.dumps(required_status))
-        app_info = self.get_application_info(application)
-        status = app_info['status']
+        status = self.get_application_status(application)['status']
         logging.debug("Found %s is %s", application, status)
 
         if (isinstance(required_status, list) and status not in required_status) \
@@ -364,7 +450,7 @@ class DeploymentManager(object):
         logging.debug("Status for %s is OK", application)
 
     def _assert_application_exists(self, application):
-        status = self.get_application_info(application)['status']
+        status = self.get_application_status(application)['status']
         if status == ApplicationState.NOTCREATED:
             raise NotFound(json.dumps({'status': status}))
 
@@ -382,7 +468,7 @@ class DeploymentManager(object):
                 try:
                     create_data = self._application_registrar.get_create_data(application)
                     self._application_creator.start_application(application, create_data)
-                    self._application_registrar.set_application_status(application, ApplicationState.STARTED)
+                    self._set_application_status(application, ApplicationState.STARTED)
                 except Exception as ex:
                     self._handle_application_error(application, ex, ApplicationState.CREATED, "starting")
                     raise
@@ -406,7 +492,7 @@ class DeploymentManager(object):
                 try:
                     create_data = self._application_registrar.get_create_data(application)
                     self._application_creator.stop_application(application, create_data)
-                    self._application_registrar.set_application_status(application, ApplicationState.CREATED)
+                    self._set_application_status(application, ApplicationState.CREATED)
                 except Exception as ex:
                     self._handle_application_error(application, ex, ApplicationState.STARTED, "stopping")
                     raise
@@ -423,10 +509,26 @@ class DeploymentManager(object):
 
         logging.info('get_application_info')
 
-        if not self._application_registrar.application_has_record(application):
+        return self._overlay_progress(application, self._get_application_record(application))
+
+    def get_application_status(self, application, user_name=None):
+        if user_name is not None:
+            application_owner = self._get_application_owner(application)
+            self._authorize(user_name, Resources.APPLICATION, application_owner, Actions.READ)
+
+        logging.info('get_application_status')
+
+        record = self._get_application_status_record(application)
+        if record is not None:
+            record = {'status': record['status'], 'information': record['information']}
+        return self._overlay_progress(application, record)
+
+    def _overlay_progress(self, application, record):
+        if record is None:
             record = {'status': ApplicationState.NOTCREATED, 'information': None}
         else:
-            record = self._application_registrar.get_application(application)
+            # copy so the status overlay below does not modify the cached record
+            record = dict(record)
         progress_state = self._get_package_progress(application)
         if progress_state is not None:
             record['status'] = progress_state
@@ -441,7 +543,7 @@ class DeploymentManager(object):
         self._assert_application_exists(application)
         create_data = self._application_registrar.get_create_data(application)
         record = self._application_creator.get_application_runtime_details(application, create_data)
-        record['status'] = self.get_application_info(application)['status']
+        record['status'] = self.get_application_status(application)['status']
         record['name'] = application
         return record
 
@@ -466,8 +568,14 @@ class DeploymentManager(object):
             defaults = self.get_package_info(package)['defaults']
             self._application_creator.assert_application_properties(overrides, defaults)
             package_data_path = self._package_registrar.get_package_data(package)
-            self._application_registrar.create_application(package, application, overrides, defaults)
-            self._mark_creating(application)
+            try:
+                self._application_registrar.create_application(package, application, overrides, defaults)
+                self._invalidate_application(application)
+                self._mark_creating(application)
+            except Exception:
+                if package_data_path is not None:
+                    self._package_registrar.release_package_data(package_data_path)
+                raise
 
         def do_work_create():
             try:
@@ -477,7 +585,8 @@ class DeploymentManager(object):
                     create_data = self._application_creator.create_application(
                         package_data_path, package_metadata, application, overrides)
                     self._application_registrar.set_create_data(application, create_data)
-                    self._application_registrar.set_application_status(application, ApplicationState.CREATED)
+                    self._invalidate_application(application)
+                    self._set_application_status(application, ApplicationState.CREATED)
                 except Exception as ex:
                     self._handle_application_error(application, ex, ApplicationState.NOTCREATED, "creating")
                     logging.error(traceback.format_exc(ex))
@@ -487,7 +596,7 @@ class DeploymentManager(object):
                 self._clear_package_progress(application)
                 self._state_change_event_application(application)
                 if package_data_path is not None:
-                    os.remove(package_data_path)
+                    self._package_registrar.release_package_data(package_data_path)
 
         self.dispatcher.run_as_asynch(task=do_work_create)
 
@@ -504,7 +613,7 @@ class DeploymentManager(object):
         # prepare human readable message
         error_message = "Error %s " % operation + application + " " + str(type(ex).__name__) + ", details: " + json.dumps(str(ex))
         # set the status:
-        self._application_registrar.set_application_status(application, app_status, error_message)
+        self._set_application_status(application, app_status, error_message)
 
     def delete_application(self, application, user_name):
         logging.info('delete_application')
@@ -521,6 +630,7 @@ class DeploymentManager(object):
                     create_data = self._application_registrar.get_create_data(application)
                     self._application_creator.destroy_application(application, create_data)
                     self._application_registrar.delete_application(application)
+                    self._invalidate_application(application)
                 except Exception as ex:
                     self._handle_application_error(application, ex, ApplicationState.STARTED, "deleting")
                     raise
@@ -532,7 +642,7 @@ class DeploymentManager(object):
 
     def _state_change_event_application(self, name):
         endpoint_type = "application_callback"
-        info = self.get_application_info(name)
+        info = self.get_application_status(name)
         self._state_change_event(name, endpoint_type, info['status'], info['information'])
 
     def _state_change_event_package(self, name):
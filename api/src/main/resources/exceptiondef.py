@@ -20,6 +20,9 @@ License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 either express or implied.
 """
 
+import json
+
+
 class DmException(Exception):
     """
     Any exception derived from this class should be exposed through the API to the caller.
@@ -71,3 +74,17 @@ class FailedConnection(DmException):
     def __init__(self, arg):
         super(FailedConnection, self).__init__(arg)
         self.msg = arg
+
+
+class FailedComponents(DmException):
+    """
+    Raised when an operation on the components of an application fails for some of them,
+    msg reports the components that succeeded and the error for each one that failed
+    """
+
+    def __init__(self, operation, succeeded, failed):
+        super(FailedComponents, self).__init__({'operation': operation, 'succeeded': succeeded, 'failed': failed})
+        self.msg = {'operation': operation, 'succeeded': succeeded, 'failed': failed}
+
+    def __str__(self):
+        return json.dumps(self.msg, sort_keys=True)
@@ -0,0 +1,112 @@
+"""
+Name:       hbase_connection_pool.py
+Purpose:    Thread safe pool of long lived HBase thrift connections shared by the registrars
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import logging
+import socket
+import time
+import Queue
+from contextlib import contextmanager
+
+import happybase
+from thriftpy.transport import TTransportException
+
+from exceptiondef import FailedConnection
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_BORROW_TIMEOUT = 30
+DEFAULT_MAX_IDLE = 60
+# errors a with block over connection() can raise when HBase cannot be reached
+CONNECTION_ERRORS = (TTransportException, socket.error, FailedConnection)
+
+
+class HbaseConnectionPool(object):
+    """
+    Hands out HBase thrift connections to concurrent callers.
+
+    Connections are opened lazily the first time a slot is borrowed and kept open between
+    borrows, so REST requests and summary passes do not pay for a TCP and thrift handshake
+    on every table operation.
+    """
+
+    def __init__(self, hbase_host, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_BORROW_TIMEOUT, max_idle=DEFAULT_MAX_IDLE):
+        """
+        :param hbase_host: the thrift server to connect to
+        :param size: the maximum number of connections held open at any time
+        :param timeout: seconds to wait for a free connection before giving up
+        :param max_idle: connections idle for longer than this many seconds are re-opened before use,
+                         as the thrift server may have dropped them in the meantime
+        """
+        assert size > 0
+        self._hbase_host = hbase_host
+        self._timeout = timeout
+        self._max_idle = max_idle
+        self._queue = Queue.LifoQueue(maxsize=size)
+        for _ in range(size):
+            # empty slots, connected on first use
+            self._queue.put((None, 0))
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection for the duration of a with block:
+
+            with pool.connection() as connection:
+                connection.table('name').row('key')
+
+        A connection that fails with a transport error is closed rather than returned to the pool,
+        so the next caller to borrow the slot reconnects. The error is still raised to the caller.
+        """
+        try:
+            connection, last_used = self._queue.get(True, self._timeout)
+        except Queue.Empty:
+            logging.error("No HBase connection available after %s seconds", self._timeout)
+            raise FailedConnection('Unable to connect to the HBase master')
+
+        try:
+            connection = self._check_connection(connection, last_used)
+            yield connection
+        except (TTransportException, socket.error) as exc:
+            logging.warning("HBase connection to %s failed, it will be re-opened: %s", self._hbase_host, str(exc))
+            self._close(connection)
+            connection = None
+            raise
+        finally:
+            self._queue.put((connection, time.time()))
+
+    def _check_connection(self, connection, last_used):
+        if connection is None:
+            logging.debug("Opening HBase connection to %s", self._hbase_host)
+            return happybase.Connection(self._hbase_host)
+
+        if time.time() - last_used > self._max_idle or not connection.transport.is_open():
+            logging.debug("Re-opening HBase connection to %s", self._hbase_host)
+            self._close(connection)
+            connection.open()
+        return connection
+
+    def _close(self, connection):
+        if connection is None:
+            return
+        try:
+            connection.close()
+        except Exception as exc:
+            logging.debug("Error closing HBase connection: %s", str(exc))
@@ -0,0 +1,96 @@
+"""
+Name:       hbase_scan.py
+Purpose:    Helpers to page through HBase tables with the filtering done by the region servers
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import json
+
+from happybase.util import bytes_increment
+
+MAX_BATCH_SIZE = 1000
+
+
+def _quote(value):
+    # single quotes are escaped by doubling them in the thrift filter language
+    return "'%s'" % str(value).replace("'", "''")
+
+
+def column_value_filter(column, value, operator='=', comparator='binary'):
+    """
+    Builds a SingleColumnValueFilter for the thrift filter language. Rows without the column are filtered out.
+    :param column: the column as family:qualifier
+    :param comparator: binary to match the whole value, substring to match part of it
+    """
+    family, qualifier = column.split(':', 1)
+    return "SingleColumnValueFilter(%s, %s, %s, %s, true, true)" % (
+        _quote(family), _quote(qualifier), operator, _quote('%s:%s' % (comparator, value)))
+
+
+def json_value_filter(column, key, value):
+    """
+    Builds a filter for rows with a JSON column that contains "key": "value", as written by json.dumps.
+    This can match a nested object too, so the matches must still be checked with json_value_matches.
+    """
+    return column_value_filter(column, json.dumps({key: value})[1:-1], comparator='substring')
+
+
+def json_value_matches(data, column, key, value):
+    return column in data and json.loads(data[column]).get(key) == value
+
+
+def scan_page(table, columns, filters=None, row_prefix=None, start_after=None, limit=None, accept=None):
+    """
+    Reads one page of a table in row key order.
+
+    :param columns: the columns to read, these must include any column used in the filters
+    :param filters: a list of filter strings, all of which must match
+    :param row_prefix: only read rows whose key starts with this
+    :param start_after: only read rows whose key sorts after this, to continue from the last key of a previous page
+    :param limit: the maximum number of rows to return, the scanner is closed as soon as this many rows are read
+    :param accept: an optional function of (key, data) to check rows the filters cannot match exactly
+    :return: a list of (key, data)
+    """
+    row_start = None
+    row_stop = None
+    if row_prefix:
+        row_start = row_prefix
+        row_stop = bytes_increment(row_prefix)
+    if start_after is not None:
+        # the smallest key after start_after
+        row_start = max(row_start, start_after + '\x00')
+
+    batch_size = MAX_BATCH_SIZE
+    if limit is not None:
+        batch_size = max(1, min(limit, MAX_BATCH_SIZE))
+
+    result = []
+    if limit is not None and limit <= 0:
+        return result
+    scanner = table.scan(row_start=row_start, row_stop=row_stop, columns=columns,
+                         filter=' AND '.join(filters) if filters else None, batch_size=batch_size)
+    for key, data in scanner:
+        if accept is not None and not accept(key, data):
+            continue
+        result.append((key, data))
+        if limit is not None and len(result) >= limit:
+            break
+    if hasattr(scanner, 'close'):
+        scanner.close()
+    return result
@@ -0,0 +1,179 @@
+"""
+Name:       package_cache.py
+Purpose:    Local disk cache of package files stored in HDFS, shared by deploy and create
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import os
+import time
+import uuid
+import shutil
+import logging
+import threading
+
+from deployer_utils import file_digest
+
+DEFAULT_PACKAGE_CACHE_SIZE = 2 * 1024 * 1024 * 1024
+
+
+class PackageCache(object):
+    """
+    Keeps local copies of packages, named by package and content hash so a package that is
+    redeployed never replaces a file still being read.
+
+    Each entry records the length and modification time of the HDFS file it was copied from,
+    a lookup with a different HDFS file status is a miss. Files are handed out with acquire()
+    and must be given back with release(), files in use are never evicted or deleted.
+    """
+
+    def __init__(self, cache_dir, max_size=DEFAULT_PACKAGE_CACHE_SIZE):
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        self._lock = threading.RLock()
+        # package name -> dictionary of path, length, modification_time, size and last_used
+        self._entries = {}
+        # path -> number of callers using the file
+        self._in_use = {}
+        # paths to delete once they are no longer in use
+        self._removed = set()
+        self._prepared = False
+
+    def _prepare(self):
+        with self._lock:
+            if self._prepared:
+                return
+            # the index is held in memory so files left by a previous run cannot be trusted
+            if os.path.isdir(self._cache_dir):
+                shutil.rmtree(self._cache_dir)
+            os.makedirs(self._cache_dir)
+            self._prepared = True
+
+    def acquire(self, package_name, file_status, fetch):
+        """
+        :param file_status: the WebHDFS FileStatus of the stored package
+        :param fetch: a function of a local path that copies the package there, called on a miss
+        :return: the local path of the package, to be passed to release() when done with it
+        """
+        self._prepare()
+        with self._lock:
+            entry = self._entries.get(package_name)
+            if entry is not None and self._matches(entry, file_status):
+                logging.debug("Package cache hit for %s", package_name)
+                return self._use(entry)
+
+        logging.debug("Package cache miss for %s", package_name)
+        download_path = os.path.join(self._cache_dir, '%s.%s.part' % (package_name, uuid.uuid4()))
+        try:
+            fetch(download_path)
+            return self._add(package_name, file_status, download_path, use=True)
+        finally:
+            if os.path.exists(download_path):
+                os.remove(download_path)
+
+    def put(self, package_name, file_status, local_path):
+        """
+        Adds a copy of a package that is already on disk, leaving the original in place
+        """
+        self._prepare()
+        copy_path = os.path.join(self._cache_dir, '%s.%s.part' % (package_name, uuid.uuid4()))
+        try:
+            try:
+                os.link(local_path, copy_path)
+            except OSError:
+                shutil.copyfile(local_path, copy_path)
+            self._add(package_name, file_status, copy_path, use=False)
+        finally:
+            if os.path.exists(copy_path):
+                os.remove(copy_path)
+
+    def release(self, path):
+        with self._lock:
+            count = self._in_use.get(path, 0) - 1
+            if count > 0:
+                self._in_use[path] = count
+                return
+            self._in_use.pop(path, None)
+            if path in self._removed:
+                self._removed.discard(path)
+                self._delete(path)
+            else:
+                self._evict()
+
+    def remove(self, package_name):
+        with self._lock:
+            entry = self._entries.pop(package_name, None)
+            if entry is not None:
+                self._discard(entry['path'])
+
+    def _add(self, package_name, file_status, local_path, use):
+        # hashing reads the file, so it is done before taking the lock
+        path = os.path.join(self._cache_dir, '%s.%s' % (package_name, file_digest(local_path)))
+        size = os.path.getsize(local_path)
+        with self._lock:
+            self._removed.discard(path)
+            if not os.path.exists(path):
+                os.rename(local_path, path)
+            entry = {'path': path,
+                     'length': file_status['length'],
+                     'modification_time': file_status['modificationTime'],
+                     'size': size,
+                     'last_used': time.time()}
+            old_entry = self._entries.get(package_name)
+            self._entries[package_name] = entry
+            if old_entry is not None and old_entry['path'] != path:
+                self._discard(old_entry['path'])
+            if use:
+                return self._use(entry)
+            self._evict()
+            return path
+
+    def _use(self, entry):
+        entry['last_used'] = time.time()
+        self._in_use[entry['path']] = self._in_use.get(entry['path'], 0) + 1
+        return entry['path']
+
+    def _matches(self, entry, file_status):
+        return entry['length'] == file_status['length'] \
+            and entry['modification_time'] == file_status['modificationTime'] \
+            and entry['size'] == entry['length'] \
+            and os.path.exists(entry['path'])
+
+    def _evict(self):
+        total_size = sum(entry['size'] for entry in self._entries.values())
+        for package_name, entry in sorted(self._entries.items(), key=lambda item: item[1]['last_used']):
+            if total_size <= self._max_size:
+                break
+            if entry['path'] in self._in_use:
+                continue
+            logging.debug("Evicting %s from the package cache", package_name)
+            del self._entries[package_name]
+            total_size -= entry['size']
+            self._delete(entry['path'])
+
+    def _discard(self, path):
+        if path in self._in_use:
+            self._removed.add(path)
+        elif path not in [entry['path'] for entry in self._entries.values()]:
+            self._delete(path)
+
+    def _delete(self, path):
+        try:
+            os.remove(path)
+        except OSError as exc:
+            logging.warning("Unable to remove %s from the package cache: %s", path, str(exc))
@@ -0,0 +1,64 @@
+"""
+Name:       package_index_tool.py
+Purpose:    Verifies or rebuilds the index of applications by package, for clusters with applications
+            created before the index existed or after an interrupted write.
+            Run with "python package_index_tool.py verify|rebuild" from the deployment manager directory.
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import sys
+import json
+import logging
+import argparse
+
+import application_registrar
+
+
+def main():
+    """
+    main
+    """
+    parser = argparse.ArgumentParser(description='Verify or rebuild the package applications index')
+    parser.add_argument('action', choices=['verify', 'rebuild'])
+    args = parser.parse_args()
+
+    with open('dm-config.json', 'r') as con:
+        config = json.load(con)
+
+    logging.basicConfig(format='%(asctime)s %(levelname)s %(message)s',
+                        level=logging.getLevelName(config['config']['log_level']),
+                        stream=sys.stderr)
+
+    registrar = application_registrar.HbaseApplicationRegistrar(config['environment']['hbase_thrift_server'])
+    if args.action == 'rebuild':
+        result = registrar.rebuild_package_index()
+    else:
+        result = registrar.verify_package_index()
+
+    for package_name, application_name in result['missing']:
+        print 'missing: %s -> %s' % (package_name, application_name)
+    for package_name, application_name in result['stale']:
+        print 'stale: %s -> %s' % (package_name, application_name)
+
+    # verify exits with an error if the index needs rebuilding
+    if args.action == 'verify' and (result['missing'] or result['stale']):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
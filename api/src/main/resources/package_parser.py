@@ -47,8 +47,21 @@ class PackageParser(object):
             logging.debug("get_package_metadata")
             metadata = {}
 
-            tar = tarfile.open(package_data_path)
-            for name in sorted([member.name for member in tar.getmembers()]):
+            # read the archive as a stream, so it is decompressed once and never seeked,
+            # keeping the properties files as they go past
+            names = []
+            properties = {}
+            tar = tarfile.open(package_data_path, 'r|*')
+            try:
+                for member in tar:
+                    names.append(member.name)
+                    name_parts = member.name.split('/')
+                    if len(name_parts) == 4 and name_parts[3] == 'properties.json' and member.isfile():
+                        properties[member.name] = json.load(tar.extractfile(member))
+            finally:
+                tar.close()
+
+            for name in sorted(names):
                 name_parts = name.split('/')
                 package_name = name_parts[0]
                 if len(name_parts) == 1:
@@ -71,7 +84,7 @@ class PackageParser(object):
                         }
                     file_contents = {}
                     if file_name == 'properties.json':
-                        file_contents = json.load(tar.extractfile(name))
+                        file_contents = properties.get(name, {})
                     metadata['component_types'][component_type][component_name][
                         'component_detail']['/'.join(name_parts[3:])] = file_contents
 
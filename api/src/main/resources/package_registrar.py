@@ -20,23 +20,32 @@ License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 either express or implied.
 """
 
+import os
 import logging
 import json
 
-import happybase
 from Hbase_thrift import AlreadyExists
 
 from package_parser import PackageParser
-from deployer_utils import HDFS
+from deployer_utils import HDFS, DEFAULT_READ_CONCURRENCY, file_digest
+from hbase_connection_pool import HbaseConnectionPool
+from package_cache import PackageCache, DEFAULT_PACKAGE_CACHE_SIZE
+from record_cache import RecordCache
+from hbase_scan import scan_page, json_value_filter, json_value_matches
 
 from exceptiondef import FailedConnection
 
+DEFAULT_METADATA_CACHE_SIZE = 200
+
 
 class HbasePackageRegistrar(object):
     COLUMN_DEPLOY_STATUS = "cf:deploy_status"
 
-    def __init__(self, hbase_host, hdfs_host, hdfs_user, hdfs_port, package_local_dir_path):
+    def __init__(self, hbase_host, hdfs_host, hdfs_user, hdfs_port, package_local_dir_path, connection_pool=None,
+                 package_cache_size=DEFAULT_PACKAGE_CACHE_SIZE, hdfs_read_concurrency=DEFAULT_READ_CONCURRENCY,
+                 metadata_cache_size=DEFAULT_METADATA_CACHE_SIZE):
         self._hbase_host = hbase_host
+        self._connection_pool = connection_pool if connection_pool is not None else HbaseConnectionPool(hbase_host)
         self._hdfs_user = hdfs_user
         self._hdfs_host = hdfs_host
         self._hdfs_port = hdfs_port
@@ -46,6 +55,12 @@ class HbasePackageRegistrar(object):
         self._dm_root_dir_path = "/pnda/system/deployment-manager"
         self._package_hdfs_dir_path = "%s/packages" % self._dm_root_dir_path
         self._package_local_dir_path = package_local_dir_path
+        self._hdfs_read_concurrency = hdfs_read_concurrency
+        self._package_cache = None
+        if package_local_dir_path is not None:
+            self._package_cache = PackageCache(os.path.join(package_local_dir_path, 'package_cache'), package_cache_size)
+        # decoded metadata and defaults, keyed by package name and archive digest so entries never go stale
+        self._metadata_cache = RecordCache(metadata_cache_size, ttl=None)
 
         try:
             if hdfs_host is not None:
@@ -58,22 +73,34 @@ class HbasePackageRegistrar(object):
             logging.debug("not creating packages HDFS folder as it already exists")
 
         if self._hbase_host is not None:
-            connection = happybase.Connection(self._hbase_host)
-            try:
-                connection.create_table(self._table_name, {'cf': dict()})
-                logging.debug("packages table created")
-            except AlreadyExists:
-                logging.debug("packages table exists")
-            finally:
-                connection.close()
-
-    def set_package(self, package_name, package_data_path, user):
+            with self._connection_pool.connection() as connection:
+                try:
+                    connection.create_table(self._table_name, {'cf': dict()})
+                    logging.debug("packages table created")
+                except AlreadyExists:
+                    logging.debug("packages table exists")
+
+    def set_package(self, package_name, package_data_path, user, metadata=None):
+        """
+        :param metadata: the metadata already parsed from the package file, the file is parsed if not given
+        """
         logging.debug("Storing %s", package_name)
-        metadata = self._parser.get_package_metadata(package_data_path)
-        metadata['user'] = user
+        if metadata is None:
+            metadata = self._parser.get_package_metadata(package_data_path)
+        metadata = dict(metadata, user=user)
         key, data = self.generate_record(metadata)
+        digest = file_digest(package_data_path)
+        data['cf:digest'] = digest
         self._write_to_hdfs(package_data_path, data['cf:package_data'])
         self._write_to_db(key, data)
+        self._metadata_cache.get((key, digest), lambda: self._decode_metadata(data))
+        if self._package_cache is not None:
+            # keep a copy so creating applications from the package does not read it back from HDFS
+            try:
+                file_status = self._hdfs_client.get_file_status(data['cf:package_data'])
+                self._package_cache.put(package_name, file_status, package_data_path)
+            except Exception as exc:
+                logging.warning("Unable to cache %s: %s", package_name, str(exc))
 
     def set_package_deploy_status(self, package_name, deploy_status):
         """
@@ -88,30 +115,64 @@ class HbasePackageRegistrar(object):
         logging.debug("Deleting %s", package_name)
         package_data_hdfs_path = self._read_from_db(package_name, ['cf:package_data'])['cf:package_data']
         self._hdfs_client.remove(package_data_hdfs_path)
-        connection = happybase.Connection(self._hbase_host)
-        try:
+        with self._connection_pool.connection() as connection:
             table = connection.table(self._table_name)
             table.delete(package_name)
-        finally:
-            connection.close()
+        if self._package_cache is not None:
+            self._package_cache.remove(package_name)
 
     def get_package_data(self, package_name):
+        """
+        :return: the local path of the package file, to be passed to release_package_data when no longer needed
+        """
         logging.debug("Reading %s", package_name)
         record = self._read_from_db(package_name, ['cf:package_data'])
         if not record:
             return None
-        local_package_path = "%s/%s" % (self._package_local_dir_path, package_name)
-        self._read_from_hdfs(record['cf:package_data'], local_package_path)
-        return local_package_path
+        hdfs_path = record['cf:package_data']
+        if self._package_cache is None:
+            local_package_path = "%s/%s" % (self._package_local_dir_path, package_name)
+            self._read_from_hdfs(hdfs_path, local_package_path)
+            return local_package_path
+        file_status = self._hdfs_client.get_file_status(hdfs_path)
+        return self._package_cache.acquire(package_name, file_status,
+                                           lambda local_path: self._read_from_hdfs(hdfs_path, local_path))
+
+    def release_package_data(self, local_package_path):
+        if self._package_cache is None:
+            os.remove(local_package_path)
+            return
+        self._package_cache.release(local_package_path)
 
     def get_package_metadata(self, package_name):
+        """
+        :return: the metadata, name, version and default properties of the package, shared between callers
+                 so they must not be modified
+        """
         logging.debug("Reading %s", package_name)
-        package_data = self._read_from_db(
-            package_name, ['cf:metadata', 'cf:name', 'cf:version'])
+        package_data = self._read_from_db(package_name, ['cf:digest', 'cf:name', 'cf:version'])
         if not package_data:
             return None
-        return {"metadata": json.loads(package_data["cf:metadata"]), "name": package_data[
-            "cf:name"], "version": package_data["cf:version"]}
+        digest = package_data.get('cf:digest')
+        if digest is None:
+            # packages deployed before the digest was stored are decoded on every read
+            return self._load_metadata(package_name, package_data)
+        return self._metadata_cache.get((package_name, digest),
+                                        lambda: self._load_metadata(package_name, package_data))
+
+    def _load_metadata(self, package_name, package_data):
+        package_data = dict(package_data)
+        package_data.update(self._read_from_db(package_name, ['cf:metadata']))
+        if 'cf:metadata' not in package_data:
+            return None
+        return self._decode_metadata(package_data)
+
+    def _decode_metadata(self, package_data):
+        metadata = json.loads(package_data['cf:metadata'])
+        return {"metadata": metadata,
+                "name": package_data["cf:name"],
+                "version": package_data["cf:version"],
+                "defaults": self._parser.properties_from_metadata(metadata)}
 
     def package_exists(self, package_name):
         logging.debug("Checking %s", package_name)
@@ -131,20 +192,29 @@ class HbasePackageRegistrar(object):
         deploy_status_as_string = package_data[self.COLUMN_DEPLOY_STATUS]
         return json.loads(deploy_status_as_string)
 
-    def list_packages(self):
-        logging.debug("List all packages")
+    def list_packages(self, limit=None, start_after=None, owner=None, package=None):
+        """
+        :param package: only list the versions of packages whose name starts with this
+        :param owner: only list packages deployed by this user
+        """
+        logging.debug("List packages")
+        columns = ['cf:name']
+        filters = []
+        accept = None
+        if owner is not None:
+            columns.append('cf:metadata')
+            filters.append(json_value_filter('cf:metadata', 'user', owner))
+            accept = lambda _, data: json_value_matches(data, 'cf:metadata', 'user', owner)
 
-        connection = None
         try:
-            connection = happybase.Connection(self._hbase_host)
-            table = connection.table(self._table_name)
-            result = [key for key, _ in table.scan(columns=['cf:name'])]
+            with self._connection_pool.connection() as connection:
+                table = connection.table(self._table_name)
+                rows = scan_page(table, columns, filters=filters, row_prefix=package, start_after=start_after,
+                                 limit=limit, accept=accept)
+                result = [key for key, _ in rows]
         except Exception as exc:
             logging.debug(str(exc))
             raise FailedConnection('Unable to connect to the HBase master')
-        finally:
-            if connection:
-                connection.close()
         return result
 
     def generate_record(self, metadata):
@@ -156,34 +226,20 @@ class HbasePackageRegistrar(object):
         }
 
     def _read_from_db(self, key, columns):
-        connection = happybase.Connection(self._hbase_host)
-        try:
+        with self._connection_pool.connection() as connection:
             table = connection.table(self._table_name)
             data = table.row(key, columns=columns)
-        finally:
-            connection.close()
         return data
 
     def _read_from_hdfs(self, source_hdfs_path, dest_local_path):
-        self._hdfs_client.stream_file_to_disk(source_hdfs_path, dest_local_path)
+        self._hdfs_client.stream_file_to_disk(source_hdfs_path, dest_local_path, self._hdfs_read_concurrency)
 
     def _write_to_db(self, key, data):
-        connection = happybase.Connection(self._hbase_host)
-        try:
+        with self._connection_pool.connection() as connection:
             table = connection.table(self._table_name)
             table.put(key, data)
-        finally:
-            connection.close()
 
     def _write_to_hdfs(self, source_local_path, dest_hdfs_path):
-        with open(source_local_path, 'rb') as source_file:
-            first = True
-            chunk_size = 10*1024*1024
-            data_chunk = source_file.read(chunk_size)
-            while data_chunk:
-                if first:
-                    self._hdfs_client.create_file(data_chunk, dest_hdfs_path, permission=600)
-                    first = False
-                else:
-                    self._hdfs_client.append_file(data_chunk, dest_hdfs_path)
-                data_chunk = source_file.read(chunk_size)
+        size, seconds = self._hdfs_client.upload_file(source_local_path, dest_hdfs_path, permission=600)
+        logging.info("Uploaded %s to HDFS: %d bytes in %.2f seconds (%.2f MB/s)", dest_hdfs_path, size, seconds,
+                     size / (1024.0 * 1024.0) / max(seconds, 0.001))
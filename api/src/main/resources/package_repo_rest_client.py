@@ -18,12 +18,43 @@ Unless required by applicable law or agreed to separately in writing, software d
 License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
 either express or implied.
 """
+import os
 import json
 import logging
 import re
+import time
+import base64
+import binascii
+import hashlib
 import requests
 from requests.exceptions import RequestException
-from exceptiondef import FailedConnection
+from exceptiondef import FailedConnection, FailedValidation, NotFound, Forbidden
+
+# the most of a package held in memory at once while downloading
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# how many times an interrupted download is resumed before giving up
+DOWNLOAD_RETRIES = 3
+# seconds waited before the first resume, doubled for each one after it
+DOWNLOAD_BACKOFF = 1
+# hashlib names of the RFC 3230 Digest header algorithms a download can be verified against
+DIGEST_ALGORITHMS = {'sha-512': 'sha512', 'sha-256': 'sha256', 'md5': 'md5'}
+
+
+def header_checksum(headers):
+    """
+    Reads the checksum of a package from the Digest header the repository sends with it, if any
+    :return: a new hash and the expected hexdigest, or None
+    """
+    for instance_digest in headers.get('Digest', '').split(','):
+        algorithm, _, value = instance_digest.strip().partition('=')
+        if algorithm.lower() in DIGEST_ALGORITHMS and value:
+            try:
+                expected_digest = binascii.hexlify(base64.b64decode(value))
+            except (TypeError, binascii.Error):
+                logging.warning("Ignoring malformed Digest header: %s", instance_digest)
+                continue
+            return hashlib.new(DIGEST_ALGORITHMS[algorithm.lower()]), expected_digest
+    return None
 
 
 class PackageRepoRestClient(object):
@@ -45,22 +76,91 @@ class PackageRepoRestClient(object):
         logging.debug("PUT: %s", url)
         response = requests.put(url, data=package_data)
         logging.debug("response code: %s", str(response.status_code))
-        assert response.status_code == 200
+        if response.status_code != 200:
+            raise FailedConnection("Package Repository Manager - unable to add %s, response code %s" %
+                                   (package_name, response.status_code))
 
-    def get_package(self, package_name, user_name, expected_codes=None):
+    def get_package(self, package_name, user_name, expected_codes=None, checksum=None):
         """
-        gets a package from the repository
-        :param package_nam:
+        gets a package from the repository, streaming it to disk a chunk at a time
+        and resuming from the last byte received if the download is interrupted
+        :param package_name: the name of the package file
+        :param checksum: optional "algorithm:hexdigest" to verify the package against, e.g. "sha256:ab12...",
+                         without it the package is verified against the Digest header of the response, if any
         :return: local path to file
         """
         if not expected_codes:
             expected_codes = [200]
-        response = self.make_rest_get_request("/packages/%s?user.name=%s" % (package_name, user_name), expected_codes)
+        path = "/packages/%s?user.name=%s" % (package_name, user_name)
         local_path = "%s/%s" % (self._package_local_dir_path, package_name)
-        with open(local_path, 'wb') as local_file:
-            local_file.write(response.content)
+        algorithm, expected_digest = checksum.split(':', 1) if checksum else (None, None)
+
+        # the hash and expected hexdigest, a list so a restarted download can replace the hash
+        digest = [hashlib.new(algorithm), expected_digest] if algorithm else []
+        try:
+            received = self._download(package_name, path, expected_codes, local_path, digest)
+            if digest and digest[0].hexdigest() != digest[1]:
+                raise FailedValidation('Checksum of %s does not match, expected %s but was %s' %
+                                       (package_name, digest[1], digest[0].hexdigest()))
+        except Exception:
+            # a partial or corrupt package must not be picked up by a later deploy
+            if os.path.exists(local_path):
+                os.remove(local_path)
+            raise
+        logging.debug("Downloaded %s, %d bytes", package_name, received)
         return local_path
 
+    def _download(self, package_name, path, expected_codes, local_path, digest):
+        """
+        Streams a package to local_path, resuming up to DOWNLOAD_RETRIES times with an increasing wait
+        when the connection fails or the repository answers with a server error
+        :return: the number of bytes received
+        """
+        retries = 0
+        with open(local_path, 'wb') as local_file:
+            while True:
+                try:
+                    self._stream_to_file(path, expected_codes, local_file, digest)
+                    return local_file.tell()
+                except (RequestException, FailedConnection) as exc:
+                    retries += 1
+                    if retries > DOWNLOAD_RETRIES:
+                        logging.debug("Download error: %s", str(exc))
+                        raise FailedConnection('Unable to download %s from the Package Repository Manager' % package_name)
+                    backoff = DOWNLOAD_BACKOFF * 2 ** (retries - 1)
+                    logging.warning("Download of %s interrupted at %d bytes, resuming in %s seconds: %s",
+                                    package_name, local_file.tell(), backoff, str(exc))
+                    time.sleep(backoff)
+
+    def _stream_to_file(self, path, expected_codes, local_file, digest):
+        """
+        Appends the rest of a package to a partly downloaded file, the whole package if the file is empty
+        """
+        received = local_file.tell()
+        headers = {'Range': 'bytes=%d-' % received} if received else None
+        response = self.make_rest_get_request(path, expected_codes + [206], stream=True, headers=headers)
+        try:
+            if received and response.status_code != 206:
+                # the repository ignored the range, so it is sending the whole package again
+                logging.debug("Restarting download of %s from the beginning", path)
+                local_file.seek(0)
+                local_file.truncate()
+                received = 0
+                if digest:
+                    digest[0] = hashlib.new(digest[0].name)
+            if not received and not digest:
+                digest.extend(header_checksum(response.headers) or [])
+            expected_length = received + int(response.headers.get('content-length', -1))
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                local_file.write(chunk)
+                received += len(chunk)
+                if digest:
+                    digest[0].update(chunk)
+            if received < expected_length:
+                raise RequestException('Connection closed after %d of %d bytes' % (received, expected_length))
+        finally:
+            response.close()
+
     def get_package_list(self, user_name, recency=None):
         """
         :return: a list of all packages in the repository
@@ -79,14 +179,14 @@ class PackageRepoRestClient(object):
             return cause_msg
         return html_str
 
-    def make_rest_get_request(self, path, expected_codes=None):
+    def make_rest_get_request(self, path, expected_codes=None, stream=False, headers=None):
         if not expected_codes:
             expected_codes = [200]
         url = self.api_url + path
         logging.debug("GET: %s", url)
 
         try:
-            response = requests.get(url, timeout=120)
+            response = requests.get(url, timeout=120, stream=stream, headers=headers)
         except RequestException as exc:
             logging.debug("Request error: %s", str(exc))
             error_msg = 'Unable to connect to the Package Repository Manager'
@@ -95,9 +195,19 @@ class PackageRepoRestClient(object):
         logging.debug("response code: %s", str(response.status_code))
 
         if response.status_code not in expected_codes:
-            error_msg = PackageRepoRestClient.parse_error_msg_from_response(response.text)
-            error_msg = "Package Repository Manager - {} (request path = {})".format(error_msg, path)
-            logging.debug("Server error: %s", str(error_msg))
-        assert response.status_code in expected_codes, error_msg
+            try:
+                error_msg = PackageRepoRestClient.parse_error_msg_from_response(response.text)
+                error_msg = "Package Repository Manager - {} (request path = {})".format(error_msg, path)
+                logging.debug("Server error: %s", str(error_msg))
+                # only server errors are worth retrying, a client error will be the same next time
+                if response.status_code == 404:
+                    raise NotFound(json.dumps({'information': error_msg}))
+                if response.status_code in (401, 403):
+                    raise Forbidden(error_msg)
+                if 400 <= response.status_code < 500:
+                    raise FailedValidation(error_msg)
+                raise FailedConnection(error_msg)
+            finally:
+                response.close()
 
         return response
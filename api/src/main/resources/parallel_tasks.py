@@ -0,0 +1,81 @@
+"""
+Name:       parallel_tasks.py
+Purpose:    Runs a set of tasks on a pool of threads, respecting dependencies between them
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import Queue
+import logging
+import traceback
+from multiprocessing.dummy import Pool as ThreadPool
+
+DEFAULT_COMPONENT_CONCURRENCY = 4
+
+
+def run_tasks(tasks, concurrency=DEFAULT_COMPONENT_CONCURRENCY, dependencies=None, stop_on_error=False):
+    """
+    Runs each task once every task it depends on has succeeded, at most concurrency at a time
+    :param tasks: dictionary of key to a function taking no arguments
+    :param dependencies: dictionary of key to the keys of the tasks that must succeed first
+    :param stop_on_error: start no more tasks once one has failed, tasks already running are waited for
+    :return: dictionaries of key to return value and of key to exception, a task that was not run
+             because a dependency failed or stop_on_error applied is in neither
+    """
+    if not tasks:
+        return {}, {}
+    dependencies = dependencies or {}
+    waiting_for = dict((key, set(dependencies.get(key, [])) & set(tasks)) for key in tasks)
+    pending = dict(tasks)
+    results = {}
+    errors = {}
+    completed = Queue.Queue()
+    concurrency = max(1, min(concurrency, len(tasks)))
+    pool = ThreadPool(processes=concurrency)
+    running = 0
+    try:
+        while True:
+            if not (stop_on_error and errors):
+                # tasks are only handed to the pool when a thread is free, so none is queued behind a failure
+                for key in sorted(pending):
+                    if running < concurrency and waiting_for[key].issubset(results):
+                        pool.apply_async(_run_task, (key, pending.pop(key), completed))
+                        running += 1
+            if running == 0:
+                break
+            key, succeeded, value = completed.get()
+            running -= 1
+            if succeeded:
+                results[key] = value
+            else:
+                errors[key] = value
+    finally:
+        pool.close()
+        pool.join()
+
+    if pending:
+        logging.warning("Not running %s", ', '.join(str(key) for key in sorted(pending)))
+    return results, errors
+
+
+def _run_task(key, task, completed):
+    try:
+        completed.put((key, True, task()))
+    except Exception as ex:
+        logging.error("%s failed: %s", key, traceback.format_exc())
+        completed.put((key, False, ex))
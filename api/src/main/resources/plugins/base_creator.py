@@ -36,10 +36,13 @@ import logging
 import json
 import string
 import collections
-import requests
 import hbase_descriptor
 import opentsdb_descriptor
 from deployer_utils import HDFS
+from yarn_application_cache import YarnApplicationCache
+
+# shared by every creator, so the details of an application cost one request to the resource manager
+YARN_APPLICATIONS = YarnApplicationCache()
 
 
 class Creator(object):
@@ -247,20 +250,32 @@ class Creator(object):
                           components_overrides):
         results = []
         for component_name, component in components.iteritems():
-            staged_component_path = '%s/%s' % (stage_path, component['component_path'])
-            overrides = components_overrides.get(component_name) if components_overrides is not None else {}
-            overrides = {} if overrides is None else overrides
-            merged_props = self._instantiate_properties(application_name, user_name, component, overrides)
-            descriptor_result = self._create_optional_descriptors(staged_component_path, component, merged_props)
-            self._auto_fill_app_properties(staged_component_path, merged_props)
-            result = self.create_component(staged_component_path, application_name, user_name, component, merged_props)
-            result['component_name'] = component_name
-            result['application_hdfs_root'] = merged_props['application_hdfs_root']
-            result['component_job_name'] = merged_props['component_job_name']
-            result['descriptors'] = descriptor_result
-            results.append(result)
+            results.append(self.create_named_component(stage_path, application_name, user_name,
+                                                       component_name, component, components_overrides))
         return results
 
+    def create_named_component(self, stage_path, application_name, user_name, component_name, component,
+                               components_overrides):
+        '''
+        Creates one component of the package along with its descriptors, safe to call
+        concurrently for different components
+
+        returns - the create data for the component, as one entry of the list
+              returned by create_components
+        '''
+        staged_component_path = '%s/%s' % (stage_path, component['component_path'])
+        overrides = components_overrides.get(component_name) if components_overrides is not None else {}
+        overrides = {} if overrides is None else overrides
+        merged_props = self._instantiate_properties(application_name, user_name, component, overrides)
+        descriptor_result = self._create_optional_descriptors(staged_component_path, component, merged_props)
+        self._auto_fill_app_properties(staged_component_path, merged_props)
+        result = self.create_component(staged_component_path, application_name, user_name, component, merged_props)
+        result['component_name'] = component_name
+        result['application_hdfs_root'] = merged_props['application_hdfs_root']
+        result['component_job_name'] = merged_props['component_job_name']
+        result['descriptors'] = descriptor_result
+        return result
+
     def destroy_components(self, application_name, create_data):
         for single_component_data in create_data:
             self._destroy_optional_descriptors(single_component_data['descriptors'])
@@ -309,34 +324,8 @@ class Creator(object):
 
         return details
 
-    def _get_yarn_applications_from_rm(self, resource_manager):
-        result = None
-        logging.debug('Querying list of yarn applications from %s', resource_manager)
-        try:
-            url = 'http://%s/ws/v1/cluster/apps' % resource_manager
-            result = requests.get(url, headers={'Accept': 'application/json'}).json()
-        except:
-            logging.info('Failed to query application list from %s', url)
-
-        return result
-
     def _get_yarn_applications(self):
-        result = self._get_yarn_applications_from_rm(self._yarn_resource_manager)
-        if result is None and self._yarn_resource_manager_backup is not None:
-            result = self._get_yarn_applications_from_rm(self._yarn_resource_manager_backup)
-        return result
-
-    def _get_yarn_start_time(self, app_info):
-        try:
-            return int(app_info['startedTime'])
-        except:
-            return 0
+        return YARN_APPLICATIONS.get_applications([self._yarn_resource_manager, self._yarn_resource_manager_backup])
 
     def _find_yarn_app_info(self, all_yarn_applications, job_name):
-        result = None
-        if 'apps' in all_yarn_applications and 'app' in all_yarn_applications['apps']:
-            for app in all_yarn_applications['apps']['app']:
-                if app['name'] == job_name:
-                    if result is None or self._get_yarn_start_time(app) > self._get_yarn_start_time(result):
-                        result = app
-        return result
+        return all_yarn_applications.get(job_name)
@@ -105,8 +105,8 @@ class FlinkCreator(Common):
         mkdircommands.append('sudo mkdir -p %s' % remote_component_install_path)
         deployer_utils.exec_ssh(target_host, root_user, key_file, mkdircommands)
 
-        os.system("scp -i %s -o StrictHostKeyChecking=no %s %s@%s:%s"
-                  % (key_file, staged_component_path + '/*', root_user, target_host, remote_component_tmp_path))
+        _, files = deployer_utils.list_files(staged_component_path, remote_component_tmp_path)
+        deployer_utils.sftp_put(target_host, root_user, key_file, files)
 
         commands = []
         commands.append('sudo cp %s/%s %s' % (remote_component_tmp_path, service_script, service_script_install_path))
@@ -81,9 +81,9 @@ class JupyterCreator(Creator):
         for file_name in file_list:
             if file_name.endswith(r'.ipynb'):
                 self._fill_properties('%s/%s' % (staged_component_path, file_name), properties)
-                logging.debug('Copying %s/* to %s:%s', staged_component_path, target_host, remote_component_tmp_path)
-                os.system("scp -i %s -o StrictHostKeyChecking=no %s/%s %s@%s:%s" %
-                          (key_file, staged_component_path, file_name, root_user, target_host, remote_component_tmp_path))
+                deployer_utils.sftp_put(target_host, root_user, key_file,
+                                        [('%s/%s' % (staged_component_path, file_name),
+                                          '%s/%s' % (remote_component_tmp_path, os.path.basename(file_name)))])
 
                 remote_component_install_path = '%s/%s_%s' % (remote_notebook_path, application_name, file_name)
                 deployer_utils.exec_ssh(
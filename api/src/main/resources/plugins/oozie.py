@@ -92,8 +92,9 @@ requested spark version" % self._config['oozie_spark_version']
         mkdir_commands.append('sudo mkdir -p %s' % component_install_path)
         self.exec_cmds(mkdir_commands)
 
-        os.system("cp -r %s %s"
-                % (staged_component_path + '/lib/*', component_install_path))
+        # the install path is on this host, so copy in process and let any failure stop the creation,
+        # merging into what an earlier creation of the component left there
+        deployer_utils.copy_tree('%s/lib' % staged_component_path, component_install_path)
 
         copy_commands = []
         copy_commands.append('sudo mv  %s/%s %s/execute.sh' % (component_install_path, service_script, component_install_path))
@@ -303,7 +304,9 @@ requested spark version" % self._config['oozie_spark_version']
             raise FailedCreation('Failed to set up yarn queue config: %s' % str(ex))
 
         # stage the component files to hdfs
-        self._hdfs_client.recursive_copy(staged_component_path, remote_path, exclude=exclude, permission=755)
+        self._hdfs_client.recursive_copy(staged_component_path, remote_path, exclude=exclude, permission=755,
+                                         concurrency=self._config.get('hdfs_copy_concurrency',
+                                                                      deployer_utils.DEFAULT_COPY_CONCURRENCY))
 
         # stage the instantiated job properties back to HDFS - no functional purpose,
         # just helps developers understand what has happened
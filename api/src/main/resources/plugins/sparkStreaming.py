@@ -105,17 +105,21 @@ class SparkStreamingCreator(Common):
         mkdircommands.append('sudo mkdir -p %s' % remote_component_install_path)
         deployer_utils.exec_ssh(target_host, root_user, key_file, mkdircommands)
 
-        os.system("scp -i %s -o StrictHostKeyChecking=no %s %s@%s:%s"
-                  % (key_file, staged_component_path + '/*', root_user, target_host, remote_component_tmp_path))
+        _, files = deployer_utils.list_files(staged_component_path, remote_component_tmp_path)
+        deployer_utils.sftp_put(target_host, root_user, key_file, files)
 
-        for node in self._environment['yarn_node_managers'].split(','):
+        def push_log4j_properties(node):
             deployer_utils.exec_ssh(node, root_user, key_file, ['mkdir -p %s' % remote_component_tmp_path])
-            os.system("scp -i %s -o StrictHostKeyChecking=no %s %s@%s:%s"
-                      % (key_file, staged_component_path + '/log4j.properties', root_user, node, remote_component_tmp_path + '/log4j.properties'))
+            deployer_utils.sftp_put(node, root_user, key_file,
+                                    [(staged_component_path + '/log4j.properties', remote_component_tmp_path + '/log4j.properties')])
             deployer_utils.exec_ssh(node, root_user, key_file,
                                     ['sudo mkdir -p %s' % remote_component_install_path,
                                      'sudo mv %s %s' % (remote_component_tmp_path + '/log4j.properties', remote_component_install_path + '/log4j.properties')])
 
+        deployer_utils.distribute_to_hosts(self._environment['yarn_node_managers'].split(','), push_log4j_properties,
+                                           self._config.get('host_concurrency', deployer_utils.DEFAULT_HOST_CONCURRENCY),
+                                           self._config.get('host_timeout', deployer_utils.DEFAULT_HOST_TIMEOUT))
+
         commands = []
         commands.append('sudo cp %s/%s %s' % (remote_component_tmp_path, service_script, service_script_install_path))
         commands.append('sudo cp %s/* %s' % (remote_component_tmp_path, remote_component_install_path))
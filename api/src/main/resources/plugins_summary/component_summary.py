@@ -9,19 +9,19 @@ class ComponentSummary(object):
         self.component_status = dict([("green", "OK"), ("amber", "WARN"), ("red", "ERROR")])
         self._component_type = ''
 
-    def get_components_summary(self, application, component_data):
+    def get_components_summary(self, application, component_data, context):
         self._component_type = self.get_component_type()
         ret_data = {}
 
         for count, component in enumerate(component_data):
-            ret_data.update({"%s-%d" % (self._component_type, count+1): self.get_component_summary(component, application)})
+            ret_data.update({"%s-%d" % (self._component_type, count+1): self.get_component_summary(component, application, context)})
 
         return ret_data
 
-    def get_component_summary(self, component, application):
+    def get_component_summary(self, component, application, context):
 
         ret_data = {}
-        dm_status = self._application_summary_registrar.get_dm_status(application)
+        dm_status = context.dm_status
 
         job_name = component['component_job_name']
         component_name = component['component_name']
@@ -29,12 +29,12 @@ class ComponentSummary(object):
         yarn_data = self._yarn_connection.check_in_yarn(job_name)
         if dm_status == 'CREATED':
             if yarn_data != None:
-                aggregate_status, yarnid, tracking_url, information = self.yarn_handler(yarn_data, application)
+                aggregate_status, yarnid, tracking_url, information = self.yarn_handler(yarn_data, application, context)
             else:
                 aggregate_status = "CREATED"
         else:
             if yarn_data != None:
-                aggregate_status, yarnid, tracking_url, information = self.yarn_handler(yarn_data, application)
+                aggregate_status, yarnid, tracking_url, information = self.yarn_handler(yarn_data, application, context)
             else:
                 aggregate_status, information = self.check_in_service_log(self.environment['namespace'], application, component_name)
 
@@ -8,10 +8,11 @@ class FlinkComponentSummary(ComponentSummary):
     def get_component_type(self):
         return 'flink'
 
-    def yarn_handler(self, yarn_data, application):
+    def yarn_handler(self, yarn_data, application, context):
         '''
         Handling Flink YARN data
         '''
+        del application
 
         (aggregate_status, tracking_url) = ('', '')
         information = ''
@@ -32,8 +33,7 @@ class FlinkComponentSummary(ComponentSummary):
             if len(data['flinkJid']) > 1 else yarn_data['trackingUrl']
         elif yarn_data['state'] == 'FINISHED':
             aggregate_status = '%s_%s' % (yarn_data['state'], yarn_data['finalStatus'])
-            flink_job_id = self._application_summary_registrar.get_flink_job_id\
-            (application).strip('/')
+            flink_job_id = context.get_flink_job_id().strip('/')
             if len(flink_job_id) < 1:
                 tracking_url = 'http://%s/#/completed-jobs' % \
                 (self.environment['flink_history_server'])
@@ -43,8 +43,7 @@ class FlinkComponentSummary(ComponentSummary):
             information = yarn_data['diagnostics'].split('Details :')[0].strip()
         elif yarn_data['finalStatus'] == 'FAILED' or yarn_data['finalStatus'] == 'KILLED':
             aggregate_status = yarn_data['finalStatus']
-            flink_job_id = self._application_summary_registrar.get_flink_job_id\
-            (application).strip('/')
+            flink_job_id = context.get_flink_job_id().strip('/')
             if len(flink_job_id) < 1:
                 tracking_url = 'http://%s/#/completed-jobs' % \
                 (self.environment['flink_history_server'])
@@ -5,5 +5,5 @@ class JupyterComponentSummary(ComponentSummary):
     def get_component_type(self):
         return 'jupyter'
 
-    def get_component_summary(self, component, application):
+    def get_component_summary(self, component, application, context):
         return {}
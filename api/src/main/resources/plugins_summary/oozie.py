@@ -8,7 +8,7 @@ class OozieComponentSummary(ComponentSummary):
     def get_component_type(self):
         return 'oozie'
 
-    def get_component_summary(self, component, application):
+    def get_component_summary(self, component, application, context):
         ret_data = {}
         data = self._oozie_api_request(component['job_handle'])
 
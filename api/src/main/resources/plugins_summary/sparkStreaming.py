@@ -8,11 +8,11 @@ class SparkStreamingComponentSummary(ComponentSummary):
     def get_component_type(self):
         return 'sparkStreaming'
 
-    def yarn_handler(self, yarn_data, application):
+    def yarn_handler(self, yarn_data, application, context):
         '''
         Handling Spark YARN data
         '''
-        del application
+        del application, context
         aggregate_status = ''
         yarnid = yarn_data['id']
         tracking_url = ''
@@ -0,0 +1,43 @@
+import threading
+
+
+def flink_job_id(component_data):
+    """
+    The Flink job id of an application from its last summary, or an empty string
+    """
+    jid = ''
+    for component in component_data:
+        if 'flink' in component:
+            tracking_url = component_data[component]['tracking_url']
+            jid = tracking_url.split("jobs")[-1]
+    return jid
+
+
+class SummaryContext(object):
+    """
+    What the component summaries of an application read from HBase in one summary pass, so they
+    are read once per application rather than once per component
+    """
+
+    def __init__(self, application, create_data, dm_status, previous_summary=None, load_previous_summary=None):
+        """
+        :param dm_status: the status of the application in platform_applications
+        :param previous_summary: the components of the last summary of the application, if known
+        :param load_previous_summary: a function to read the last summary if it is needed and not known
+        """
+        self.application = application
+        self.create_data = create_data
+        self.dm_status = dm_status
+        self._previous_summary = previous_summary
+        self._load_previous_summary = load_previous_summary
+        self._lock = threading.Lock()
+
+    def get_previous_summary(self):
+        with self._lock:
+            if self._previous_summary is None and self._load_previous_summary is not None:
+                self._previous_summary = self._load_previous_summary() or {}
+                self._load_previous_summary = None
+            return self._previous_summary or {}
+
+    def get_flink_job_id(self):
+        return flink_job_id(self.get_previous_summary())
@@ -1,33 +1,83 @@
 import json
+import time
 import requests
 
+from yarn_application_cache import read_yarn_applications, keep_latest, STREAM_CHUNK_SIZE, YARN_ACTIVE_STATES
+
+FULL_REFRESH_INTERVAL = 600
+# seconds of finished applications fetched again, so none is missed between the resource manager's clock and ours
+REFRESH_OVERLAP = 60
+
 class YarnConnection(object):
     def __init__(self, environment):
         self.yarn_host = environment['yarn_resource_manager_host']
         self.yarn_port = environment['yarn_resource_manager_port']
         self.rest_api_req_timeout = environment['rest_api_req_timeout']
+        self._snapshot = None
+        # the list kept between refreshes, and when it was last fetched in part and in full
+        self._applications = None
+        self._refresh_time = 0
+        self._full_refresh_time = 0
 
-    def _get_yarn_start_time(self, app_info):
+    def get_yarn_applications(self, names=None, **filters):
+        """
+        Get the list of YARN applications in a single request, indexed by name keeping the latest
+        application for each name. The response is parsed as it arrives keeping only the fields used.
+        :param names: only keep applications with one of these names, or all of them if None
+        :param filters: query parameters to narrow the list, such as states or finishedTimeBegin
+        """
+        url = 'http://%s:%s%s' % (self.yarn_host, self.yarn_port, '/ws/v1/cluster/apps')
+        response = requests.get(url, params=filters, timeout=self.rest_api_req_timeout, stream=True)
         try:
-            return int(app_info['startedTime'])
-        except:
-            return 0
+            if response.status_code != 200:
+                raise ValueError('Resource manager returned HTTP %s' % response.status_code)
+            return keep_latest({}, read_yarn_applications(response.iter_content(STREAM_CHUNK_SIZE), names))
+        finally:
+            response.close()
+
+    def refresh_snapshot(self):
+        """
+        Brings the list of applications up to date and uses it for check_in_yarn. The whole list is
+        fetched the first time and every FULL_REFRESH_INTERVAL seconds, in between only applications
+        that are still running or finished since the last refresh are fetched and merged in. Applications
+        that were running are dropped before the merge, so one the resource manager no longer reports
+        as running or recently finished is not kept as running.
+        """
+        now = time.time()
+        if self._applications is None or now - self._full_refresh_time >= FULL_REFRESH_INTERVAL:
+            applications = self.get_yarn_applications()
+            self._full_refresh_time = now
+        else:
+            applications = dict((name, application) for name, application in self._applications.iteritems()
+                                if application.get('state') not in YARN_ACTIVE_STATES)
+            keep_latest(applications, self.get_yarn_applications(states=','.join(YARN_ACTIVE_STATES)).itervalues())
+            finished_since = int((self._refresh_time - REFRESH_OVERLAP) * 1000)
+            keep_latest(applications, self.get_yarn_applications(finishedTimeBegin=finished_since).itervalues())
+        self._applications = applications
+        self._refresh_time = now
+        self.use_snapshot(applications)
+
+    def use_snapshot(self, yarn_apps):
+        """
+        Answer check_in_yarn from a list already fetched with get_yarn_applications, or from the
+        resource manager on every call again if yarn_apps is None
+        """
+        self._snapshot = yarn_apps
+
+    def get_snapshot(self):
+        """
+        The list set with use_snapshot, or None
+        """
+        return self._snapshot
 
     def check_in_yarn(self, job_name):
         """
         Check in YARN list of Jobs with Job name provided and return latest application
         """
-        url = 'http://%s:%s%s' % (self.yarn_host, self.yarn_port, '/ws/v1/cluster/apps')
-        run_app_info = None
-        yarn_list = requests.get(url, timeout=self.rest_api_req_timeout)
-        yarn_list = json.loads(yarn_list.text)
-        if yarn_list['apps'] != None:
-            for app in yarn_list['apps']['app']:
-                if job_name == app['name']:
-                    if run_app_info is None or self._get_yarn_start_time(app) > self._get_yarn_start_time(run_app_info):
-                        run_app_info = app
-
-        return run_app_info
+        yarn_apps = self._snapshot
+        if yarn_apps is None:
+            yarn_apps = self.get_yarn_applications(names=set([job_name]))
+        return yarn_apps.get(job_name)
 
     def yarn_info(self, app_id):
         """
@@ -0,0 +1,91 @@
+"""
+Name:       record_cache.py
+Purpose:    Bounded in-memory cache for records read from the registrars
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_SIZE = 1000
+DEFAULT_CACHE_TTL = 60
+
+
+class RecordCache(object):
+    """
+    A thread safe LRU cache with a time to live on every entry.
+
+    Values are loaded on a miss by a caller supplied function. The owner is expected to call
+    invalidate() after every write it makes to the underlying store so it never reads back
+    its own stale data, the time to live only bounds how stale other writers can make it.
+    Entries never expire if the time to live is None, for values that cannot go stale such as
+    ones keyed by a content hash.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL):
+        assert max_size > 0
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        # bumped by every invalidation so a load that raced with a write is not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, loader):
+        """
+        :param key: the key to look up
+        :param loader: a function to call to load the value if it is not in the cache
+        :return: the cached or freshly loaded value, which may be None
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and (entry[1] is None or entry[1] > time.time()):
+                # re-insert to mark as most recently used
+                self._entries[key] = entry
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+
+        with self._lock:
+            if generation == self._generation:
+                expires = time.time() + self._ttl if self._ttl is not None else None
+                self._entries[key] = (value, expires)
+                while len(self._entries) > self._max_size:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
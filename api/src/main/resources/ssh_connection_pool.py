@@ -0,0 +1,181 @@
+"""
+Name:       ssh_connection_pool.py
+Purpose:    Keeps authenticated SSH connections open between commands, per host and user
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import logging
+import threading
+import time
+import Queue
+from contextlib import contextmanager
+
+import spur
+
+from exceptiondef import FailedConnection
+
+DEFAULT_SESSIONS_PER_HOST = 4
+DEFAULT_BORROW_TIMEOUT = 120
+DEFAULT_MAX_IDLE = 300
+
+
+class SshConnectionPool(object):
+    """
+    Hands out spur SSH shells to concurrent callers, keyed by host, user and key file.
+
+    A shell authenticates on its first command and keeps its connection open while it sits in
+    the pool, so a run of commands against the same host pays for one SSH handshake. Each key
+    has at most sessions_per_host shells, which also bounds the concurrent sessions per host.
+    """
+
+    def __init__(self, sessions_per_host=DEFAULT_SESSIONS_PER_HOST, timeout=DEFAULT_BORROW_TIMEOUT,
+                 max_idle=DEFAULT_MAX_IDLE):
+        """
+        :param sessions_per_host: the maximum number of connections held open to each host
+        :param timeout: seconds to wait for a free connection to a host before giving up
+        :param max_idle: connections idle for longer than this many seconds are re-opened before use,
+                         as sshd or a firewall may have dropped them in the meantime
+        """
+        assert sessions_per_host > 0
+        self._sessions_per_host = sessions_per_host
+        self._timeout = timeout
+        self._max_idle = max_idle
+        self._lock = threading.Lock()
+        self._queues = {}
+        # shells in use, by the ident of the thread that borrowed them
+        self._borrowed = {}
+
+    @contextmanager
+    def connection(self, host, user, key):
+        """
+        Borrows a shell for the duration of a with block:
+
+            with pool.connection(host, user, key) as shell:
+                shell.run(['bash', '-c', 'hostname'])
+
+        A shell is closed rather than returned to the pool if the block raises anything other than a
+        failed command, as a session broken mid-command may be left with a half read channel. The next
+        caller to borrow the slot reconnects. The error is still raised to the caller.
+        """
+        queue = self._queue(host, user, key)
+        try:
+            shell, last_used = queue.get(True, self._timeout)
+        except Queue.Empty:
+            logging.error("No SSH connection to %s available after %s seconds", host, self._timeout)
+            raise FailedConnection('Unable to connect to %s' % host)
+
+        borrowed = None
+        try:
+            shell = self._check_shell(shell, last_used, host, user, key)
+            borrowed = (host, shell)
+            with self._lock:
+                self._borrowed.setdefault(threading.current_thread().ident, []).append(borrowed)
+            yield shell
+        except spur.RunProcessError:
+            # the command failed, the connection is fine
+            raise
+        except Exception as exc:
+            logging.warning("SSH connection to %s failed, it will be re-opened: %s", host, str(exc))
+            self._close(shell)
+            shell = None
+            raise
+        finally:
+            if borrowed is not None:
+                self._forget(borrowed)
+            queue.put((shell, time.time()))
+
+    def close_borrowed(self, thread):
+        """
+        Closes the connections a thread has borrowed, so a command hung on a host fails
+        and the thread gives its slots back to the pool when it leaves its with blocks
+        :param thread: the threading.Thread that borrowed the connections
+        """
+        with self._lock:
+            borrowed = list(self._borrowed.get(thread.ident, []))
+        for host, shell in borrowed:
+            logging.warning("Closing SSH connection to %s held by %s", host, thread.name)
+            self._close(shell)
+
+    def _forget(self, borrowed):
+        ident = threading.current_thread().ident
+        with self._lock:
+            in_use = self._borrowed[ident]
+            in_use.remove(borrowed)
+            if not in_use:
+                del self._borrowed[ident]
+
+    def close(self):
+        """
+        Closes every idle connection, connections in use are closed when they are next borrowed
+        """
+        with self._lock:
+            queues = self._queues.values()
+        for queue in queues:
+            slots = []
+            while True:
+                try:
+                    slots.append(queue.get_nowait())
+                except Queue.Empty:
+                    break
+            for shell, _ in slots:
+                self._close(shell)
+                queue.put((None, 0))
+
+    def _queue(self, host, user, key):
+        with self._lock:
+            queue = self._queues.get((host, user, key))
+            if queue is None:
+                queue = Queue.LifoQueue(maxsize=self._sessions_per_host)
+                for _ in range(self._sessions_per_host):
+                    # empty slots, connected on first use
+                    queue.put((None, 0))
+                self._queues[(host, user, key)] = queue
+            return queue
+
+    def _check_shell(self, shell, last_used, host, user, key):
+        if shell is not None and (time.time() - last_used > self._max_idle or not self._is_active(shell)):
+            logging.debug("Re-opening SSH connection to %s", host)
+            self._close(shell)
+            shell = None
+        if shell is None:
+            logging.debug("Opening SSH connection to %s@%s", user, host)
+            shell = spur.SshShell(
+                hostname=host,
+                username=user,
+                private_key_file=key,
+                missing_host_key=spur.ssh.MissingHostKey.accept)
+        return shell
+
+    def _is_active(self, shell):
+        # spur connects on first use and does not expose the connection, so look at its client
+        # pylint: disable=protected-access
+        client = getattr(shell, '_client', None)
+        if client is None:
+            return True
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def _close(self, shell):
+        if shell is None:
+            return
+        try:
+            # spur shells are closed by leaving their with block
+            shell.__exit__(None, None, None)
+        except Exception as exc:
+            logging.debug("Error closing SSH connection: %s", str(exc))
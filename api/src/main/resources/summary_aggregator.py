@@ -1,9 +1,9 @@
 class ComponentSummaryAggregator(object):
-    def get_application_summary(self, app_name, component_details):
+    def get_application_summary(self, app_name, component_details, context):
         (ret_data, comp_data) = ({}, {})
         for _, component_data in component_details.iteritems():
             comp_data.update(component_data['component_ref'].get_components_summary(app_name, \
-                component_data['component_data']))
+                component_data['component_data'], context))
         ret_data[app_name] = comp_data
         ret_data[app_name].update({'aggregate_status': self.process_application_data(comp_data)})
         return ret_data
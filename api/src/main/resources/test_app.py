@@ -0,0 +1,68 @@
+"""
+Name:       test_app.py
+Purpose:    Unit tests for the REST handlers of the deployment manager
+            Run with main(), the easiest way is "nosetests test_*.py"
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import json
+from mock import patch, Mock
+from tornado.ioloop import IOLoop
+from tornado.testing import AsyncHTTPTestCase
+import happybase  # pylint: disable=unused-import
+import app
+
+
+class ApplicationsHandlerTests(AsyncHTTPTestCase):
+    def get_app(self):
+        return app.Application()
+
+    def get_new_ioloop(self):
+        # the handlers finish their requests through IOLoop.instance()
+        return IOLoop.instance()
+
+    def _get(self, url, dm_mock):
+        with patch('app.dm', dm_mock):
+            response = self.fetch(url)
+        self.assertEqual(response.code, 200)
+        return json.loads(response.body)
+
+    def test_list_applications_by_status(self):
+        dm_mock = Mock()
+        dm_mock.list_applications.return_value = ['app1']
+
+        self.assertEqual(self._get('/applications?user.name=u&status=STARTED&owner=o', dm_mock), ['app1'])
+        dm_mock.list_applications.assert_called_once_with('u', status='STARTED', owner='o')
+        dm_mock.list_application_statuses.assert_not_called()
+
+    def test_list_application_statuses_by_status(self):
+        dm_mock = Mock()
+        dm_mock.list_application_statuses.return_value = [{'name': 'app1', 'status': 'STARTED'}]
+
+        # the detailed listing can be filtered on status like the list of names
+        self.assertEqual(self._get('/applications?user.name=u&detail=true&status=STARTED&limit=5', dm_mock),
+                         [{'name': 'app1', 'status': 'STARTED'}])
+        dm_mock.list_application_statuses.assert_called_once_with('u', status='STARTED', limit=5)
+        dm_mock.list_applications.assert_not_called()
+
+        # and status=true is a status filter like any other value
+        dm_mock = Mock()
+        dm_mock.list_applications.return_value = []
+        self._get('/applications?user.name=u&status=true', dm_mock)
+        dm_mock.list_applications.assert_called_once_with('u', status='true')
@@ -21,12 +21,18 @@ License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 either express or implied.
 """
 
+import os
+import json
+import shutil
+import tarfile
+import tempfile
 import unittest
 import getpass
+import StringIO
 from datetime import datetime
 from mock import patch, mock_open, Mock
 from application_creator import ApplicationCreator
-from exceptiondef import FailedValidation, FailedCreation
+from exceptiondef import FailedValidation, FailedCreation, FailedComponents
 
 class ApplicationCreatorTests(unittest.TestCase):
 
@@ -168,7 +174,8 @@ class ApplicationCreatorTests(unittest.TestCase):
     @patch('starbase.Connection')
     @patch('pyhs2.connect')
     @patch('datetime.datetime')
-    @patch('os.system')
+    @patch('deployer_utils.list_files')
+    @patch('deployer_utils.sftp_put')
     @patch('deployer_utils.exec_ssh')
     @patch('requests.put')
     @patch('requests.post')
@@ -183,7 +190,7 @@ class ApplicationCreatorTests(unittest.TestCase):
     # pylint: disable=unused-argument
     def test_create_application(self, cmd_mock, dist_mock, copy_mock, tar_mock, os_mock, shutil_mock, spur_ssh,
                                 hdfs_client_mock, post_mock, put_mock, exec_ssh_mock,
-                                os_sys_mock, dt_mock, hive_mock, hbase_mock):
+                                sftp_mock, list_files_mock, dt_mock, hive_mock, hbase_mock):
         dt_mock.utcnow.return_value = (datetime(2013, 01, 01))
 
         class Resp(object):
@@ -195,6 +202,7 @@ class ApplicationCreatorTests(unittest.TestCase):
         post_mock.return_value = Resp()
         dist_mock.return_value = 'redhat'
         cmd_mock.return_value = (0, 'dev')
+        list_files_mock.return_value = ([], [('staged', 'remote')])
         with patch("__builtin__.open", mock_open(read_data="[]")):
             creator = ApplicationCreator(self.config, self.environment, self.service)
             print self.property_overrides
@@ -207,6 +215,11 @@ class ApplicationCreatorTests(unittest.TestCase):
         put_mock.assert_any_call('oozie/v1/job/someid?action=suspend&user.name=root')
 
         exec_ssh_mock.assert_any_call('localhost', 'root_user', 'keyfile.pem', ['mkdir -p /tmp/ns/aname/componentC', 'sudo mkdir -p /opt/ns/aname/componentC'])
+        sftp_mock.assert_any_call('localhost', 'root_user', 'keyfile.pem', list_files_mock.return_value[1])
+        node_copies = dict((call[0][0], call[0][3]) for call in sftp_mock.call_args_list if call[0][0] != 'localhost')
+        self.assertEqual(sorted(node_copies), ['nm1', 'nm2'])
+        self.assertTrue(node_copies['nm1'][0][0].endswith('/test_package-1.0.2/sparkStreaming/componentC/log4j.properties'))
+        self.assertEqual(node_copies['nm1'][0][1], '/tmp/ns/aname/componentC/log4j.properties')
         exec_ssh_mock.assert_any_call('nm1', 'root_user', 'keyfile.pem', ['mkdir -p /tmp/ns/aname/componentC'])
         exec_ssh_mock.assert_any_call('nm1', 'root_user', 'keyfile.pem', ['sudo mkdir -p /opt/ns/aname/componentC', 'sudo mv /tmp/ns/aname/componentC/log4j.properties /opt/ns/aname/componentC/log4j.properties'])
         exec_ssh_mock.assert_any_call('nm2', 'root_user', 'keyfile.pem', ['mkdir -p /tmp/ns/aname/componentC'])
@@ -216,7 +229,8 @@ class ApplicationCreatorTests(unittest.TestCase):
     @patch('starbase.Connection')
     @patch('pyhs2.connect')
     @patch('datetime.datetime')
-    @patch('os.system')
+    @patch('deployer_utils.list_files')
+    @patch('deployer_utils.sftp_put')
     @patch('deployer_utils.exec_ssh')
     @patch('requests.put')
     @patch('requests.post')
@@ -229,7 +243,7 @@ class ApplicationCreatorTests(unittest.TestCase):
     # pylint: disable=unused-argument
     def test_fail_create_application(self, cmd_mock, tar_mock, os_mock, shutil_mock, spur_ssh,
                                      hdfs_client_mock, post_mock, put_mock, exec_ssh_mock,
-                                     os_sys_mock, dt_mock, hive_mock, hbase_mock):
+                                     sftp_mock, list_files_mock, dt_mock, hive_mock, hbase_mock):
         dt_mock.utcnow.return_value = (datetime(2013, 01, 01))
 
         class Resp(object):
@@ -257,6 +271,7 @@ class ApplicationCreatorTests(unittest.TestCase):
 
         post_mock.return_value = Resp()
         cmd_mock.return_value = (0, 'dev')
+        list_files_mock.return_value = ([], [('staged', 'remote')])
         with patch("__builtin__.open", mock_open(read_data="[]")):
             creator = ApplicationCreator(self.config, self.environment, self.service)
             self.assertRaises(FailedValidation, creator.assert_application_properties, override_properties, default_properties)
@@ -265,7 +280,8 @@ class ApplicationCreatorTests(unittest.TestCase):
     @patch('starbase.Connection')
     @patch('pyhs2.connect')
     @patch('datetime.datetime')
-    @patch('os.system')
+    @patch('deployer_utils.list_files')
+    @patch('deployer_utils.sftp_put')
     @patch('deployer_utils.exec_ssh')
     @patch('requests.put')
     @patch('requests.post')
@@ -278,7 +294,7 @@ class ApplicationCreatorTests(unittest.TestCase):
     # pylint: disable=unused-argument
     def test_user_name_fail(self, cmd_mock, tar_mock, os_mock, shutil_mock, spur_ssh,
                             hdfs_client_mock, post_mock, put_mock, exec_ssh_mock,
-                            os_sys_mock, dt_mock, hive_mock, hbase_mock):
+                            sftp_mock, list_files_mock, dt_mock, hive_mock, hbase_mock):
 
         class Resp(object):
             status_code = 201
@@ -288,6 +304,7 @@ class ApplicationCreatorTests(unittest.TestCase):
 
         post_mock.return_value = Resp()
         cmd_mock.return_value = (0, 'dev')
+        list_files_mock.return_value = ([], [('staged', 'remote')])
 
         with patch("__builtin__.open", mock_open(read_data="[]")):
             creator = ApplicationCreator(self.config, self.environment, self.service)
@@ -300,7 +317,8 @@ class ApplicationCreatorTests(unittest.TestCase):
     @patch('starbase.Connection')
     @patch('pyhs2.connect')
     @patch('datetime.datetime')
-    @patch('os.system')
+    @patch('deployer_utils.list_files')
+    @patch('deployer_utils.sftp_put')
     @patch('deployer_utils.exec_ssh')
     @patch('requests.put')
     @patch('requests.post')
@@ -313,7 +331,7 @@ class ApplicationCreatorTests(unittest.TestCase):
     # pylint: disable=unused-argument
     def test_app_name_fail(self, cmd_mock, tar_mock, os_mock, shutil_mock, spur_ssh,
                            hdfs_client_mock, post_mock, put_mock, exec_ssh_mock,
-                           os_sys_mock, dt_mock, hive_mock, hbase_mock):
+                           sftp_mock, list_files_mock, dt_mock, hive_mock, hbase_mock):
 
         class Resp(object):
             status_code = 201
@@ -323,6 +341,7 @@ class ApplicationCreatorTests(unittest.TestCase):
 
         post_mock.return_value = Resp()
         cmd_mock.return_value = (0, 'dev')
+        list_files_mock.return_value = ([], [('staged', 'remote')])
 
         with patch("__builtin__.open", mock_open(read_data="[]")):
             creator = ApplicationCreator(self.config, self.environment, self.service)
@@ -335,7 +354,8 @@ class ApplicationCreatorTests(unittest.TestCase):
     @patch('starbase.Connection')
     @patch('pyhs2.connect')
     @patch('datetime.datetime')
-    @patch('os.system')
+    @patch('deployer_utils.list_files')
+    @patch('deployer_utils.sftp_put')
     @patch('deployer_utils.exec_ssh')
     @patch('requests.put')
     @patch('requests.post')
@@ -349,7 +369,7 @@ class ApplicationCreatorTests(unittest.TestCase):
     # pylint: disable=unused-argument
     def test_app_name_ok(self, cmd_mock, copy_mock, tar_mock, os_mock, shutil_mock, spur_ssh,
                          hdfs_client_mock, post_mock, put_mock, exec_ssh_mock,
-                         os_sys_mock, dt_mock, hive_mock, hbase_mock):
+                         sftp_mock, list_files_mock, dt_mock, hive_mock, hbase_mock):
 
         class Resp(object):
             status_code = 201
@@ -359,6 +379,7 @@ class ApplicationCreatorTests(unittest.TestCase):
 
         post_mock.return_value = Resp()
         cmd_mock.return_value = (0, 'dev')
+        list_files_mock.return_value = ([], [('staged', 'remote')])
 
         with patch("__builtin__.open", mock_open(read_data="[]")):
             creator = ApplicationCreator(self.config, self.environment, self.service)
@@ -384,6 +405,64 @@ class ApplicationCreatorTests(unittest.TestCase):
         put_mock.assert_any_call('oozie/v1/job/someid1?action=suspend&user.name='+self.user)
         put_mock.assert_any_call('oozie/v1/job/someid2?action=suspend&user.name='+self.user)
 
+    @patch('deployer_utils.exec_ssh')
+    @patch('requests.put')
+    def test_start_application_partial_failure(self, put_mock, exec_ssh_mock):
+        exec_ssh_mock.side_effect = Exception('ssh failed')
+        creator = ApplicationCreator(self.config, self.environment, self.service)
+        try:
+            creator.start_application('name', self.create_data)
+            self.fail('Expected FailedComponents exception')
+        except FailedComponents as ex:
+            self.assertEqual(ex.msg, {'operation': 'start',
+                                      'succeeded': ['oozie/componentA', 'oozie/componentB'],
+                                      'failed': {'sparkStreaming/componentC': 'Exception: ssh failed'}})
+        # every component is tried even though one failed
+        put_mock.assert_any_call('oozie/v1/job/someid1?action=start&user.name='+self.user)
+        put_mock.assert_any_call('oozie/v1/job/someid2?action=start&user.name='+self.user)
+
+    def test_stage_package_directory_attributes(self):
+        stage_root = tempfile.mkdtemp()
+        try:
+            package_path = os.path.join(stage_root, 'package.tar.gz')
+            tar = tarfile.open(package_path, 'w:gz')
+            directory = tarfile.TarInfo('package/lib')
+            directory.type = tarfile.DIRTYPE
+            directory.mode = 0o555
+            directory.mtime = 1000000000
+            tar.addfile(directory)
+            member = tarfile.TarInfo('package/lib/job.jar')
+            member.size = 3
+            tar.addfile(member, StringIO.StringIO('jar'))
+            tar.close()
+
+            creator = ApplicationCreator(dict(self.config, stage_root=stage_root), self.environment, self.service)
+            # pylint: disable=protected-access
+            stage_path = creator._stage_package(package_path)
+
+            # the read only directory is filled first, then given its mode and time from the package
+            with open(os.path.join(stage_path, 'package/lib/job.jar')) as staged:
+                self.assertEqual(staged.read(), 'jar')
+            status = os.stat(os.path.join(stage_path, 'package/lib'))
+            self.assertEqual(status.st_mode & 0o777, 0o555)
+            self.assertEqual(status.st_mtime, 1000000000)
+        finally:
+            for path, _, _ in os.walk(stage_root):
+                os.chmod(path, 0o755)
+            shutil.rmtree(stage_root)
+
+    def test_create_dependencies(self):
+        hbase_component = {'component_detail': {'hbase.json': {}}}
+        package_metadata = {'component_types': {
+            'sparkStreaming': {'componentD': hbase_component, 'componentC': hbase_component},
+            'oozie': {'componentB': hbase_component, 'componentA': {'component_detail': {}}}}}
+
+        creator = ApplicationCreator(self.config, self.environment, self.service)
+        # pylint: disable=protected-access
+        self.assertEqual(creator._create_dependencies(package_metadata), {
+            ('sparkStreaming', 'componentC'): [('oozie', 'componentB')],
+            ('sparkStreaming', 'componentD'): [('sparkStreaming', 'componentC')]})
+
     def test_validate_package(self):
         creator = ApplicationCreator(self.config, self.environment, self.service)
         result = {}
@@ -442,11 +521,39 @@ class ApplicationCreatorTests(unittest.TestCase):
         put_mock.assert_any_call('oozie/v1/job/someid1?action=kill&user.name='+self.user)
         put_mock.assert_any_call('oozie/v1/job/someid2?action=kill&user.name='+self.user)
 
+    @patch('application_creator.shutil')
+    @patch('application_creator.os')
+    @patch('application_creator.tarfile')
+    # pylint: disable=unused-argument
+    # pylint: disable=protected-access
+    def test_create_application_rollback(self, tar_mock, os_mock, shutil_mock):
+        def create(stage_path, application_name, user_name, component_name, component, overrides):
+            if component_name == 'componentB':
+                raise FailedCreation('oozie error!')
+            return {'component_name': component_name}
+
+        oozie_creator = Mock()
+        oozie_creator.create_named_component.side_effect = create
+        spark_creator = Mock()
+        spark_creator.create_named_component.side_effect = create
+        creator = ApplicationCreator(self.config, self.environment, self.service)
+        creator._component_creators = {'oozie': oozie_creator, 'sparkStreaming': spark_creator}
+
+        self.assertRaises(FailedCreation, creator.create_application, 'abcd', self.package_metadata, 'aname', self.property_overrides)
+
+        # componentB failed, whatever was created before it stopped the others is destroyed
+        destroyed = [call[0][1][0]['component_name'] for creator_mock in (oozie_creator, spark_creator)
+                     for call in creator_mock.destroy_components.call_args_list]
+        created = [call[0][3] for creator_mock in (oozie_creator, spark_creator)
+                   for call in creator_mock.create_named_component.call_args_list if call[0][3] != 'componentB']
+        self.assertEqual(sorted(destroyed), sorted(created))
+
     # pylint: disable=line-too-long
     @patch('requests.get')
     def test_get_runtime_details(self, get_mock):
         rm_call = Mock()
-        rm_call.json.return_value = {
+        rm_call.status_code = 200
+        rm_call.iter_content.return_value = [json.dumps({
             "apps": {
                 "app": [{
                     "id": "application_1455877292606_13009",
@@ -566,11 +673,17 @@ class ApplicationCreatorTests(unittest.TestCase):
                     "logAggregationStatus": "DISABLED"
                 }]
             }
-        }
+        })]
         get_mock.return_value = rm_call
+        # imported here as the creators are first loaded by the tests that patch deployer_utils.HDFS
+        from plugins.base_creator import YARN_APPLICATIONS
+        YARN_APPLICATIONS.clear()
 
-        creator = ApplicationCreator(self.config, self.environment, self.service)
+        environment = dict(self.environment, yarn_resource_manager_host='rmhost', yarn_resource_manager_port='8088')
+        creator = ApplicationCreator(self.config, environment, self.service)
         result = creator.get_application_runtime_details('name', self.create_data)
+        # one request for every component type
+        self.assertEqual(get_mock.call_count, 1)
         self.assertEqual(result, {"yarn_applications": {
             "oozie-componentA": {
                 "type": "oozie",
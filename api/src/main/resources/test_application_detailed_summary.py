@@ -1,10 +1,26 @@
 import json
+import time
 import unittest
 from multiprocessing import Event
 from mock import patch
 
 from application_detailed_summary import ApplicationDetailedSummary
 from application_summary_registrar import HBaseAppplicationSummary
+from application_registrar import HbaseApplicationRegistrar
+from plugins_summary.yarn_connection import YarnConnection
+
+class MockResponse(object):
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.text), chunk_size):
+            yield self.text[start:start + chunk_size]
+
+    def close(self):
+        pass
+
 
 class ApplicationDetailedSummaryTests(unittest.TestCase):
     def setUp(self):
@@ -24,9 +40,8 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
         # SparkStreaming CREATED status
         mock_hbase.return_value.table.return_value.row.side_effect = [
             {'cf:create_data': '{"sparkStreaming": [{"component_name": "example", \
-            "component_job_name": "app1-example-job"}]}'},
-            {'cf:status': 'CREATED'}]
-        mock_get_requests.return_value = type('obj', (object,), {
+            "component_job_name": "app1-example-job"}]}', 'cf:status': 'CREATED'}]
+        mock_get_requests.return_value = MockResponse(**{
             'status_code' : 200,
             'text': json.dumps({
                 "apps": {"app": []}})})
@@ -49,10 +64,9 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
         # SparkStreaming RUNNING status
         mock_hbase.return_value.table.return_value.row.side_effect = [
             {'cf:create_data': '{"sparkStreaming": [{"component_name": "example", \
-            "component_job_name": "app1-example-job"}]}'},
-            {'cf:status': 'STARTED'}]
+            "component_job_name": "app1-example-job"}]}', 'cf:status': 'STARTED'}]
         mock_get_requests.side_effect = [
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "apps": {
                     "app": [{
                         "name": "app1-example-job",
@@ -60,13 +74,13 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                         "state": "RUNNING",
                         "startedTime": 5,
                         'trackingUrl': u'xyz'}]}})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps([
+            MockResponse(**{'status_code' : 200, 'text': json.dumps([
                 {
                     'status': 'SUCCEEDED',
                     'stageIds': [
                         0,
                         1], 'jobId': 0}])}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps([
+            MockResponse(**{'status_code' : 200, 'text': json.dumps([
                 {
                     'status': 'COMPLETE',
                     'stageId': 1}, {
@@ -102,10 +116,9 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
         # SparkStreaming RUNNING_WITH_ERRORS status
         mock_hbase.return_value.table.return_value.row.side_effect = [
             {'cf:create_data': '{"sparkStreaming": [{"component_name": "example", \
-            "component_job_name": "app1-example-job"}]}'},
-            {'cf:status': 'STARTED'}]
+            "component_job_name": "app1-example-job"}]}', 'cf:status': 'STARTED'}]
         mock_get_requests.side_effect = [
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "apps": {
                     "app": [{
                         "name": "app1-example-job",
@@ -113,7 +126,7 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                         "state": "RUNNING",
                         "startedTime": 1512647193214,
                         'trackingUrl': u'xyz'}]}})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps([
+            MockResponse(**{'status_code' : 200, 'text': json.dumps([
                 {
                     'status': 'FAILED',
                     'stageIds': [
@@ -123,7 +136,7 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                             'stageIds': [
                                 0,
                                 1], 'jobId': 0}])}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps([{
+            MockResponse(**{'status_code' : 200, 'text': json.dumps([{
                 'status': 'FAILED',
                 'stageId': 3}, {
                     'status': 'FAILED',
@@ -162,10 +175,9 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
         # SparkStreaming KILLED status
         mock_hbase.return_value.table.return_value.row.side_effect = [
             {'cf:create_data': '{"sparkStreaming": [{"component_name": "example", \
-            "component_job_name": "app1-example-job"}]}'},
-            {'cf:status': 'CREATED'}]
+            "component_job_name": "app1-example-job"}]}', 'cf:status': 'CREATED'}]
         mock_get_requests.side_effect = [
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "apps": {
                     "app": [{
                         "name": "app1-example-job",
@@ -196,9 +208,8 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
         # Flink CREATED status
         mock_hbase.return_value.table.return_value.row.side_effect = [
             {'cf:create_data': '{"flink": [{"component_name": "example", \
-            "component_job_name": "app2-example-job"}]}'},
-            {'cf:status': 'CREATED'}]
-        mock_get_requests.return_value = type('obj', (object,), {
+            "component_job_name": "app2-example-job"}]}', 'cf:status': 'CREATED'}]
+        mock_get_requests.return_value = MockResponse(**{
             'status_code' : 200,
             'text': json.dumps({
                 "apps": {"app": []}})})
@@ -221,10 +232,9 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
         # Flink RUNNING status
         mock_hbase.return_value.table.return_value.row.side_effect = [
             {'cf:create_data': '{"flink": [{"component_name": "example", \
-            "component_job_name": "app2-example-job"}]}'},
-            {'cf:status': 'STARTED'}]
+            "component_job_name": "app2-example-job"}]}', 'cf:status': 'STARTED'}]
         mock_get_requests.side_effect = [
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "apps": {
                     "app": [{
                         "name": "app2-example-job",
@@ -232,9 +242,9 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                         "state": "RUNNING",
                         "startedTime": 5,
                         'trackingUrl': u'xyz'}]}})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'jobs-running': ['jhfi48y8rfuf3ci'], 'jobs-finished': []})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'jid': 'jhfi48y8rfuf3ci', 'vertices': [{
                     'name': 'vertice_name',
                     'status': 'RUNNING'}]})})]
@@ -259,10 +269,9 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
         # Flink RUNNING_WITH_ERRORS status
         mock_hbase.return_value.table.return_value.row.side_effect = [
             {'cf:create_data': '{"flink": [{"component_name": "example", \
-            "component_job_name": "app2-example-job"}]}'},
-            {'cf:status': 'STARTED'}]
+            "component_job_name": "app2-example-job"}]}', 'cf:status': 'STARTED'}]
         mock_get_requests.side_effect = [
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "apps": {
                     "app": [{
                         "name": "app2-example-job",
@@ -270,9 +279,9 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                         "state": "RUNNING",
                         "startedTime": 5,
                         'trackingUrl': u'xyz'}]}})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'jobs-running': ['jhfi48y8rfuf3ci'], 'jobs-finished': []})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'jid': 'jhfi48y8rfuf3ci', 'vertices': [{
                     'name': 'vertice_name',
                     'status': 'FAILED'}]})})]
@@ -297,11 +306,10 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
         # Flink FINISHED_SUCCEEDED state for job ran more than a minute
         mock_hbase.return_value.table.return_value.row.side_effect = [
             {'cf:create_data': '{"flink": [{"component_name": "example", \
-            "component_job_name": "app2-example-job"}]}'},
-            {'cf:status': 'CREATED'},
+            "component_job_name": "app2-example-job"}]}', 'cf:status': 'CREATED'},
             {'cf:component_data': '{"flink-1": {"tracking_url": "xyz/#/jobs/jhfi48y8rfuf3ci"}}'}]
         mock_get_requests.side_effect = [
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "apps": {
                     "app": [{
                         "name": "app2-example-job",
@@ -329,11 +337,10 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
         # Flink FINISHED_SUCCEEDED state for job less than a minute
         mock_hbase.return_value.table.return_value.row.side_effect = [
             {'cf:create_data': '{"flink": [{"component_name": "example", \
-            "component_job_name": "app2-example-job"}]}'},
-            {'cf:status': 'CREATED'},
+            "component_job_name": "app2-example-job"}]}', 'cf:status': 'CREATED'},
             {'cf:component_data': '{"flink-1": {"tracking_url": "xyz/#/jobs/jhfi48y8rfuf3ci"}}'}]
         mock_get_requests.side_effect = [
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "apps": {
                     "app": [{
                         "name": "app2-example-job",
@@ -361,11 +368,10 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
         # Flink FAILED state
         mock_hbase.return_value.table.return_value.row.side_effect = [
             {'cf:create_data': '{"flink": [{"component_name": "example", \
-            "component_job_name": "app2-example-job"}]}'},
-            {'cf:status': 'CREATED'},
+            "component_job_name": "app2-example-job"}]}', 'cf:status': 'CREATED'},
             {'cf:component_data': '{"flink-1": {"tracking_url": "xyz/#/jobs/jhfi48y8rfuf3ci"}}'}]
         mock_get_requests.side_effect = [
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "apps": {
                     "app": [{
                         "name": "app2-example-job",
@@ -397,7 +403,7 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
         # Oozie coordinator CREATED status
         mock_hbase.return_value.table.return_value.row.return_value = {'cf:create_data': \
         '{"oozie": [{"job_handle": "123-oozie-oozi-C"}]}'}
-        mock_get_requests.return_value = type('obj', (object,), {
+        mock_get_requests.return_value = MockResponse(**{
             'status_code' : 200,
             'text': json.dumps({
                 'coordJobId': '123-oozie-oozi-C',
@@ -422,7 +428,7 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
             'cf:create_data': '{"oozie": [{"job_handle": "123-oozie-oozi-C"}]}'
         }
         mock_get_requests.side_effect = [
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'status': 'RUNNING',
                 'coordJobId': '123-oozie-oozi-C',
                 'coordJobName': 'app3-coordinator',
@@ -430,7 +436,7 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                     'externalId': '123-oozie-oozi-W',
                     'type': None,
                     'status': 'OK'}]})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'status': 'SUCCEEDED',
                 'id': '123-oozie-oozi-W',
                 'appName': 'app3-workflow',
@@ -438,7 +444,7 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                     'externalId': '124-oozie-oozi-W',
                     'type': 'sub-workflow',
                     'status': 'OK'}]})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'status': 'SUCCEEDED',
                 'id': '124-oozie-oozi-W',
                 'appName': 'app3-subworkflow',
@@ -454,21 +460,21 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                     'type': 'spark',
                     'externalId': 'job_124',
                     'externalChildIDs': 'job_125'}]})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "app": {
                     "state": "FINISHED",
                     "finalStatus": "SUCCEEDED",
                     "startedTime": 5,
                     "diagnostics": "",
                     "applicationType": "MAPREDUCE"}})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "app": {
                     "state": "FINISHED",
                     "finalStatus": "SUCCEEDED",
                     "startedTime": 6,
                     "diagnostics": "",
                     "applicationType": "MAPREDUCE"}})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "app": {
                     "state": "FINISHED",
                     "finalStatus": "SUCCEEDED",
@@ -516,7 +522,7 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
         mock_hbase.return_value.table.return_value.row.return_value = {
             'cf:create_data': '{"oozie": [{"job_handle": "123-oozie-oozi-C"}]}'}
         mock_get_requests.side_effect = [
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'status': 'RUNNING',
                 'coordJobId': '123-oozie-oozi-C',
                 'coordJobName': 'app3-coordinator',
@@ -524,7 +530,7 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                     'externalId': '123-oozie-oozi-W',
                     'type': None,
                     'status': 'OK'}]})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'status': 'RUNNING',
                 'id': '123-oozie-oozi-W',
                 'appName': 'app3-workflow',
@@ -532,7 +538,7 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                     'externalId': '124-oozie-oozi-W',
                     'type': 'sub-workflow',
                     'status': 'OK'}]})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'status': 'RUNNING',
                 'id': '124-oozie-oozi-W',
                 'appName': 'app3-subworkflow',
@@ -548,14 +554,14 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                         'externalId': 'job_124',
                         'externalChildIDs': None,
                         'errorMessage': 'Pre-Launcher error'}]})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "app": {
                     "state": "FINISHED",
                     "finalStatus": "SUCCEEDED",
                     "startedTime": 5,
                     "diagnostics": "",
                     "applicationType": "MAPREDUCE"}})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "app": {
                     "state": "FAILED",
                     "finalStatus": "FAILED",
@@ -603,7 +609,7 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
         mock_hbase.return_value.table.return_value.row.return_value = {
             'cf:create_data': '{"oozie": [{"job_handle": "123-oozie-oozi-C"}]}'}
         mock_get_requests.side_effect = [
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'status': 'SUSPENDED',
                 'coordJobId': '123-oozie-oozi-C',
                 'coordJobName': 'app3-coordinator',
@@ -611,7 +617,7 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                     'externalId': '123-oozie-oozi-W',
                     'type': None,
                     'status': 'OK'}]})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'status': 'SUCCEEDED',
                 'id': '123-oozie-oozi-W',
                 'appName': 'app3-workflow',
@@ -619,7 +625,7 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                     'externalId': '124-oozie-oozi-W',
                     'type': 'sub-workflow',
                     'status': 'OK'}]})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'status': 'SUCCEEDED',
                 'id': '124-oozie-oozi-W',
                 'appName': 'app3-subworkflow',
@@ -634,21 +640,21 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                         'type': 'spark',
                         'externalId': 'job_124',
                         'externalChildIDs': 'job_125'}]})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "app": {
                     "state": "FINISHED",
                     "finalStatus": "SUCCEEDED",
                     "startedTime": 5,
                     "diagnostics": "",
                     "applicationType": "MAPREDUCE"}})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "app": {
                     "state": "FINISHED",
                     "finalStatus": "SUCCEEDED",
                     "startedTime": 6,
                     "diagnostics": "",
                     "applicationType": "MAPREDUCE"}})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "app": {
                     "state": "FINISHED",
                     "finalStatus": "SUCCEEDED",
@@ -696,7 +702,7 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
         mock_hbase.return_value.table.return_value.row.return_value = {
             'cf:create_data': '{"oozie": [{"job_handle": "123-oozie-oozi-C"}]}'}
         mock_get_requests.side_effect = [
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'status': 'DONEWITHERROR',
                 'id': '123-oozie-oozi-W',
                 'appName': 'app4-workflow',
@@ -704,7 +710,7 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                     'externalId': '124-oozie-oozi-W',
                     'type': 'sub-workflow',
                     'status': 'OK'}]})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'status': 'FAILED',
                 'id': '124-oozie-oozi-W',
                 'appName': 'app4-subworkflow',
@@ -715,7 +721,7 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
                     'externalId': 'job_123',
                     'externalChildIDs': 'None',
                     'errorMessage': 'Pre-Launcher error'}]})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "app": {
                     "state": "FAILED",
                     "finalStatus": "FAILED",
@@ -758,10 +764,9 @@ class ApplicationDetailedSummaryTests(unittest.TestCase):
         # Testing check_in_service_log
         mock_hbase.return_value.table.return_value.row.side_effect = [
             {'cf:create_data': '{"sparkStreaming": [{"component_name": "example", \
-            "component_job_name": "app5-example-job"}]}'},
-            {'cf:status': 'STARTED'}
+            "component_job_name": "app5-example-job"}]}', 'cf:status': 'STARTED'}
         ]
-        mock_get_requests.return_value = type('obj', (object,), {
+        mock_get_requests.return_value = MockResponse(**{
             'status_code' : 200,
             'text': json.dumps({
                 "apps": {
@@ -792,11 +797,10 @@ execute "journalctl -u platform-app-app5-example"',
         mock_hbase.return_value.table.return_value.row.side_effect = [
             {'cf:create_data': '{"flink": [{"component_name": "example1", \
             "component_job_name": "app6-example1-job"}], "sparkStreaming": [{"component_name": "example2", \
-            "component_job_name": "app6-example2-job"}]}'},
-            {'cf:status': ('STARTED', 1)},
+            "component_job_name": "app6-example2-job"}]}', 'cf:status': ('STARTED', 1)},
             {'cf:status': ('STARTED', 1)}]
         mock_get_requests.side_effect = [
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "apps": {
                     "app": [{
                         "name": "app6-example1-job",
@@ -804,13 +808,13 @@ execute "journalctl -u platform-app-app5-example"',
                         "state": "RUNNING",
                         "startedTime": 5,
                         'trackingUrl': u'xyz'}]}})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'jobs-running': ['jhfi48y8rfuf3ci'], 'jobs-finished': []})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'jid': 'jhfi48y8rfuf3ci', 'vertices': [{
                     'name': 'vertice_name',
                     'status': 'FAILED'}]})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "apps": {
                     "app": [{
                         "name": "app6-example2-job",
@@ -818,13 +822,13 @@ execute "journalctl -u platform-app-app5-example"',
                         "state": "RUNNING",
                         "startedTime": 5,
                         'trackingUrl': u'xyz'}]}})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps([
+            MockResponse(**{'status_code' : 200, 'text': json.dumps([
                 {
                     'status': 'SUCCEEDED',
                     'stageIds': [
                         0,
                         1], 'jobId': 0}])}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps([
+            MockResponse(**{'status_code' : 200, 'text': json.dumps([
                 {
                     'status': 'COMPLETE',
                     'stageId': 1}, {
@@ -873,11 +877,10 @@ execute "journalctl -u platform-app-app5-example"',
 
         mock_hbase.return_value.table.return_value.row.side_effect = [
             {'cf:create_data': '{"flink": [{"component_name": "example", \
-            "component_job_name": "app6-example-job"}], "oozie": [{"job_handle": "123-oozie-oozi-C"}]}'},
-            {'cf:status': ('STARTED', 1)},
+            "component_job_name": "app6-example-job"}], "oozie": [{"job_handle": "123-oozie-oozi-C"}]}', 'cf:status': ('STARTED', 1)},
             {'cf:component_data': '{"flink-1": {"tracking_url": "xyz/#/jobs/jhfi48y8rfuf3ci"}}'}]
         mock_get_requests.side_effect = [
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "apps": {
                     "app": [{
                         "name": "app6-example-job",
@@ -887,7 +890,7 @@ execute "journalctl -u platform-app-app5-example"',
                         "startedTime": 5,
                         "diagnostics": "Failed Reason",
                         'tracking_url': u'xyz'}]}})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'status': 'RUNNING',
                 'id': '123-oozie-oozi-W',
                 'appName': 'app6-workflow',
@@ -895,7 +898,7 @@ execute "journalctl -u platform-app-app5-example"',
                     'externalId': '124-oozie-oozi-W',
                     'type': 'sub-workflow',
                     'status': 'OK'}]})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 'status': 'RUNNING',
                 'id': '124-oozie-oozi-W',
                 'appName': 'app6-subworkflow',
@@ -905,14 +908,14 @@ execute "journalctl -u platform-app-app5-example"',
                     'type': 'spark',
                     'externalId': 'job_123',
                     'externalChildIDs': 'job_124'}]})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "app": {
                     "state": "RUNNING",
                     "finalStatus": "UNDEFINED",
                     "startedTime": 6,
                     "diagnostics": "",
                     "applicationType": "MAPREDUCE"}})}),
-            type('obj', (object,), {'status_code' : 200, 'text': json.dumps({
+            MockResponse(**{'status_code' : 200, 'text': json.dumps({
                 "app": {
                     "state": "RUNNING",
                     "finalStatus": "UNDEFINED",
@@ -951,3 +954,186 @@ execute "journalctl -u platform-app-app5-example"',
                                     'yarnId': u'application_124'}},
                             'name': u'app6-subworkflow'}},
                     'name': u'app6-workflow'}}}, "app6")
+
+    @patch.object(HBaseAppplicationSummary, 'sync_with_dm')
+    @patch.object(HBaseAppplicationSummary, 'post_to_hbase')
+    @patch.object(HbaseApplicationRegistrar, 'get_create_data_and_status')
+    @patch.object(HbaseApplicationRegistrar, 'list_applications')
+    @patch('requests.get')
+    @patch('happybase.Connection')
+    def test_generate_shares_yarn_applications(self, mock_hbase, mock_get_requests, mock_list, mock_create_data,
+                                               mock_summary_registrar, mock_sync):
+        mock_list.return_value = ['app1', 'app2']
+        mock_create_data.side_effect = lambda application: ({
+            'sparkStreaming': [{'component_name': 'example', 'component_job_name': '%s-example-job' % application}]},
+                                                            'CREATED')
+        mock_get_requests.return_value = MockResponse(**{
+            'status_code' : 200,
+            'text': json.dumps({"apps": {"app": []}})})
+
+        app_summary = ApplicationDetailedSummary(self.mock_environment, self.mock_config)
+        app_summary.generate()
+
+        # the resource manager is asked for its applications once for both applications
+        self.assertEqual(mock_get_requests.call_count, 1)
+        self.assertEqual(mock_summary_registrar.call_count, 2)
+        mock_sync.assert_called_once_with(['app1', 'app2'])
+
+    @patch('commands.getoutput')
+    @patch.object(HBaseAppplicationSummary, 'sync_with_dm')
+    @patch.object(HBaseAppplicationSummary, 'post_to_hbase')
+    @patch.object(HbaseApplicationRegistrar, 'get_create_data_and_status')
+    @patch.object(HbaseApplicationRegistrar, 'list_applications')
+    @patch('requests.get')
+    @patch('happybase.Connection')
+    def test_generate_skips_settled_applications(self, mock_hbase, mock_get_requests, mock_list, mock_create_data,
+                                                 mock_summary_registrar, mock_sync, mock_command_out):
+        mock_command_out.return_value = ''
+        mock_list.return_value = ['app1']
+        create_data = {'sparkStreaming': [{'component_name': 'example', 'component_job_name': 'app1-example-job'}]}
+        mock_create_data.return_value = (create_data, 'CREATED')
+        mock_get_requests.return_value = MockResponse(**{
+            'status_code' : 200,
+            'text': json.dumps({"apps": {"app": []}})})
+
+        app_summary = ApplicationDetailedSummary(self.mock_environment, self.mock_config)
+        app_summary.generate()
+        app_summary.generate()
+        # CREATED with nothing in YARN is settled, so the second pass posts nothing
+        self.assertEqual(mock_summary_registrar.call_count, 1)
+
+        mock_create_data.return_value = (create_data, 'STARTED')
+        app_summary.generate()
+        self.assertEqual(mock_summary_registrar.call_count, 2)
+
+        # unchanged applications are still refreshed on the slow cadence
+        app_summary._refresh_interval = 0
+        app_summary.generate()
+        self.assertEqual(mock_summary_registrar.call_count, 3)
+
+    @patch('commands.getoutput')
+    @patch.object(HBaseAppplicationSummary, 'flush')
+    @patch.object(HBaseAppplicationSummary, 'sync_with_dm')
+    @patch.object(HBaseAppplicationSummary, 'post_to_hbase')
+    @patch.object(HbaseApplicationRegistrar, 'get_create_data_and_status')
+    @patch.object(HbaseApplicationRegistrar, 'list_applications')
+    @patch('requests.get')
+    @patch('happybase.Connection')
+    def test_generate_retries_unwritten_summaries(self, mock_hbase, mock_get_requests, mock_list, mock_create_data,
+                                                  mock_summary_registrar, mock_sync, mock_flush, mock_command_out):
+        mock_command_out.return_value = ''
+        mock_list.return_value = ['app1']
+        create_data = {'sparkStreaming': [{'component_name': 'example', 'component_job_name': 'app1-example-job'}]}
+        mock_create_data.return_value = (create_data, 'CREATED')
+        mock_get_requests.return_value = MockResponse(**{
+            'status_code' : 200,
+            'text': json.dumps({"apps": {"app": []}})})
+        mock_flush.side_effect = [['app1'], [], []]
+
+        app_summary = ApplicationDetailedSummary(self.mock_environment, self.mock_config)
+        app_summary.generate()
+        # the settled summary was not written, so it is summarised again
+        app_summary.generate()
+        self.assertEqual(mock_summary_registrar.call_count, 2)
+        app_summary.generate()
+        self.assertEqual(mock_summary_registrar.call_count, 2)
+
+    @patch.object(HBaseAppplicationSummary, 'sync_with_dm')
+    @patch.object(HBaseAppplicationSummary, 'post_to_hbase')
+    @patch.object(HbaseApplicationRegistrar, 'get_create_data_and_status')
+    @patch.object(HbaseApplicationRegistrar, 'list_applications')
+    @patch('requests.get')
+    @patch('happybase.Connection')
+    def test_generate_cancels_overdue_applications(self, mock_hbase, mock_get_requests, mock_list, mock_create_data,
+                                                   mock_summary_registrar, mock_sync):
+        release = Event()
+        calls = []
+
+        def get_create_data(application):
+            calls.append(application)
+            if application == 'slow':
+                release.wait(5)
+            return {'jupyter': [{'component_name': 'notebook'}]}, 'CREATED'
+        mock_list.return_value = ['slow', 'fast']
+        mock_create_data.side_effect = get_create_data
+        mock_get_requests.return_value = MockResponse(**{
+            'status_code' : 200,
+            'text': json.dumps({"apps": {"app": []}})})
+
+        app_summary = ApplicationDetailedSummary(self.mock_environment, {'app_summary_timeout': 0.2})
+        app_summary.generate()
+        mock_summary_registrar.assert_called_once_with({'fast': {'aggregate_status': 'NOT_FOUND', 'jupyter-1': {}}}, 'fast')
+
+        # the slow summary is still running, so it is not started a second time
+        app_summary.generate()
+        self.assertEqual(calls.count('slow'), 1)
+        self.assertEqual(calls.count('fast'), 2)
+
+        # once it finishes its result is thrown away
+        release.set()
+        time.sleep(0.2)
+        self.assertFalse([call for call in mock_summary_registrar.call_args_list if call[0][1] == 'slow'])
+
+    @patch.object(HBaseAppplicationSummary, 'sync_with_dm')
+    @patch.object(HBaseAppplicationSummary, 'post_to_hbase')
+    @patch.object(HbaseApplicationRegistrar, 'get_create_data_and_status')
+    @patch.object(HbaseApplicationRegistrar, 'list_applications')
+    @patch('requests.get')
+    @patch('happybase.Connection')
+    def test_generate_abandons_queued_applications(self, mock_hbase, mock_get_requests, mock_list, mock_create_data,
+                                                   mock_summary_registrar, mock_sync):
+        release = Event()
+        calls = []
+
+        def get_create_data(application):
+            calls.append(application)
+            if application == 'slow':
+                release.wait(5)
+            return {'jupyter': [{'component_name': 'notebook'}]}, 'CREATED'
+        mock_list.return_value = ['slow', 'queued']
+        mock_create_data.side_effect = get_create_data
+        mock_get_requests.return_value = MockResponse(**{
+            'status_code' : 200,
+            'text': json.dumps({"apps": {"app": []}})})
+
+        # the only worker is held by the slow summary, so the queued one never starts during the pass
+        app_summary = ApplicationDetailedSummary(self.mock_environment, {'app_summary_timeout': 0.2,
+                                                                         'summary_threads': 1})
+        start = time.time()
+        app_summary.generate()
+        self.assertLess(time.time() - start, 2)
+
+        # once the worker is free the abandoned summary is not started
+        release.set()
+        time.sleep(0.2)
+        self.assertEqual(calls, ['slow'])
+        mock_summary_registrar.assert_not_called()
+
+    @patch('time.time')
+    @patch('requests.get')
+    def test_refresh_snapshot(self, mock_get_requests, mock_time):
+        def response(apps):
+            return MockResponse(status_code=200, text=json.dumps({"apps": {"app": apps}}))
+        mock_time.return_value = 1000
+        mock_get_requests.side_effect = [
+            response([{'name': 'job1', 'id': 'application_1', 'state': 'RUNNING', 'startedTime': 1},
+                      {'name': 'job2', 'id': 'application_2', 'state': 'RUNNING', 'startedTime': 2}]),
+            # running now
+            response([{'name': 'job3', 'id': 'application_3', 'state': 'RUNNING', 'startedTime': 3}]),
+            # finished since the last refresh
+            response([{'name': 'job1', 'id': 'application_1', 'state': 'FINISHED', 'startedTime': 1}])]
+
+        self.mock_environment['rest_api_req_timeout'] = 5
+        yarn_connection = YarnConnection(self.mock_environment)
+        yarn_connection.refresh_snapshot()
+        self.assertEqual(mock_get_requests.call_args[1]['params'], {})
+
+        mock_time.return_value = 1030
+        yarn_connection.refresh_snapshot()
+        self.assertEqual(mock_get_requests.call_args_list[1][1]['params'],
+                         {'states': 'NEW,NEW_SAVING,SUBMITTED,ACCEPTED,RUNNING'})
+        self.assertEqual(mock_get_requests.call_args_list[2][1]['params'], {'finishedTimeBegin': 940000})
+        self.assertEqual(yarn_connection.check_in_yarn('job1')['state'], 'FINISHED')
+        # job2 is neither running nor recently finished, it was killed before the overlap or evicted
+        self.assertEqual(yarn_connection.check_in_yarn('job2'), None)
+        self.assertEqual(yarn_connection.check_in_yarn('job3')['id'], 'application_3')
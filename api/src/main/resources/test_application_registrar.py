@@ -22,7 +22,7 @@ either express or implied.
 """
 
 import unittest
-from mock import patch
+from mock import patch, call
 import happybase  # pylint: disable=unused-import
 from Hbase_thrift import AlreadyExists
 from application_registrar import HbaseApplicationRegistrar
@@ -32,13 +32,16 @@ from lifecycle_states import ApplicationState
 class ApplicationRegistrarTests(unittest.TestCase):
     @patch('happybase.Connection')
     def test_create_application(self, hbase_mock):
+        hbase_mock.return_value.table.return_value.row.return_value = {}
         registrar = HbaseApplicationRegistrar('1.2.3.4')
         registrar.create_application('pname', 'aname', {'over': 'ride'}, {'def': 'ault'})
 
-        hbase_mock.return_value.table.return_value.put.assert_called_once_with(
-            'aname',
-            {'cf:package_name': 'pname', 'cf:status': ApplicationState.NOTCREATED, 'cf:overrides': '{"over": "ride"}',
-             'cf:defaults': '{"def": "ault"}', 'cf:name': 'aname'})
+        self.assertEqual(hbase_mock.return_value.table.return_value.put.call_args_list, [
+            call('pname', {'cf:aname': ''}),
+            call('aname',
+                 {'cf:package_name': 'pname', 'cf:status': ApplicationState.NOTCREATED, 'cf:overrides': '{"over": "ride"}',
+                  'cf:defaults': '{"def": "ault"}', 'cf:name': 'aname'})])
+        hbase_mock.return_value.table.assert_any_call('platform_package_apps')
 
     @patch('happybase.Connection')
     def test_table_exists(self, hbase_mock):
@@ -75,11 +78,26 @@ class ApplicationRegistrarTests(unittest.TestCase):
         self.assertEqual(result, {"create": "data"})
         hbase_mock.return_value.table.return_value.row.return_value = {}
 
+    @patch('happybase.Connection')
+    def test_get_create_data_and_status(self, hbase_mock):
+        table_mock = hbase_mock.return_value.table.return_value
+        table_mock.row.return_value = {'cf:create_data': '{"create": "data"}', 'cf:status': 'STARTED'}
+
+        registrar = HbaseApplicationRegistrar('1.2.3.4')
+        self.assertEqual(registrar.get_create_data_and_status('name'), ({"create": "data"}, 'STARTED'))
+        table_mock.row.assert_called_once_with('name', columns=['cf:create_data', 'cf:status'])
+
+        table_mock.row.return_value = {}
+        self.assertEqual(registrar.get_create_data_and_status('name'), (None, None))
+
     @patch('happybase.Connection')
     def test_delete_package(self, hbase_mock):
+        hbase_mock.return_value.table.return_value.row.return_value = {'cf:package_name': 'pname'}
         registrar = HbaseApplicationRegistrar('1.2.3.4')
         registrar.delete_application('name')
-        hbase_mock.return_value.table.return_value.delete.assert_called_once_with('name')
+        self.assertEqual(hbase_mock.return_value.table.return_value.delete.call_args_list, [
+            call('name'),
+            call('pname', columns=['cf:name'])])
 
     @patch('happybase.Connection')
     def test_get_application(self, hbase_mock):
@@ -130,8 +148,97 @@ class ApplicationRegistrarTests(unittest.TestCase):
         result = registrar.list_applications()
         self.assertEqual(result, ['name1'])
 
+    @patch('happybase.Connection')
+    def test_list_applications_for_package(self, hbase_mock):
+        hbase_mock.return_value.table.return_value.row.return_value = {'cf:name1': '', 'cf:name2': '', 'cf:name3': ''}
+        hbase_mock.return_value.table.return_value.rows.return_value = [
+            ('name1', {'cf:status': ApplicationState.CREATED, 'cf:package_name': 'p'}),
+            ('name2', {'cf:status': ApplicationState.NOTCREATED, 'cf:package_name': 'p'}),
+            ('name3', {'cf:status': ApplicationState.CREATED, 'cf:package_name': 'q'})]
+
+        registrar = HbaseApplicationRegistrar('1.2.3.4')
         result = registrar.list_applications_for_package('p')
         self.assertEqual(result, ['name1'])
+        hbase_mock.return_value.table.return_value.row.assert_called_once_with('p')
+        hbase_mock.return_value.table.return_value.rows.assert_called_once_with(
+            ['name1', 'name2', 'name3'], columns=['cf:package_name', 'cf:status'])
 
+        hbase_mock.return_value.table.return_value.row.return_value = {}
         result = registrar.list_applications_for_package('q')
         self.assertEqual(result, [])
+
+    @patch('happybase.Connection')
+    def test_rebuild_package_index(self, hbase_mock):
+        table_mock = hbase_mock.return_value.table.return_value
+        # the applications table is scanned first, then the index
+        table_mock.scan.side_effect = [
+            [('name1', {'cf:package_name': 'p'}), ('name2', {'cf:package_name': 'p'})],
+            [('p', {'cf:name1': ''}), ('q', {'cf:name3': ''}), ('r', {'cf:name4': ''})]]
+        # name3 is still gone when it is checked again, name4 was created in r after the scans
+        table_mock.row.side_effect = lambda key, columns: {'name3': {}, 'name4': {'cf:package_name': 'r'}}[key]
+
+        registrar = HbaseApplicationRegistrar('1.2.3.4')
+        result = registrar.rebuild_package_index()
+
+        self.assertEqual(result, {'missing': [('p', 'name2')], 'stale': [('q', 'name3'), ('r', 'name4')]})
+        table_mock.put.assert_called_once_with('p', {'cf:name2': ''})
+        table_mock.delete.assert_called_once_with('q', columns=['cf:name3'])
+
+    @patch('happybase.Connection')
+    def test_list_application_records(self, hbase_mock):
+        hbase_mock.return_value.table.return_value.scan.return_value = [
+            ('name1', {'cf:status': ApplicationState.CREATED, 'cf:package_name': 'p', 'cf:overrides': '{"user": "u"}'})]
+
+        registrar = HbaseApplicationRegistrar('1.2.3.4')
+        result = registrar.list_application_records(['status', 'package_name', 'overrides'])
+        self.assertEqual(result, [{'name': 'name1', 'status': ApplicationState.CREATED,
+                                   'package_name': 'p', 'overrides': {u'user': u'u'}}])
+        hbase_mock.return_value.table.return_value.scan.assert_called_once_with(
+            row_start=None, row_stop=None, columns=['cf:overrides', 'cf:package_name', 'cf:status'],
+            filter="SingleColumnValueFilter('cf', 'status', !=, 'binary:NOTCREATED', true, true)", batch_size=1000)
+
+    @patch('happybase.Connection')
+    def test_list_application_records_page(self, hbase_mock):
+        hbase_mock.return_value.table.return_value.scan.return_value = [
+            ('name1', {'cf:status': ApplicationState.CREATED}),
+            ('name2', {'cf:status': ApplicationState.NOTCREATED}),
+            ('name3', {'cf:status': ApplicationState.NOTCREATED}),
+            ('name4', {'cf:status': ApplicationState.STARTED}),
+            ('name5', {'cf:status': ApplicationState.STARTED})]
+
+        # a NOTCREATED record that is not being created does not take a place in the page
+        registrar = HbaseApplicationRegistrar('1.2.3.4')
+        result = registrar.list_application_records(['status'], limit=3, include_notcreated=['name3'])
+        self.assertEqual([record['name'] for record in result], ['name1', 'name3', 'name4'])
+        self.assertEqual(hbase_mock.return_value.table.return_value.scan.call_args[1]['filter'], None)
+
+    @patch('happybase.Connection')
+    def test_get_application_fields(self, hbase_mock):
+        hbase_mock.return_value.table.return_value.row.return_value = {
+            'cf:overrides': '{"user": "username"}',
+            'cf:status': ApplicationState.CREATED
+        }
+
+        registrar = HbaseApplicationRegistrar('1.2.3.4')
+        result = registrar.get_application('name', ['status', 'information', 'overrides'])
+
+        self.assertEqual(result, {
+            'information': None,
+            'overrides': {u'user': u'username'},
+            'status': ApplicationState.CREATED})
+        hbase_mock.return_value.table.return_value.row.assert_called_once_with(
+            'name', columns=['cf:information', 'cf:overrides', 'cf:status'])
+
+    @patch('happybase.Connection')
+    def test_list_applications_filtered(self, hbase_mock):
+        hbase_mock.return_value.table.return_value.scan.return_value = [
+            ('name1', {'cf:status': ApplicationState.CREATED, 'cf:overrides': '{"user": "u"}'})]
+
+        registrar = HbaseApplicationRegistrar('1.2.3.4')
+        result = registrar.list_applications(limit=10, start_after='name0', owner='u', status=ApplicationState.CREATED)
+        self.assertEqual(result, ['name1'])
+        hbase_mock.return_value.table.return_value.scan.assert_called_once_with(
+            row_start='name0\x00', row_stop=None, columns=['cf:overrides', 'cf:status'], batch_size=10,
+            filter="SingleColumnValueFilter('cf', 'status', !=, 'binary:NOTCREATED', true, true) AND "
+                   "SingleColumnValueFilter('cf', 'status', =, 'binary:CREATED', true, true) AND "
+                   "SingleColumnValueFilter('cf', 'overrides', =, 'substring:\"user\": \"u\"', true, true)")
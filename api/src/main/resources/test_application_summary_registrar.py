@@ -1,32 +1,94 @@
 import json
+import socket
 import unittest
 from mock import Mock, patch
 from application_summary_registrar import HBaseAppplicationSummary
+from exceptiondef import FailedConnection
 
 class AppplicationSummaryRegistrarTests(unittest.TestCase):
-    @patch('happybase.Connection.table.scan', return_value=['app1', 'app2', 'app3'])
     @patch('happybase.Connection')
-    def test_sync_with_dm(self, hbase_mock, dm_app_list):
+    def test_sync_with_dm(self, hbase_mock):
         """
         Testing deleted aplication get removed from Hbase
         """
+        table_mock = hbase_mock.return_value.table.return_value
+        table_mock.scan.return_value = [('app1', {}), ('app2', {}), ('app3', {})]
         registrar = HBaseAppplicationSummary('1.2.3.4')
-        application_list = ['app1', 'app2']
-        registrar.sync_with_dm(application_list)
-        for application, _ in dm_app_list:
-            if application not in application_list:
-                hbase_mock.return_value.table.return_value.delete.assert_called_once_with(application)
+        registrar.sync_with_dm(['app1', 'app2'])
+        table_mock.scan.assert_called_once_with(filter='FirstKeyOnlyFilter() AND KeyOnlyFilter()', batch_size=1000)
+        table_mock.batch.return_value.__enter__.return_value.delete.assert_called_once_with('app3')
+        table_mock.delete.assert_not_called()
 
     @patch('happybase.Connection')
     def test_post_to_hbase(self, hbase_mock):
         """
         Testing Summary data ets posted to Hbase
         """
+        table_mock = hbase_mock.return_value.table.return_value
+        batch_mock = table_mock.batch.return_value.__enter__.return_value
+        registrar = HBaseAppplicationSummary('1.2.3.4', batch_size=10)
+        registrar.begin_batch()
+        registrar.post_to_hbase({'aname': {'aggregate_status': 'status', 'component-1': 'data'}}, 'aname')
+        registrar.post_to_hbase({'bname': {'aggregate_status': 'status', 'component-1': 'data'}}, 'bname')
+        batch_mock.put.assert_not_called()
+        registrar.flush()
+        table_mock.batch.assert_called_once_with(batch_size=10)
+        batch_mock.put.assert_any_call('aname', \
+        {'cf:component_data': json.dumps({'component-1': 'data'}), 'cf:aggregate_status': 'status'})
+        self.assertEqual(batch_mock.put.call_count, 2)
+
+        # an unchanged summary is not written again
+        registrar.begin_batch()
+        registrar.post_to_hbase({'aname': {'aggregate_status': 'status', 'component-1': 'data'}}, 'aname')
+        registrar.post_to_hbase({'bname': {'aggregate_status': 'status', 'component-1': 'changed'}}, 'bname')
+        registrar.flush()
+        self.assertEqual(batch_mock.put.call_count, 3)
+        batch_mock.put.assert_called_with('bname', \
+        {'cf:component_data': json.dumps({'component-1': 'changed'}), 'cf:aggregate_status': 'status'})
+
+        # nor is it written again after a change that was not flushed was reverted
+        registrar.begin_batch()
+        registrar.post_to_hbase({'aname': {'aggregate_status': 'other', 'component-1': 'data'}}, 'aname')
+        registrar.post_to_hbase({'aname': {'aggregate_status': 'status', 'component-1': 'data'}}, 'aname')
+        registrar.flush()
+        self.assertEqual(batch_mock.put.call_count, 3)
+
+    @patch('happybase.Connection')
+    def test_post_to_hbase_unbatched(self, hbase_mock):
+        batch_mock = hbase_mock.return_value.table.return_value.batch.return_value.__enter__.return_value
         registrar = HBaseAppplicationSummary('1.2.3.4')
+
+        # outside a batch a summary is written as soon as it is posted
         registrar.post_to_hbase({'aname': {'aggregate_status': 'status', 'component-1': 'data'}}, 'aname')
-        hbase_mock.return_value.table.return_value.put.assert_called_once_with('aname', \
+        batch_mock.put.assert_called_once_with('aname', \
         {'cf:component_data': json.dumps({'component-1': 'data'}), 'cf:aggregate_status': 'status'})
 
+        # and flush() ends a batch
+        registrar.begin_batch()
+        registrar.flush()
+        registrar.post_to_hbase({'bname': {'aggregate_status': 'status'}}, 'bname')
+        self.assertEqual(batch_mock.put.call_count, 2)
+
+    @patch('happybase.Connection')
+    def test_flush_failure(self, hbase_mock):
+        table_mock = hbase_mock.return_value.table.return_value
+        batch_mock = table_mock.batch.return_value.__enter__.return_value
+        batch_mock.put.side_effect = [None, ValueError('lost'), None, None]
+        registrar = HBaseAppplicationSummary('1.2.3.4')
+        registrar.begin_batch()
+        registrar.post_to_hbase({'aname': {'aggregate_status': 'status'}}, 'aname')
+        registrar.post_to_hbase({'bname': {'aggregate_status': 'status'}}, 'bname')
+
+        # any error is reported as the applications that were not written
+        self.assertEqual(registrar.flush(), ['aname', 'bname'])
+
+        # so the same summaries are written when they are posted again
+        registrar.begin_batch()
+        registrar.post_to_hbase({'aname': {'aggregate_status': 'status'}}, 'aname')
+        registrar.post_to_hbase({'bname': {'aggregate_status': 'status'}}, 'bname')
+        self.assertEqual(registrar.flush(), [])
+        self.assertEqual(batch_mock.put.call_count, 4)
+
     @patch('happybase.Connection')
     def test_get_summary_data(self, hbase_mock):
         """
@@ -50,3 +112,16 @@ class AppplicationSummaryRegistrarTests(unittest.TestCase):
         registrar.get_dm_data = Mock(return_value={})
         result = registrar.get_summary_data('name')
         self.assertEqual(result, {'name': {'status': 'Not Created'}})
+
+    @patch('happybase.Connection')
+    def test_connection_errors_logged(self, hbase_mock):
+        """
+        Errors from the connection pool are logged, not raised
+        """
+        registrar = HBaseAppplicationSummary('1.2.3.4')
+        hbase_mock.return_value.table.return_value.batch.side_effect = socket.error('reset')
+        registrar.post_to_hbase({'aname': {'aggregate_status': 'status'}}, 'aname')
+        registrar._connection_pool = Mock()
+        registrar._connection_pool.connection.side_effect = FailedConnection('Unable to connect to the HBase master')
+        registrar.sync_with_dm(['aname'])
+        self.assertEqual(registrar.get_dm_data('aname'), None)
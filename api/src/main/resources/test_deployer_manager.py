@@ -20,6 +20,7 @@ License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 either express or implied.
 """
 
+import time
 import unittest
 import traceback
 from multiprocessing import Event
@@ -48,7 +49,8 @@ class DeploymentManagerTest(unittest.TestCase):
         mock_repository = Mock()
         mock_package_registar = Mock()
         mock_package_registar.get_package_metadata = Mock(
-            return_value={"name": Mock(), "version": Mock(), "metadata": {"component_types": {}, "user": "username"}})
+            return_value={"name": Mock(), "version": Mock(), "metadata": {"component_types": {}, "user": "username"},
+                          "defaults": {}})
         package_status = {}
         mock_package_registar.get_package_deploy_status = lambda package: package_status.get(package, None)
         mock_package_registar.set_package_deploy_status = \
@@ -80,7 +82,7 @@ class DeploymentManagerTest(unittest.TestCase):
         mock_application_registar = Mock()
         application_data = {}
         mock_application_registar.application_has_record = lambda app: app in application_data
-        mock_application_registar.get_application = lambda app: application_data.get(app, None)
+        mock_application_registar.get_application = lambda app, fields=None: application_data.get(app, None)
         mock_application_registar.set_application_status = \
             lambda app, status, info=None: set_dictionary_value(application_data, app,
                                                                 {"status": status, "information": info, 'overrides':{'user':'username'}})
@@ -183,6 +185,24 @@ class DeploymentManagerTest(unittest.TestCase):
         info = test_result[0].get("info")
         self.assertTrue("Error creating" in info["information"], "expected error message in: " + str(info))
 
+    def test_create_application_record_error(self):
+        self.mock_package_registar.package_exists = Mock(return_value=True)
+        self.mock_package_registar.get_package_data.return_value = 'stage/package_cache/package'
+        self.mock_application_registar.create_application.side_effect = throw_error_on_purpose
+
+        class DeploymentManagerWithLocalCallbacks(DeploymentManager):
+            def _assert_package_status(self, package, required_status):
+                return True
+
+            def _get_groups(self, user):
+                return []
+
+        deployment_manager = self._initialize_deployment_manager(DeploymentManagerWithLocalCallbacks)
+        self.assertRaises(Exception, deployment_manager.create_application,
+                          self.test_package_name, self.test_app_name, {'user': 'root'}, 'root')
+        # the package file acquired for the create is given back when the record cannot be written
+        self.mock_package_registar.release_package_data.assert_called_once_with('stage/package_cache/package')
+
     @patch('starbase.Connection')
     @patch('pyhs2.connect')
     @patch('datetime.datetime')
@@ -245,6 +265,7 @@ class DeploymentManagerTest(unittest.TestCase):
         self.mock_package_registar.get_package_metadata.return_value = {
             'name': 'name',
             'version': '0.0.0',
+            'defaults': {'oozie': {'componentA': {}}},
             'metadata': {
                 "component_types": {
                     "oozie": {
@@ -741,6 +762,39 @@ class DeploymentManagerTest(unittest.TestCase):
 
         self.assertEqual(dmgr.list_applications('username'), expected_applications)
 
+    def test_list_application_statuses(self):
+        repository = Mock()
+        package_registrar = Mock()
+        application_registrar = Mock()
+        application_registrar.list_application_records.return_value = [
+            {'name': 'app1', 'status': ApplicationState.STARTED, 'information': None,
+             'package_name': 'package-1.0.0', 'overrides': {'user': 'username'}},
+            {'name': 'app3', 'status': ApplicationState.NOTCREATED, 'information': None,
+             'package_name': 'package-1.0.0', 'overrides': {'user': 'other'}}]
+        application_summary_registrar = Mock()
+        environment = {"namespace": "some_namespace", 'webhdfs_host': 'webhdfshost', 'webhdfs_port': 'webhdfsport'}
+        config = {"deployer_thread_limit": 10}
+
+        dmgr = DeploymentManager(repository,
+                                 package_registrar,
+                                 application_registrar,
+                                 application_summary_registrar,
+                                 environment,
+                                 config)
+        dmgr._get_groups = self._mock_get_groups #pylint: disable =protected-access
+        dmgr._mark_creating('app3') #pylint: disable =protected-access
+        # packages being deployed and applications in other operations share the progress
+        dmgr._set_package_progress('package-2.0.0', PackageDeploymentState.DEPLOYING) #pylint: disable =protected-access
+        dmgr._mark_starting('app1') #pylint: disable =protected-access
+
+        self.assertEqual(dmgr.list_application_statuses('username'), [
+            {'name': 'app1', 'status': ApplicationState.STARTING, 'information': None,
+             'package': 'package-1.0.0', 'owner': 'username'},
+            {'name': 'app3', 'status': ApplicationState.CREATING, 'information': None,
+             'package': 'package-1.0.0', 'owner': 'other'}])
+        # only the NOTCREATED records of applications being created are read
+        self.assertEqual(application_registrar.list_application_records.call_args[1]['include_notcreated'], ['app3'])
+
     def test_application_in_progress(self):
         repository = Mock()
         package_registrar = Mock()
@@ -900,6 +954,42 @@ class DeploymentManagerTest(unittest.TestCase):
 
         self.assertEqual(dmgr.get_application_summary('name', 'username'), {'name':{'aggregate_status': 'COMPLETED_WITH_NO_FAILURES', 'component-1': {}}})
 
+    def test_application_cache_invalidated(self):
+        application_registrar = Mock()
+        record = {
+            'overrides': {'user': 'username'},
+            'defaults': {},
+            'name': 'name',
+            'package_name': 'package_name',
+            'status': ApplicationState.STARTED,
+            'information': None}
+
+        def set_application_status(application, status, information=None):
+            record['status'] = status
+            record['information'] = information
+        application_registrar.get_application.side_effect = lambda application, fields=None: dict(record)
+        application_registrar.set_application_status.side_effect = set_application_status
+        application_registrar.get_create_data.return_value = {}
+        environment = {"namespace": "some_namespace", 'webhdfs_host': 'webhdfshost', 'webhdfs_port': 'webhdfsport'}
+        config = {"deployer_thread_limit": 10, "application_callback": "callback"}
+
+        dmgr = DeploymentManager(Mock(), Mock(), application_registrar, Mock(), environment, config)
+        dmgr._get_groups = self._mock_get_groups #pylint: disable =protected-access
+        dmgr._application_creator = Mock() #pylint: disable =protected-access
+        dmgr.rest_client = Mock()
+
+        self.assertEqual(dmgr.get_application_info('name')['status'], ApplicationState.STARTED)
+        self.assertEqual(dmgr.get_application_info('name')['status'], ApplicationState.STARTED)
+        self.assertEqual(dmgr.get_cache_stats('username')['applications']['hits'], 1)
+
+        # the status written by stop is read back rather than the cached record
+        dmgr.stop_application('name', 'username')
+        for _ in range(50):
+            if dmgr.get_application_info('name')['status'] == ApplicationState.CREATED:
+                break
+            time.sleep(0.1)
+        self.assertEqual(dmgr.get_application_info('name')['status'], ApplicationState.CREATED)
+
     def test_unauthorized_user_start(self):
         self.mock_package_registar.package_exists = Mock(return_value=True)
         self.mock_package_registar.get_package_deploy_status = Mock(
@@ -0,0 +1,224 @@
+"""
+Name:       test_deployer_utils.py
+Purpose:    Unit tests for the HDFS helpers in deployer_utils
+            Run with main(), the easiest way is "nosetests test_*.py"
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import os
+import hashlib
+import shutil
+import tempfile
+import threading
+import unittest
+from mock import patch, Mock
+import deployer_utils
+from deployer_utils import HDFS
+from exceptiondef import FailedCreation
+
+
+class HdfsTests(unittest.TestCase):
+    def setUp(self):
+        self.local_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.local_dir)
+
+    @patch('deployer_utils.PyWebHdfsClient')
+    def test_parallel_stream_file_to_disk(self, hdfs_mock):
+        content = ''.join(chr(ord('a') + i % 26) for i in range(25))
+        hdfs_mock.return_value.get_file_dir_status.return_value = {'FileStatus': {'length': len(content)}}
+        # the reads are recorded here, as the call count of a mock is not updated safely from several threads
+        reads = []
+
+        def read_file(path, offset, length):
+            reads.append(offset)
+            return content[offset:offset + length]
+        hdfs_mock.return_value.read_file.side_effect = read_file
+        local_path = os.path.join(self.local_dir, 'package')
+
+        with patch.object(deployer_utils, 'READ_CHUNK_SIZE', 4):
+            HDFS('host', 'port', 'user').stream_file_to_disk('/packages/package', local_path, concurrency=3)
+
+        with open(local_path) as local_file:
+            self.assertEqual(local_file.read(), content)
+        self.assertEqual(sorted(reads), [0, 4, 8, 12, 16, 20, 24])
+
+    @patch('deployer_utils.PyWebHdfsClient')
+    def test_parallel_stream_short_read(self, hdfs_mock):
+        hdfs_mock.return_value.get_file_dir_status.return_value = {'FileStatus': {'length': 8}}
+        hdfs_mock.return_value.read_file.return_value = 'ab'
+        local_path = os.path.join(self.local_dir, 'package')
+
+        with patch.object(deployer_utils, 'READ_CHUNK_SIZE', 4):
+            self.assertRaises(IOError, HDFS('host', 'port', 'user').stream_file_to_disk,
+                              '/packages/package', local_path, concurrency=2)
+
+    @patch('deployer_utils.PyWebHdfsClient')
+    def test_sequential_stream_file_to_disk(self, hdfs_mock):
+        hdfs_mock.return_value.read_file.side_effect = ['abcd', 'ef']
+        local_path = os.path.join(self.local_dir, 'package')
+
+        with patch.object(deployer_utils, 'READ_CHUNK_SIZE', 4):
+            HDFS('host', 'port', 'user').stream_file_to_disk('/packages/package', local_path, concurrency=1)
+
+        with open(local_path) as local_file:
+            self.assertEqual(local_file.read(), 'abcdef')
+
+    @patch('deployer_utils.PyWebHdfsClient')
+    def test_recursive_copy(self, hdfs_mock):
+        os.makedirs(os.path.join(self.local_dir, 'lib', 'jars'))
+        for name, content in [('workflow.xml', '<workflow/>'), ('properties.json', '{}'),
+                              ('lib/a.jar', 'aaaa'), ('lib/jars/b.jar', 'bbbb')]:
+            with open(os.path.join(self.local_dir, name), 'w') as local_file:
+                local_file.write(content)
+
+        # b.jar is already in HDFS with the same checksum
+        b_digest = deployer_utils.file_digest(os.path.join(self.local_dir, 'lib/jars/b.jar'))
+        hdfs_mock.return_value.get_file_dir_status.return_value = {'FileStatus': {'length': 4}}
+        hdfs_mock.return_value.get_xattr.side_effect = \
+            lambda path, name: {'XAttrs': [{'name': name, 'value': '"%s"' % b_digest if path.endswith('b.jar') else '"x"'}]}
+        # mock does not record calls made from several threads reliably, so keep them in plain lists
+        created = []
+        xattrs = []
+        hdfs_mock.return_value.create_file.side_effect = lambda path, data, **kwargs: created.append(path)
+        hdfs_mock.return_value.set_xattr.side_effect = lambda path, name, value: xattrs.append((path, name, value))
+
+        timings = HDFS('host', 'port', 'user').recursive_copy(self.local_dir, '/app/component', exclude=['properties.json'],
+                                                               concurrency=3)
+
+        self.assertEqual(sorted(timings.keys()), ['/app/component/lib/a.jar', '/app/component/lib/jars/b.jar',
+                                                  '/app/component/workflow.xml'])
+        self.assertEqual(timings['/app/component/lib/jars/b.jar'], None)
+        self.assertEqual([args[0][0] for args in hdfs_mock.return_value.make_dir.call_args_list],
+                         ['/app/component', '/app/component/lib', '/app/component/lib/jars'])
+        self.assertEqual(sorted(created), ['/app/component/lib/a.jar', '/app/component/workflow.xml'])
+        self.assertIn(('/app/component/lib/a.jar', deployer_utils.CHECKSUM_XATTR, '"%s"' % hashlib.sha256('aaaa').hexdigest()),
+                      xattrs)
+
+
+class ExecSshTests(unittest.TestCase):
+    @patch('deployer_utils.SSH_POOL')
+    def test_exec_ssh_batch(self, pool_mock):
+        shell = pool_mock.connection.return_value.__enter__.return_value
+        shell.run.return_value.stderr_output = 'warning\n%s1 2\n' % deployer_utils.SSH_COMMAND_FAILED
+
+        with patch('deployer_utils.logging') as logging_mock:
+            deployer_utils.exec_ssh('host', 'user', 'key.pem', ['cd /tmp && ls', 'false', 'pwd # here'])
+
+        pool_mock.connection.assert_called_once_with('host', 'user', 'key.pem')
+        shell.run.assert_called_once_with(['bash', '-c', '(\ncd /tmp && ls\n) || echo "%s0 $?" >&2\n'
+                                                         '(\nfalse\n) || echo "%s1 $?" >&2\n'
+                                                         '(\npwd # here\n) || echo "%s2 $?" >&2' %
+                                           ((deployer_utils.SSH_COMMAND_FAILED,) * 3)], allow_error=True)
+        logging_mock.error.assert_called_once_with('%s - error: exit code %s on %s', 'false', '2', 'host')
+
+    @patch('deployer_utils.SSH_POOL')
+    def test_exec_ssh_nothing_to_run(self, pool_mock):
+        deployer_utils.exec_ssh('host', 'user', 'key.pem', [])
+        pool_mock.connection.assert_not_called()
+
+
+class SftpTests(unittest.TestCase):
+    def setUp(self):
+        self.local_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.local_dir)
+
+    def test_copy_tree_existing_destination(self):
+        source = os.path.join(self.local_dir, 'source')
+        dest = os.path.join(self.local_dir, 'dest')
+        os.makedirs(os.path.join(source, 'conf'))
+        os.makedirs(os.path.join(dest, 'conf'))
+        for path, content in [(os.path.join(source, 'job.jar'), 'new jar'),
+                              (os.path.join(source, 'conf', 'job.properties'), 'new properties'),
+                              (os.path.join(dest, 'job.jar'), 'old jar'),
+                              (os.path.join(dest, 'conf', 'other.properties'), 'kept')]:
+            with open(path, 'w') as out:
+                out.write(content)
+
+        # a re-create stages into the directories left by the previous one
+        deployer_utils.copy_tree(source, dest)
+
+        for path, content in [('job.jar', 'new jar'), ('conf/job.properties', 'new properties'),
+                              ('conf/other.properties', 'kept')]:
+            with open(os.path.join(dest, path)) as copied:
+                self.assertEqual(copied.read(), content)
+
+    def test_list_files(self):
+        os.makedirs(os.path.join(self.local_dir, 'lib', 'sub'))
+        for name in ['a.txt', 'lib/b.jar', 'lib/sub/c.jar']:
+            with open(os.path.join(self.local_dir, name), 'w') as local_file:
+                local_file.write(name)
+
+        self.assertEqual(deployer_utils.list_files(self.local_dir, '/tmp/x'),
+                         ([], [(os.path.join(self.local_dir, 'a.txt'), '/tmp/x/a.txt')]))
+        self.assertEqual(deployer_utils.list_files(self.local_dir, '/tmp/x', recursive=True),
+                         (['/tmp/x/lib', '/tmp/x/lib/sub'],
+                          [(os.path.join(self.local_dir, 'a.txt'), '/tmp/x/a.txt'),
+                           (os.path.join(self.local_dir, 'lib', 'b.jar'), '/tmp/x/lib/b.jar'),
+                           (os.path.join(self.local_dir, 'lib', 'sub', 'c.jar'), '/tmp/x/lib/sub/c.jar')]))
+
+    @patch('deployer_utils.SSH_POOL')
+    def test_sftp_put(self, pool_mock):
+        local_path = os.path.join(self.local_dir, 'run.sh')
+        with open(local_path, 'w') as local_file:
+            local_file.write('echo')
+        os.chmod(local_path, 0o750)
+        shell = pool_mock.connection.return_value.__enter__.return_value
+        # pylint: disable=protected-access
+        sftp = shell._connect_sftp.return_value.__enter__.return_value
+        sftp.put.return_value = Mock(st_size=4)
+
+        deployer_utils.sftp_put('host', 'user', 'key.pem', [(local_path, '/tmp/x/run.sh')], directories=['/tmp/x'])
+
+        sftp.mkdir.assert_called_once_with('/tmp/x')
+        sftp.put.assert_called_once_with(local_path, '/tmp/x/run.sh', confirm=True)
+        sftp.chmod.assert_called_once_with('/tmp/x/run.sh', 0o750)
+
+        sftp.put.side_effect = IOError('size mismatch')
+        self.assertRaises(FailedCreation, deployer_utils.sftp_put, 'host', 'user', 'key.pem', [(local_path, '/tmp/x/run.sh')])
+
+
+class DistributeTests(unittest.TestCase):
+    def test_distribute_to_hosts(self):
+        results = deployer_utils.distribute_to_hosts(['nm1', 'nm2'], lambda host: host.upper(), concurrency=2)
+        self.assertEqual(results, {'nm1': 'NM1', 'nm2': 'NM2'})
+
+    def test_distribute_to_hosts_failures(self):
+        visited = []
+        hang = threading.Event()
+
+        def task(host):
+            visited.append(host)
+            if host == 'nm1':
+                raise IOError('unreachable')
+            if host == 'nm2':
+                hang.wait(5)
+
+        try:
+            deployer_utils.distribute_to_hosts(['nm1', 'nm2', 'nm3'], task, concurrency=3, timeout=0.1)
+            self.fail('Expected FailedCreation exception')
+        except FailedCreation as ex:
+            self.assertEqual(ex.msg, 'Failed on 2 of 3 hosts: nm1 - unreachable; nm2 - timed out after 0.1 seconds')
+        finally:
+            hang.set()
+        # every host is tried even though some failed
+        self.assertEqual(sorted(visited), ['nm1', 'nm2', 'nm3'])
@@ -0,0 +1,78 @@
+"""
+Name:       test_hbase_connection_pool.py
+Purpose:    Unit tests for the hbase connection pool
+            Run with main(), the easiest way is "nosetests test_*.py"
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import unittest
+from mock import patch
+from thriftpy.transport import TTransportException
+from hbase_connection_pool import HbaseConnectionPool
+from exceptiondef import FailedConnection
+
+
+class HbaseConnectionPoolTests(unittest.TestCase):
+    @patch('happybase.Connection')
+    def test_connection_reused(self, hbase_mock):
+        pool = HbaseConnectionPool('1.2.3.4', size=1)
+        with pool.connection() as connection:
+            connection.table('t').row('a')
+        with pool.connection() as connection:
+            connection.table('t').row('b')
+
+        hbase_mock.assert_called_once_with('1.2.3.4')
+        self.assertFalse(hbase_mock.return_value.close.called)
+
+    @patch('happybase.Connection')
+    def test_reconnect_after_transport_error(self, hbase_mock):
+        pool = HbaseConnectionPool('1.2.3.4', size=1)
+
+        def borrow_and_fail():
+            with pool.connection():
+                raise TTransportException(message='broken pipe')
+
+        self.assertRaises(TTransportException, borrow_and_fail)
+        hbase_mock.return_value.close.assert_called_once_with()
+
+        with pool.connection():
+            pass
+        self.assertEqual(hbase_mock.call_count, 2)
+
+    @patch('happybase.Connection')
+    def test_reopen_closed_transport(self, hbase_mock):
+        pool = HbaseConnectionPool('1.2.3.4', size=1)
+        with pool.connection():
+            pass
+        hbase_mock.return_value.transport.is_open.return_value = False
+        with pool.connection():
+            pass
+        hbase_mock.return_value.open.assert_called_once_with()
+
+    @patch('happybase.Connection')
+    # pylint: disable=unused-argument
+    def test_borrow_timeout(self, hbase_mock):
+        pool = HbaseConnectionPool('1.2.3.4', size=1, timeout=0.1)
+
+        def borrow_twice():
+            with pool.connection():
+                with pool.connection():
+                    pass
+
+        self.assertRaises(FailedConnection, borrow_twice)
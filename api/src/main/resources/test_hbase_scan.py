@@ -0,0 +1,61 @@
+"""
+Name:       test_hbase_scan.py
+Purpose:    Unit tests for the HBase paging helpers
+            Run with main(), the easiest way is "nosetests test_*.py"
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import unittest
+from mock import Mock
+from hbase_scan import scan_page, column_value_filter, json_value_filter, json_value_matches
+
+
+class HbaseScanTests(unittest.TestCase):
+    def test_column_value_filter(self):
+        self.assertEqual(column_value_filter('cf:status', 'STARTED'),
+                         "SingleColumnValueFilter('cf', 'status', =, 'binary:STARTED', true, true)")
+        self.assertEqual(column_value_filter('cf:name', "it's", operator='!='),
+                         "SingleColumnValueFilter('cf', 'name', !=, 'binary:it''s', true, true)")
+
+    def test_json_value_filter(self):
+        self.assertEqual(json_value_filter('cf:overrides', 'user', 'bob'),
+                         "SingleColumnValueFilter('cf', 'overrides', =, 'substring:\"user\": \"bob\"', true, true)")
+        self.assertTrue(json_value_matches({'cf:overrides': '{"user": "bob"}'}, 'cf:overrides', 'user', 'bob'))
+        self.assertFalse(json_value_matches({'cf:overrides': '{"x": {"user": "bob"}}'}, 'cf:overrides', 'user', 'bob'))
+        self.assertFalse(json_value_matches({}, 'cf:overrides', 'user', 'bob'))
+
+    def test_scan_page(self):
+        table = Mock()
+        table.scan.return_value = iter([('a', {}), ('b', {}), ('c', {}), ('d', {})])
+
+        result = scan_page(table, ['cf:status'], filters=['f1', 'f2'], start_after='a', limit=2)
+
+        self.assertEqual(result, [('a', {}), ('b', {})])
+        table.scan.assert_called_once_with(row_start='a\x00', row_stop=None, columns=['cf:status'],
+                                           filter='f1 AND f2', batch_size=2)
+
+    def test_scan_page_prefix(self):
+        table = Mock()
+        table.scan.return_value = iter([('app-1.0', {}), ('app-2.0', {})])
+
+        result = scan_page(table, ['cf:name'], row_prefix='app-', accept=lambda key, _: key != 'app-1.0')
+
+        self.assertEqual(result, [('app-2.0', {})])
+        table.scan.assert_called_once_with(row_start='app-', row_stop='app.', columns=['cf:name'],
+                                           filter=None, batch_size=1000)
@@ -0,0 +1,101 @@
+"""
+Name:       test_package_cache.py
+Purpose:    Unit tests for the local package cache
+            Run with main(), the easiest way is "nosetests test_*.py"
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from mock import Mock
+from package_cache import PackageCache
+
+
+def writer(data):
+    def fetch(local_path):
+        with open(local_path, 'wb') as local_file:
+            local_file.write(data)
+    return Mock(side_effect=fetch)
+
+
+class PackageCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.stage = tempfile.mkdtemp()
+        self.cache = PackageCache(os.path.join(self.stage, 'package_cache'), max_size=10)
+
+    def tearDown(self):
+        shutil.rmtree(self.stage)
+
+    def test_fetched_once(self):
+        fetch = writer('1234')
+        status = {'length': 4, 'modificationTime': 1}
+
+        path = self.cache.acquire('p-1.0.0', status, fetch)
+        self.cache.release(path)
+        self.assertEqual(self.cache.acquire('p-1.0.0', status, fetch), path)
+        self.assertEqual(fetch.call_count, 1)
+        with open(path) as local_file:
+            self.assertEqual(local_file.read(), '1234')
+
+    def test_changed_in_hdfs(self):
+        first = self.cache.acquire('p-1.0.0', {'length': 4, 'modificationTime': 1}, writer('1234'))
+        second = self.cache.acquire('p-1.0.0', {'length': 4, 'modificationTime': 2}, writer('5678'))
+
+        self.assertNotEqual(first, second)
+        # the first file is still in use so is kept until it is released
+        self.assertTrue(os.path.exists(first))
+        self.cache.release(first)
+        self.assertFalse(os.path.exists(first))
+        self.assertTrue(os.path.exists(second))
+
+    def test_put(self):
+        local_path = os.path.join(self.stage, 'p-1.0.0')
+        with open(local_path, 'wb') as local_file:
+            local_file.write('1234')
+        fetch = writer('1234')
+
+        self.cache.put('p-1.0.0', {'length': 4, 'modificationTime': 1}, local_path)
+        path = self.cache.acquire('p-1.0.0', {'length': 4, 'modificationTime': 1}, fetch)
+
+        self.assertEqual(fetch.call_count, 0)
+        self.assertTrue(os.path.exists(local_path))
+        self.assertNotEqual(path, local_path)
+
+    def test_least_recently_used_evicted(self):
+        status = {'length': 4, 'modificationTime': 1}
+        first = self.cache.acquire('a', status, writer('1234'))
+        self.cache.release(first)
+        second = self.cache.acquire('b', status, writer('5678'))
+        self.cache.release(second)
+        third = self.cache.acquire('c', status, writer('9012'))
+
+        # over the 10 byte limit, but 'c' is in use
+        self.cache.release(third)
+        self.assertFalse(os.path.exists(first))
+        self.assertTrue(os.path.exists(second))
+        self.assertTrue(os.path.exists(third))
+
+    def test_remove(self):
+        path = self.cache.acquire('p-1.0.0', {'length': 4, 'modificationTime': 1}, writer('1234'))
+        self.cache.remove('p-1.0.0')
+        self.assertTrue(os.path.exists(path))
+        self.cache.release(path)
+        self.assertFalse(os.path.exists(path))
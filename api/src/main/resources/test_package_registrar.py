@@ -21,10 +21,13 @@ License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF
 either express or implied.
 """
 
+import os
 import unittest
 import json
+import shutil
+import tempfile
 import happybase # pylint: disable=unused-import
-from mock import patch, mock_open, Mock
+from mock import patch, Mock
 from Hbase_thrift import AlreadyExists
 from package_registrar import HbasePackageRegistrar
 
@@ -63,21 +66,49 @@ class GenerateRecord(unittest.TestCase):
     @patch('happybase.Connection')
     @patch('package_registrar.PackageParser')
     @patch('deployer_utils.HDFS')
+    @patch('package_registrar.file_digest')
     # pylint: disable=unused-argument
     # pylint: disable=protected-access
-    def test_download_package(self, hdfs_mock, parser_mock, hbase_mock):
+    def test_download_package(self, digest_mock, hdfs_mock, parser_mock, hbase_mock):
         parser_mock.return_value.get_package_metadata.return_value = {"package_name": "a-1"}
+        digest_mock.return_value = 'ab12'
 
         registrar = HbasePackageRegistrar('1.2.3.4', None, None, None, None)
         registrar._hdfs_client = Mock()
-        with patch("__builtin__.open", mock_open(read_data="1234")):
-            registrar.set_package('name', 'abcd', 'username')
+        registrar._hdfs_client.upload_file.return_value = (4, 0.5)
+        registrar.set_package('name', 'abcd', 'username')
+
+        registrar._hdfs_client.upload_file.assert_called_once_with(
+            'abcd', '/pnda/system/deployment-manager/packages/a-1', permission=600)
 
         hbase_mock.return_value.table.return_value.put.assert_called_once_with(
             'a-1',
             {'cf:metadata': '{"user": "username", "package_name": "a-1"}',
              'cf:package_data': '/pnda/system/deployment-manager/packages/a-1',
-             'cf:name': 'a', 'cf:version': '1'})
+             'cf:name': 'a', 'cf:version': '1', 'cf:digest': 'ab12'})
+
+    @patch('happybase.Connection')
+    @patch('package_registrar.PackageParser')
+    @patch('package_registrar.file_digest')
+    # pylint: disable=unused-argument
+    # pylint: disable=protected-access
+    def test_set_package_parsed(self, digest_mock, parser_mock, hbase_mock):
+        digest_mock.return_value = 'ab12'
+        parser_mock.return_value.properties_from_metadata.return_value = {'oozie': {}}
+
+        registrar = HbasePackageRegistrar('1.2.3.4', None, None, None, None)
+        registrar._hdfs_client = Mock()
+        registrar._hdfs_client.upload_file.return_value = (4, 0.5)
+        registrar.set_package('a-1', 'abcd', 'username', {"package_name": "a-1"})
+
+        parser_mock.return_value.get_package_metadata.assert_not_called()
+        hbase_mock.return_value.table.return_value.row.return_value = {'cf:digest': 'ab12', 'cf:name': 'a', 'cf:version': '1'}
+        result = registrar.get_package_metadata('a-1')
+
+        self.assertEqual(result, {'version': '1', 'name': 'a', 'defaults': {'oozie': {}},
+                                  'metadata': {'user': 'username', 'package_name': 'a-1'}})
+        hbase_mock.return_value.table.return_value.row.assert_called_once_with(
+            'a-1', columns=['cf:digest', 'cf:name', 'cf:version'])
 
     @patch('happybase.Connection')
     def test_set_package_deploy_status(self, hbase_mock):
@@ -112,27 +143,79 @@ class GenerateRecord(unittest.TestCase):
     # pylint: disable=protected-access
     def test_get_package_data(self, hbase_mock):
         hbase_mock.return_value.table.return_value.row.return_value = {'cf:package_data': 'abcd'}
+        stage_path = tempfile.mkdtemp()
 
-        registrar = HbasePackageRegistrar('1.2.3.4', None, None, None, 'path')
-        registrar._hdfs_client = Mock()
+        def stream_file_to_disk(_, local_path, concurrency):
+            with open(local_path, 'wb') as local_file:
+                local_file.write('1234')
+
+        try:
+            registrar = HbasePackageRegistrar('1.2.3.4', None, None, None, stage_path)
+            registrar._hdfs_client = Mock()
+            registrar._hdfs_client.get_file_status.return_value = {'length': 4, 'modificationTime': 1}
+            registrar._hdfs_client.stream_file_to_disk.side_effect = stream_file_to_disk
 
-        with patch("__builtin__.open", mock_open(read_data="1234")):
             result = registrar.get_package_data('name')
+            self.assertTrue(result.startswith('%s/package_cache/name.' % stage_path))
+            with open(result) as local_file:
+                self.assertEqual(local_file.read(), '1234')
+            registrar.release_package_data(result)
 
-        self.assertEqual(result, 'path/name')
-        hbase_mock.return_value.table.return_value.row.return_value = {}
+            # a second read is served from the cache
+            self.assertEqual(registrar.get_package_data('name'), result)
+            self.assertEqual(registrar._hdfs_client.stream_file_to_disk.call_count, 1)
 
-        result = registrar.get_package_data('name')
-        self.assertEqual(result, None)
+            hbase_mock.return_value.table.return_value.row.return_value = {}
+
+            result = registrar.get_package_data('name')
+            self.assertEqual(result, None)
+        finally:
+            shutil.rmtree(stage_path)
+
+    @patch('happybase.Connection')
+    # pylint: disable=protected-access
+    def test_get_package_data_uncached(self, hbase_mock):
+        hbase_mock.return_value.table.return_value.row.return_value = {'cf:package_data': 'abcd'}
+        stage_path = tempfile.mkdtemp()
+
+        def stream_file_to_disk(_, local_path, concurrency):
+            with open(local_path, 'wb') as local_file:
+                local_file.write('1234')
+
+        try:
+            registrar = HbasePackageRegistrar('1.2.3.4', None, None, None, stage_path)
+            registrar._package_cache = None
+            registrar._hdfs_client = Mock()
+            registrar._hdfs_client.stream_file_to_disk.side_effect = stream_file_to_disk
+
+            # without a cache every read goes to HDFS and the file is removed when it is released
+            result = registrar.get_package_data('name')
+            self.assertEqual(result, '%s/name' % stage_path)
+            registrar.release_package_data(result)
+            self.assertFalse(os.path.exists(result))
+            self.assertEqual(registrar._hdfs_client.get_file_status.call_count, 0)
+        finally:
+            shutil.rmtree(stage_path)
 
     @patch('happybase.Connection')
     def test_get_package_metadata(self, hbase_mock):
-        hbase_mock.return_value.table.return_value.row.return_value = {'cf:metadata': '{"some": "thing"}', 'cf:name': 'name', 'cf:version': '1.0.0'}
+        hbase_mock.return_value.table.return_value.row.return_value = {
+            'cf:metadata': '{"component_types": {"oozie": {"c": {"component_detail": {"properties.json": {"a": "b"}}}}}}',
+            'cf:name': 'name', 'cf:version': '1.0.0'}
 
         registrar = HbasePackageRegistrar('1.2.3.4', None, None, None, None)
         result = registrar.get_package_metadata('name')
 
-        self.assertEqual(result, {'version': '1.0.0', 'name': 'name', 'metadata': {u'some': u'thing'}})
+        self.assertEqual(result['defaults'], {'oozie': {'c': {'a': 'b'}}})
+        self.assertEqual((result['name'], result['version']), ('name', '1.0.0'))
+
+        # packages with a stored digest are decoded once
+        hbase_mock.return_value.table.return_value.row.return_value['cf:digest'] = 'ab12'
+        self.assertEqual(registrar.get_package_metadata('name'), result)
+        hbase_mock.return_value.table.return_value.row.reset_mock()
+        self.assertEqual(registrar.get_package_metadata('name'), result)
+        self.assertEqual(hbase_mock.return_value.table.return_value.row.call_count, 1)
+
         hbase_mock.return_value.table.return_value.row.return_value = {}
 
         result = registrar.get_package_metadata('name')
@@ -0,0 +1,154 @@
+"""
+Name:       test_package_repo_rest_client.py
+Purpose:    Unit tests for the package repository client
+            Run with main(), the easiest way is "nosetests test_*.py"
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import os
+import base64
+import hashlib
+import shutil
+import tempfile
+import unittest
+from mock import patch, Mock
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from package_repo_rest_client import PackageRepoRestClient
+from exceptiondef import FailedConnection, FailedValidation, NotFound, Forbidden
+
+
+def mock_response(status_code, chunks, content_length=None, fail=False, digest=None):
+    response = Mock()
+    response.status_code = status_code
+    response.headers = {'content-length': str(content_length)} if content_length is not None else {}
+    if digest is not None:
+        response.headers['Digest'] = digest
+
+    def iter_content(chunk_size):
+        for chunk in chunks:
+            assert len(chunk) <= chunk_size
+            yield chunk
+        if fail:
+            raise RequestsConnectionError('connection reset')
+    response.iter_content = iter_content
+    response.text = 'HTTP %s' % status_code
+    return response
+
+
+class PackageRepoRestClientTests(unittest.TestCase):
+    def setUp(self):
+        self.stage = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.stage)
+
+    @patch('package_repo_rest_client.time')
+    @patch('requests.get')
+    def test_get_package_resumes(self, get_mock, _):
+        get_mock.side_effect = [mock_response(200, ['abc'], content_length=6, fail=True),
+                                mock_response(206, ['def'], content_length=3)]
+
+        client = PackageRepoRestClient('http://repo', self.stage)
+        path = client.get_package('p-1.0.0.tar.gz', 'user', checksum='sha256:%s' % hashlib.sha256('abcdef').hexdigest())
+
+        with open(path) as downloaded:
+            self.assertEqual(downloaded.read(), 'abcdef')
+        self.assertEqual(get_mock.call_args_list[0][1]['stream'], True)
+        self.assertEqual(get_mock.call_args_list[1][1]['headers'], {'Range': 'bytes=3-'})
+
+    @patch('package_repo_rest_client.time')
+    @patch('requests.get')
+    def test_get_package_range_ignored(self, get_mock, _):
+        # a truncated body is resumed, but the repository answers with the whole package
+        get_mock.side_effect = [mock_response(200, ['abc'], content_length=6),
+                                mock_response(200, ['abc', 'def'], content_length=6)]
+
+        client = PackageRepoRestClient('http://repo', self.stage)
+        path = client.get_package('p-1.0.0.tar.gz', 'user', checksum='md5:%s' % hashlib.md5('abcdef').hexdigest())
+
+        with open(path) as downloaded:
+            self.assertEqual(downloaded.read(), 'abcdef')
+
+    @patch('requests.get')
+    def test_get_package_checksum_mismatch(self, get_mock):
+        get_mock.return_value = mock_response(200, ['abc'])
+
+        client = PackageRepoRestClient('http://repo', self.stage)
+        self.assertRaises(FailedValidation, client.get_package, 'p-1.0.0.tar.gz', 'user', checksum='sha256:00')
+        # the corrupt file is not left for a later deploy
+        self.assertFalse(os.path.exists(os.path.join(self.stage, 'p-1.0.0.tar.gz')))
+
+    @patch('package_repo_rest_client.time')
+    @patch('requests.get')
+    def test_get_package_gives_up(self, get_mock, time_mock):
+        get_mock.side_effect = lambda *args, **kwargs: mock_response(200, ['ab'], content_length=4, fail=True)
+
+        client = PackageRepoRestClient('http://repo', self.stage)
+        self.assertRaises(FailedConnection, client.get_package, 'p-1.0.0.tar.gz', 'user')
+        self.assertEqual(get_mock.call_count, 4)
+        # each resume waits longer, and the partial file is removed
+        self.assertEqual([args[0][0] for args in time_mock.sleep.call_args_list], [1, 2, 4])
+        self.assertFalse(os.path.exists(os.path.join(self.stage, 'p-1.0.0.tar.gz')))
+
+    @patch('requests.get')
+    def test_get_package_digest_header(self, get_mock):
+        get_mock.return_value = mock_response(200, ['abc', 'def'], digest='UNIXsum=30, SHA-256=%s' %
+                                              base64.b64encode(hashlib.sha256('abcdef').digest()))
+
+        client = PackageRepoRestClient('http://repo', self.stage)
+        path = client.get_package('p-1.0.0.tar.gz', 'user')
+        with open(path) as downloaded:
+            self.assertEqual(downloaded.read(), 'abcdef')
+
+        get_mock.return_value = mock_response(200, ['abc'], digest='MD5=%s' %
+                                              base64.b64encode(hashlib.md5('abcdef').digest()))
+        self.assertRaises(FailedValidation, client.get_package, 'p-1.0.0.tar.gz', 'user')
+
+    @patch('requests.get')
+    def test_get_package_error_status(self, get_mock):
+        get_mock.return_value = mock_response(404, [])
+        get_mock.return_value.text = '<html><title>Not Found</title></html>'
+
+        client = PackageRepoRestClient('http://repo', self.stage)
+        self.assertRaises(NotFound, client.get_package, 'p-1.0.0.tar.gz', 'user')
+        self.assertEqual(get_mock.call_count, 1)
+        get_mock.return_value.close.assert_called_once_with()
+
+        get_mock.return_value = mock_response(500, [])
+        get_mock.return_value.text = 'Server Error'
+        self.assertRaises(FailedConnection, client.get_package_list, 'user')
+        get_mock.return_value.close.assert_called_once_with()
+
+    @patch('package_repo_rest_client.time')
+    @patch('requests.get')
+    def test_get_package_client_error_not_retried(self, get_mock, time_mock):
+        get_mock.side_effect = lambda *args, **kwargs: mock_response(403, [])
+
+        client = PackageRepoRestClient('http://repo', self.stage)
+        self.assertRaises(Forbidden, client.get_package, 'p-1.0.0.tar.gz', 'user')
+        self.assertEqual(get_mock.call_count, 1)
+        time_mock.sleep.assert_not_called()
+        self.assertFalse(os.path.exists(os.path.join(self.stage, 'p-1.0.0.tar.gz')))
+
+        # a server error is
+        get_mock.side_effect = [mock_response(503, []), mock_response(200, ['abc'])]
+        path = client.get_package('p-1.0.0.tar.gz', 'user')
+        with open(path) as downloaded:
+            self.assertEqual(downloaded.read(), 'abc')
+        time_mock.sleep.assert_called_once_with(1)
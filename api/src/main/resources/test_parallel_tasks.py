@@ -0,0 +1,76 @@
+"""
+Name:       test_parallel_tasks.py
+Purpose:    Unit tests for running tasks in parallel
+            Run with main(), the easiest way is "nosetests test_*.py"
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import threading
+import unittest
+from parallel_tasks import run_tasks
+
+
+class ParallelTasksTests(unittest.TestCase):
+    def test_run_tasks_concurrently(self):
+        # both tasks must be running at once for either to finish
+        barrier = threading.Semaphore(0)
+
+        def task(value):
+            def run():
+                barrier.release()
+                barrier.acquire()
+                return value
+            return run
+
+        results, errors = run_tasks({'a': task(1), 'b': task(2)}, concurrency=2)
+
+        self.assertEqual(results, {'a': 1, 'b': 2})
+        self.assertEqual(errors, {})
+
+    def test_run_tasks_dependencies(self):
+        order = []
+
+        def task(key):
+            return lambda: order.append(key)
+
+        results, _ = run_tasks({'a': task('a'), 'b': task('b'), 'c': task('c')},
+                               concurrency=4, dependencies={'a': ['b'], 'b': ['c']})
+
+        self.assertEqual(order, ['c', 'b', 'a'])
+        self.assertEqual(sorted(results), ['a', 'b', 'c'])
+
+    def test_run_tasks_errors(self):
+        def fail():
+            raise ValueError('broken')
+
+        results, errors = run_tasks({'a': fail, 'b': lambda: 2, 'c': lambda: 3},
+                                    concurrency=1, dependencies={'c': ['a']})
+
+        self.assertEqual(results, {'b': 2})
+        self.assertEqual(errors.keys(), ['a'])
+        self.assertIsInstance(errors['a'], ValueError)
+
+    def test_run_tasks_stop_on_error(self):
+        def fail():
+            raise ValueError('broken')
+
+        results, errors = run_tasks({'a': fail, 'b': lambda: 2}, concurrency=1, stop_on_error=True)
+
+        self.assertEqual(results, {})
+        self.assertEqual(errors.keys(), ['a'])
@@ -0,0 +1,87 @@
+"""
+Name:       test_record_cache.py
+Purpose:    Unit tests for the registrar record cache
+            Run with main(), the easiest way is "nosetests test_*.py"
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import unittest
+from mock import Mock, patch
+from record_cache import RecordCache
+
+
+class RecordCacheTests(unittest.TestCase):
+    def test_hit_after_miss(self):
+        loader = Mock(return_value={'status': 'CREATED'})
+        cache = RecordCache(max_size=10, ttl=60)
+
+        self.assertEqual(cache.get('app', loader), {'status': 'CREATED'})
+        self.assertEqual(cache.get('app', loader), {'status': 'CREATED'})
+        self.assertEqual(loader.call_count, 1)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'size': 1})
+
+    def test_none_is_cached(self):
+        loader = Mock(return_value=None)
+        cache = RecordCache(max_size=10, ttl=60)
+
+        self.assertEqual(cache.get('app', loader), None)
+        self.assertEqual(cache.get('app', loader), None)
+        self.assertEqual(loader.call_count, 1)
+
+    def test_invalidate(self):
+        loader = Mock(side_effect=['first', 'second'])
+        cache = RecordCache(max_size=10, ttl=60)
+
+        self.assertEqual(cache.get('app', loader), 'first')
+        cache.invalidate('app')
+        self.assertEqual(cache.get('app', loader), 'second')
+
+    def test_invalidate_during_load(self):
+        cache = RecordCache(max_size=10, ttl=60)
+
+        def racing_load():
+            cache.invalidate('app')
+            return 'stale'
+
+        self.assertEqual(cache.get('app', racing_load), 'stale')
+        self.assertEqual(cache.get('app', lambda: 'fresh'), 'fresh')
+
+    @patch('record_cache.time')
+    def test_expiry(self, time_mock):
+        time_mock.time.return_value = 100
+        loader = Mock(side_effect=['first', 'second'])
+        cache = RecordCache(max_size=10, ttl=60)
+
+        self.assertEqual(cache.get('app', loader), 'first')
+        time_mock.time.return_value = 159
+        self.assertEqual(cache.get('app', loader), 'first')
+        time_mock.time.return_value = 161
+        self.assertEqual(cache.get('app', loader), 'second')
+
+    def test_least_recently_used_evicted(self):
+        cache = RecordCache(max_size=2, ttl=60)
+        cache.get('a', lambda: 1)
+        cache.get('b', lambda: 2)
+        # touch 'a' so 'b' becomes the oldest
+        cache.get('a', lambda: -1)
+        cache.get('c', lambda: 3)
+
+        self.assertEqual(cache.get('a', lambda: -1), 1)
+        self.assertEqual(cache.get('b', lambda: -2), -2)
+        self.assertEqual(cache.stats()['size'], 2)
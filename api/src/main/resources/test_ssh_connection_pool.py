@@ -0,0 +1,133 @@
+"""
+Name:       test_ssh_connection_pool.py
+Purpose:    Unit tests for the SSH connection pool
+            Run with main(), the easiest way is "nosetests test_*.py"
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import socket
+import threading
+import unittest
+from mock import patch, MagicMock
+import spur
+from ssh_connection_pool import SshConnectionPool
+from exceptiondef import FailedConnection
+
+
+class SshConnectionPoolTests(unittest.TestCase):
+    @patch('ssh_connection_pool.spur.SshShell')
+    def test_connection_reused(self, shell_mock):
+        shell_mock.side_effect = lambda **kwargs: MagicMock()
+        pool = SshConnectionPool(sessions_per_host=2)
+
+        with pool.connection('host', 'user', 'key') as first:
+            pass
+        with pool.connection('host', 'user', 'key') as second:
+            pass
+        with pool.connection('other', 'user', 'key') as other:
+            pass
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(shell_mock.call_count, 2)
+
+    @patch('ssh_connection_pool.spur.SshShell')
+    def test_connection_per_host_limit(self, shell_mock):
+        pool = SshConnectionPool(sessions_per_host=1, timeout=0.01)
+
+        with pool.connection('host', 'user', 'key'):
+            with self.assertRaises(FailedConnection):
+                with pool.connection('host', 'user', 'key'):
+                    pass
+
+    @patch('ssh_connection_pool.spur.SshShell')
+    def test_connection_reopened(self, shell_mock):
+        shell_mock.side_effect = lambda **kwargs: MagicMock()
+        pool = SshConnectionPool(sessions_per_host=1, max_idle=-1)
+
+        with pool.connection('host', 'user', 'key') as first:
+            pass
+        with pool.connection('host', 'user', 'key') as second:
+            pass
+
+        # idle for longer than max_idle
+        self.assertIsNot(first, second)
+        first.__exit__.assert_called_once_with(None, None, None)
+
+    @patch('ssh_connection_pool.spur.SshShell')
+    def test_connection_error(self, shell_mock):
+        shell_mock.side_effect = lambda **kwargs: MagicMock()
+        pool = SshConnectionPool(sessions_per_host=1)
+
+        with self.assertRaises(socket.error):
+            with pool.connection('host', 'user', 'key') as first:
+                raise socket.error('reset')
+        with pool.connection('host', 'user', 'key') as second:
+            pass
+
+        self.assertIsNot(first, second)
+
+    @patch('ssh_connection_pool.spur.SshShell')
+    def test_connection_interrupted(self, shell_mock):
+        shell_mock.side_effect = lambda **kwargs: MagicMock()
+        pool = SshConnectionPool(sessions_per_host=1)
+
+        # a session broken mid-command is not handed out again
+        with self.assertRaises(EOFError):
+            with pool.connection('host', 'user', 'key') as first:
+                raise EOFError()
+        # but a command that failed leaves the connection usable
+        with self.assertRaises(spur.RunProcessError):
+            with pool.connection('host', 'user', 'key') as second:
+                raise spur.RunProcessError(1, '', 'failed')
+        with pool.connection('host', 'user', 'key') as third:
+            pass
+
+        self.assertIsNot(first, second)
+        first.__exit__.assert_called_once_with(None, None, None)
+        self.assertIs(second, third)
+
+    @patch('ssh_connection_pool.spur.SshShell')
+    def test_close_borrowed(self, shell_mock):
+        closed = threading.Event()
+        shell = MagicMock()
+        shell.__exit__.side_effect = lambda *args: closed.set()
+        shell_mock.return_value = shell
+        pool = SshConnectionPool(sessions_per_host=1, timeout=0.01)
+
+        def hung_command():
+            try:
+                with pool.connection('host', 'user', 'key'):
+                    # a command blocked on the host fails once its connection is closed
+                    closed.wait(5)
+                    raise socket.error('closed')
+            except socket.error:
+                pass
+
+        thread = threading.Thread(target=hung_command)
+        thread.start()
+        while not pool._borrowed:  # pylint: disable=protected-access
+            thread.join(0.01)
+        pool.close_borrowed(thread)
+        thread.join(5)
+
+        self.assertTrue(closed.is_set())
+        # the slot is back in the pool
+        with pool.connection('host', 'user', 'key'):
+            pass
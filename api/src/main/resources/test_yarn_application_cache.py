@@ -0,0 +1,120 @@
+"""
+Name:       test_yarn_application_cache.py
+Purpose:    Unit tests for the YARN application list cache
+            Run with main(), the easiest way is "nosetests test_*.py"
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import json
+import unittest
+from mock import patch, Mock
+from yarn_application_cache import YarnApplicationCache, read_yarn_applications
+
+
+def rm_response(apps, status_code=200):
+    response = Mock()
+    response.status_code = status_code
+    response.iter_content.return_value = [json.dumps({'apps': {'app': apps}})]
+    return response
+
+
+class YarnApplicationCacheTests(unittest.TestCase):
+
+    @patch('requests.get')
+    def test_latest_by_name(self, get_mock):
+        get_mock.return_value = rm_response([
+            {'name': 'job', 'id': 'application_1', 'startedTime': 100},
+            {'name': 'job', 'id': 'application_2', 'startedTime': 200},
+            {'name': 'other', 'id': 'application_3', 'startedTime': None}])
+
+        cache = YarnApplicationCache()
+        applications = cache.get_applications(['rm1:8088', None])
+
+        self.assertEqual(applications['job']['id'], 'application_2')
+        self.assertEqual(applications['other']['id'], 'application_3')
+        self.assertEqual(cache.get_applications(['rm1:8088', None]), applications)
+        self.assertEqual(get_mock.call_count, 1)
+
+    @patch('time.time')
+    @patch('requests.get')
+    def test_expires(self, get_mock, time_mock):
+        get_mock.return_value = rm_response([])
+        time_mock.return_value = 1000
+
+        cache = YarnApplicationCache(ttl=5)
+        cache.get_applications(['rm1:8088'])
+        time_mock.return_value = 1004
+        cache.get_applications(['rm1:8088'])
+        self.assertEqual(get_mock.call_count, 1)
+
+        time_mock.return_value = 1006
+        cache.get_applications(['rm1:8088'])
+        self.assertEqual(get_mock.call_count, 2)
+
+    @patch('requests.get')
+    def test_failover(self, get_mock):
+        def get(url, **kwargs):
+            if 'rm1' in url:
+                raise ValueError('standby')
+            return rm_response([{'name': 'job', 'id': 'application_1', 'startedTime': 100}])
+        get_mock.side_effect = get
+
+        cache = YarnApplicationCache(ttl=0)
+        self.assertEqual(cache.get_applications(['rm1:8088', 'rm2:8088'])['job']['id'], 'application_1')
+        # the resource manager that answered is asked first next time
+        cache.get_applications(['rm1:8088', 'rm2:8088'])
+        self.assertEqual([call[0][0] for call in get_mock.call_args_list],
+                         ['http://rm1:8088/ws/v1/cluster/apps',
+                          'http://rm2:8088/ws/v1/cluster/apps',
+                          'http://rm2:8088/ws/v1/cluster/apps'])
+
+    @patch('time.time')
+    @patch('requests.get')
+    def test_failure_cached_briefly(self, get_mock, time_mock):
+        get_mock.side_effect = [ValueError('down'), rm_response([], status_code=503), rm_response([])]
+        time_mock.return_value = 1000
+
+        cache = YarnApplicationCache(ttl=5, failure_ttl=2)
+        self.assertEqual(cache.get_applications(['rm1:8088']), None)
+        # callers that queued behind the failed fetch do not repeat it
+        time_mock.return_value = 1001
+        self.assertEqual(cache.get_applications(['rm1:8088']), None)
+        self.assertEqual(get_mock.call_count, 1)
+
+        time_mock.return_value = 1003
+        self.assertEqual(cache.get_applications(['rm1:8088']), None)
+        time_mock.return_value = 1006
+        self.assertEqual(cache.get_applications(['rm1:8088']), {})
+        self.assertEqual(get_mock.call_count, 3)
+
+    def test_read_yarn_applications(self):
+        body = json.dumps({'apps': {'app': [
+            {'name': 'job', 'id': 'application_1', 'state': 'RUNNING', 'diagnostics': '', 'amContainerLogs': 'x' * 100},
+            {'name': 'other', 'id': 'application_2', 'state': 'FINISHED'}]}})
+
+        # the result does not depend on where the body is split
+        for size in [1, 7, len(body)]:
+            chunks = [body[start:start + size] for start in range(0, len(body), size)]
+            self.assertEqual(list(read_yarn_applications(chunks)), [
+                {'name': 'job', 'id': 'application_1', 'state': 'RUNNING', 'diagnostics': ''},
+                {'name': 'other', 'id': 'application_2', 'state': 'FINISHED'}])
+        self.assertEqual([app['id'] for app in read_yarn_applications([body], names=set(['other']))],
+                         ['application_2'])
+        self.assertEqual(list(read_yarn_applications(['{"apps":', 'null}'])), [])
+        self.assertRaises(ValueError, list, read_yarn_applications([body[:80]]))
@@ -0,0 +1,176 @@
+"""
+Name:       yarn_application_cache.py
+Purpose:    Short lived snapshot of the YARN resource manager application list, indexed by name
+Author:     PNDA team
+
+Created:    18/10/2026
+
+Copyright (c) 2016 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Apache License, Version 2.0 (the "License").
+You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+The code, technical concepts, and all information contained herein, are the property of Cisco Technology, Inc.
+and/or its affiliated entities, under various laws including copyright, international treaties, patent,
+and/or contract. Any use of the material herein must be in accordance with the terms of the License.
+All rights not expressly granted by the License are reserved.
+
+Unless required by applicable law or agreed to separately in writing, software distributed under the
+License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+either express or implied.
+"""
+
+import re
+import json
+import time
+import logging
+import threading
+
+import requests
+
+DEFAULT_YARN_CACHE_TTL = 5
+DEFAULT_YARN_FAILURE_TTL = 2
+DEFAULT_YARN_REQUEST_TIMEOUT = 10
+STREAM_CHUNK_SIZE = 64 * 1024
+# the fields of a YARN application that are used, the rest of each record is dropped as it is read
+YARN_APP_FIELDS = ['name', 'id', 'state', 'finalStatus', 'startedTime', 'trackingUrl', 'diagnostics']
+# states of applications that have not finished yet
+YARN_ACTIVE_STATES = ['NEW', 'NEW_SAVING', 'SUBMITTED', 'ACCEPTED', 'RUNNING']
+
+_APP_ARRAY_START = re.compile(r'"app"\s*:\s*\[')
+
+
+def read_yarn_applications(chunks, names=None, fields=None):
+    """
+    Parses a resource manager application list one application at a time, so the whole response
+    is never held in memory or parsed into one document.
+    :param chunks: an iterable of pieces of the response body, such as response.iter_content()
+    :param names: only return applications with one of these names, or all of them if None
+    :param fields: the fields to keep of each application, YARN_APP_FIELDS by default
+    :return: a generator of dictionaries of the kept fields of each application
+    """
+    fields = fields or YARN_APP_FIELDS
+    chunks = iter(chunks)
+    decoder = json.JSONDecoder()
+    buf = ''
+
+    # skip to the application array, there is none if the list is empty
+    while True:
+        match = _APP_ARRAY_START.search(buf)
+        if match is not None:
+            buf = buf[match.end():]
+            break
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+        # keep enough of the end to find a marker split between two chunks
+        buf = buf[-16:] + chunk
+
+    pos = 0
+    while True:
+        while pos < len(buf) and buf[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(buf) and buf[pos] == ']':
+            return
+        try:
+            if pos == len(buf):
+                raise ValueError('more input needed')
+            app, pos = decoder.raw_decode(buf, pos)
+        except ValueError:
+            # the application is not all in the buffer yet
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise ValueError('Truncated YARN application list')
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        if names is None or app.get('name') in names:
+            yield dict((field, app[field]) for field in fields if field in app)
+
+
+def get_yarn_start_time(app_info):
+    try:
+        return int(app_info['startedTime'])
+    except (KeyError, TypeError, ValueError):
+        return 0
+
+
+def keep_latest(applications, app_infos):
+    """
+    Adds applications to a dictionary of name to the latest application with that name, replacing
+    an application that is already there with newer information about it
+    :return: the dictionary
+    """
+    for app in app_infos:
+        name = app.get('name')
+        latest = applications.get(name)
+        if latest is None or latest.get('id') == app.get('id') \
+                or get_yarn_start_time(app) > get_yarn_start_time(latest):
+            applications[name] = app
+    return applications
+
+
+class YarnApplicationCache(object):
+    """
+    Holds the application list of a YARN cluster for a few seconds, as a dictionary of application
+    name to the latest application with that name.
+
+    The list is fetched from the first resource manager that answers, starting with the one that
+    answered last, so after a failover the standby is not asked first every time. Callers arriving
+    while the list is being fetched wait for that request rather than making their own. A failed
+    fetch is cached for a shorter time, so callers that waited for it return at once instead of
+    each trying every resource manager again.
+    """
+
+    def __init__(self, ttl=DEFAULT_YARN_CACHE_TTL, timeout=DEFAULT_YARN_REQUEST_TIMEOUT,
+                 failure_ttl=DEFAULT_YARN_FAILURE_TTL):
+        self._ttl = ttl
+        self._timeout = timeout
+        self._failure_ttl = failure_ttl
+        # held while fetching so a burst of callers shares one request
+        self._lock = threading.Lock()
+        # tuple of resource managers -> (expiry time, applications by name or None after a failure)
+        self._snapshots = {}
+        # tuple of resource managers -> the one that answered last
+        self._active = {}
+
+    def get_applications(self, resource_managers):
+        """
+        :param resource_managers: host:port of the resource managers of the cluster, None entries are ignored
+        :return: dictionary of application name to the YARN application info of the latest application
+                 with that name, or None if no resource manager could be queried
+        """
+        key = tuple(resource_manager for resource_manager in resource_managers if resource_manager is not None)
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None and snapshot[0] > time.time():
+                return snapshot[1]
+
+            active = self._active.get(key)
+            for resource_manager in sorted(key, key=lambda candidate: candidate != active):
+                applications = self._get_applications_from_rm(resource_manager)
+                if applications is not None:
+                    self._active[key] = resource_manager
+                    self._snapshots[key] = (time.time() + self._ttl, applications)
+                    return applications
+            self._snapshots[key] = (time.time() + self._failure_ttl, None)
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+
+    def _get_applications_from_rm(self, resource_manager):
+        logging.debug('Querying list of yarn applications from %s', resource_manager)
+        url = 'http://%s/ws/v1/cluster/apps' % resource_manager
+        try:
+            response = requests.get(url, headers={'Accept': 'application/json'}, timeout=self._timeout, stream=True)
+            try:
+                if response.status_code != 200:
+                    raise ValueError('HTTP %s' % response.status_code)
+                return keep_latest({}, read_yarn_applications(response.iter_content(STREAM_CHUNK_SIZE)))
+            finally:
+                response.close()
+        except Exception:
+            logging.info('Failed to query application list from %s', url)
+        return None